@@ -0,0 +1,253 @@
+"""Redesign many sites in one invocation, one worker process per site."""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import yaml
+from pydantic import BaseModel, Field
+
+from .settings import CONFIG_DIR, OUTPUT_DIR, BatchSettings, load_config, load_tasks
+
+
+class SiteJob(BaseModel):
+    name: str
+    config: Dict[str, Any]
+    output_dir: str
+
+
+class SiteResult(BaseModel):
+    name: str
+    url: str
+    status: str
+    duration: float = 0.0
+    output_dir: str
+    report: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchReport(BaseModel):
+    output_dir: str
+    sites: List[SiteResult] = Field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> List[SiteResult]:
+        return [s for s in self.sites if s.status != "ok"]
+
+    def markdown(self) -> str:
+        lines = [
+            "| Site | URL | Status | Duration | Output |",
+            "| --- | --- | --- | ---: | --- |",
+        ]
+        for s in self.sites:
+            error = " ".join(s.error.split())[:120].replace("|", "\\|") if s.error else ""
+            status = f"{s.status}: {error}" if error else s.status
+            lines.append(f"| {s.name} | {s.url} | {status} | {s.duration:.1f}s | {s.output_dir} |")
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        ok = len(self.sites) - len(self.failed)
+        return (
+            f"\nBatch finished in {self.duration:.1f}s: {ok} of {len(self.sites)} sites succeeded\n\n"
+            + self.markdown()
+        )
+
+
+def site_slug(url: str) -> str:
+    """Folder name for a site: its host without www, reduced to [a-z0-9-]."""
+    host = urlsplit(url if "//" in url else "//" + url).netloc.lower().removeprefix("www.")
+    return re.sub(r"[^a-z0-9]+", "-", host).strip("-") or "site"
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_site_configs(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read per-site overrides from a YAML/JSON list (optionally under a
+    ``sites`` key) or a plain text file with one URL per line. A bare URL
+    entry overrides only ``current_website_url``.
+    """
+    text = Path(path).read_text()
+    if Path(path).suffix.lower() in (".yaml", ".yml", ".json"):
+        data = yaml.safe_load(text) or []
+        if isinstance(data, dict):
+            data = data.get("sites", [])
+    else:
+        data = [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+    sites = []
+    for entry in data:
+        if isinstance(entry, str):
+            entry = {"current_website_url": entry}
+        if not entry.get("current_website_url"):
+            raise ValueError(f"site entry without current_website_url: {entry}")
+        sites.append(entry)
+    return sites
+
+
+def plan_jobs(base_config: Dict[str, Any], sites: List[Dict[str, Any]], output_dir: Path) -> List[SiteJob]:
+    """One job per site, each with the merged config and its own output folder."""
+    jobs = []
+    used: Set[str] = set()
+    for site in sites:
+        base = site.get("name") or site_slug(site["current_website_url"])
+        name, n = base, 1
+        # "a", "a", "a-2" must not end up sharing a folder
+        while name in used:
+            n += 1
+            name = f"{base}-{n}"
+        used.add(name)
+        overrides = {key: value for key, value in site.items() if key != "name"}
+        jobs.append(SiteJob(name=name, config=_merge(base_config, overrides), output_dir=str(output_dir / name)))
+    return jobs
+
+
+def _run_site(job: SiteJob, task_configs: Dict[str, Dict[str, Any]]) -> None:
+    """Worker process entry point: run one site with its output in its own folder."""
+    output_dir = Path(job.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # Agents are verbose; keep each site's log apart instead of interleaving
+    log = open(output_dir / "run.log", "w", buffering=1)
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    sys.stdout = sys.stderr = log
+
+    result: Dict[str, Any] = {"status": "ok"}
+    try:
+        from .main import Config, run_pipeline
+        _, report_path = run_pipeline(Config(**job.config), task_configs, output_dir, preview=False)
+        result["report"] = str(report_path)
+    except BaseException as e:
+        traceback.print_exc()
+        result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+    (output_dir / "result.json").write_text(json.dumps(result))
+    log.flush()
+
+
+def run_batch(
+    jobs: List[SiteJob],
+    task_configs: Dict[str, Dict[str, Any]],
+    settings: Optional[BatchSettings] = None,
+    output_dir: Optional[Path] = None
+) -> BatchReport:
+    """
+    Run the jobs with at most ``settings.workers`` processes at once.
+
+    Each site runs in a fresh process, so a crash, hang or leaked state in
+    one site never affects another; a site that exceeds ``site_timeout``
+    is terminated and reported while the others carry on. All workers use
+    the same on-disk LLM cache (SQLite in WAL mode), so prompts shared
+    between sites are only paid for once.
+    """
+    settings = settings or BatchSettings()
+    context = multiprocessing.get_context("spawn")
+    report = BatchReport(output_dir=str(output_dir or ""))
+    pending = deque(jobs)
+    running: Dict[int, Any] = {}
+    started = time.perf_counter()
+
+    def finish(job: SiteJob, process, job_started: float, timed_out: bool = False) -> None:
+        duration = time.perf_counter() - job_started
+        result_path = Path(job.output_dir) / "result.json"
+        if timed_out:
+            outcome = {"status": "timed out", "error": f"terminated after {settings.site_timeout:.0f}s"}
+        elif result_path.exists():
+            outcome = json.loads(result_path.read_text())
+        else:
+            outcome = {"status": "failed", "error": f"worker exited with code {process.exitcode}"}
+        site = SiteResult(
+            name=job.name,
+            url=job.config["current_website_url"],
+            duration=duration,
+            output_dir=job.output_dir,
+            **outcome
+        )
+        report.sites.append(site)
+        print(f"[batch] {site.name}: {site.status} in {duration:.1f}s")
+
+    try:
+        while pending or running:
+            while pending and len(running) < settings.workers:
+                job = pending.popleft()
+                process = context.Process(target=_run_site, args=(job, task_configs), name=f"site-{job.name}")
+                process.start()
+                running[process.sentinel] = (job, process, time.perf_counter())
+                print(f"[batch] started {job.name} ({job.config['current_website_url']})")
+
+            for sentinel in wait(list(running), timeout=1.0):
+                job, process, job_started = running.pop(sentinel)
+                process.join()
+                finish(job, process, job_started)
+
+            if settings.site_timeout:
+                now = time.perf_counter()
+                for sentinel, (job, process, job_started) in list(running.items()):
+                    if now - job_started > settings.site_timeout:
+                        process.terminate()
+                        process.join()
+                        del running[sentinel]
+                        finish(job, process, job_started, timed_out=True)
+    finally:
+        for job, process, _ in running.values():
+            process.terminate()
+            process.join()
+
+    order = {job.name: i for i, job in enumerate(jobs)}
+    report.sites.sort(key=lambda s: order[s.name])
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> BatchReport:
+    parser = argparse.ArgumentParser(prog="crew batch", description=__doc__)
+    parser.add_argument("sites", nargs="+", help="YAML/JSON/text file(s) of site configs, or site URLs")
+    parser.add_argument("--workers", type=int, help="concurrent sites (default: batch.workers in config.yaml)")
+    parser.add_argument("--site-timeout", type=float, help="seconds before a site is terminated")
+    parser.add_argument("--output-dir", type=Path, help="parent folder for this batch run")
+    parser.add_argument("--config", type=Path, default=CONFIG_DIR / "config.yaml", help="base config.yaml for every site")
+    parser.add_argument("--tasks", type=Path, default=CONFIG_DIR / "tasks.yaml", help="tasks.yaml to use")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    settings = config.batch.model_copy(update={
+        k: v for k, v in {"workers": args.workers, "site_timeout": args.site_timeout}.items() if v is not None
+    })
+    sites: List[Dict[str, Any]] = []
+    for source in args.sites:
+        if Path(source).is_file():
+            sites += load_site_configs(Path(source))
+        else:
+            sites.append({"current_website_url": source})
+
+    root = args.output_dir or Path(settings.output_dir or OUTPUT_DIR / "batch")
+    batch_dir = root / datetime.now().strftime("%Y%m%d-%H%M%S")
+    jobs = plan_jobs(config.model_dump(), sites, batch_dir)
+    print(f"Running {len(jobs)} sites with {settings.workers} workers; output in {batch_dir}")
+
+    report = run_batch(jobs, load_tasks(args.tasks), settings, batch_dir)
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    (batch_dir / "summary.md").write_text("# Batch Summary\n\n" + report.markdown() + "\n")
+    print(report.summary())
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main().failed else 0)
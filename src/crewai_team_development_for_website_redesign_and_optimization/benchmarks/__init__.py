@@ -0,0 +1,5 @@
+"""Reproducible benchmarks for the website redesign pipeline.
+
+Each module is runnable on its own, e.g.
+``python -m crewai_team_development_for_website_redesign_and_optimization.benchmarks.crawler``.
+"""
@@ -0,0 +1,44 @@
+"""Crawl a local fixture site at increasing concurrency levels."""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from ..crawler import CrawlSettings, SiteCrawler
+from ..main import start_local_server, stop_local_server
+from .fixtures import build_fixture_site
+
+
+def run(pages: int = 200, concurrency=(1, 4, 16), port: int = 8765) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        build_fixture_site(Path(tmp), base_url, pages=pages)
+        start_local_server(tmp, port=port)
+        try:
+            print(f"\nCrawling {pages}-page fixture site at {base_url}")
+            for workers in concurrency:
+                settings = CrawlSettings(
+                    max_pages=pages + 10,
+                    max_depth=pages,
+                    concurrency=workers,
+                    per_host_concurrency=workers,
+                )
+                started = time.perf_counter()
+                result = asyncio.run(SiteCrawler(settings).crawl(base_url))
+                elapsed = time.perf_counter() - started
+                print(
+                    f"concurrency={workers:>3}  pages={len(result.pages):>5}  "
+                    f"{elapsed:6.2f}s  {len(result.pages) / elapsed:8.1f} pages/s"
+                )
+        finally:
+            stop_local_server()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    run(args.pages, args.concurrency, args.port)
@@ -0,0 +1,94 @@
+"""CSS purge and critical CSS inlining on a generated site with a framework-sized stylesheet."""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ..css_optimizer import optimize_css
+from ..settings import CSSSettings
+from .fixtures import WORDS
+
+COMPONENTS = ["card", "hero", "nav", "btn", "alert", "badge", "modal", "tab", "grid", "list", "form", "table"]
+MODIFIERS = ["primary", "secondary", "large", "small", "active", "muted", "outline", "dark"]
+# The mobile navigation toggle of generate_code: a button only the script creates
+SCRIPT = """document.addEventListener('DOMContentLoaded', function () {
+    const nav = document.querySelector('.nav-links');
+    const toggleButton = document.createElement('button');
+    toggleButton.classList.add('nav-toggle');
+    toggleButton.addEventListener('click', () => nav.classList.toggle('active'));
+    document.querySelector('.main-nav').prepend(toggleButton);
+});
+"""
+# Rules for elements the script creates, which the purge has to keep
+SCRIPT_SELECTORS = ["button.nav-toggle", ".main-nav button", ".main-nav > .nav-toggle"]
+
+
+def stylesheet(rng: random.Random) -> str:
+    """Component classes with modifiers, states and breakpoints, most of them unused by any page."""
+    rules = [":root { --primary: #2C3E50; --accent: #E74C3C; }", "body { margin: 0; font-family: sans-serif; }"]
+    for component in COMPONENTS:
+        rules.append(f".{component} {{ padding: {rng.randint(1, 9)}px; color: var(--primary); }}")
+        for modifier in MODIFIERS:
+            rules.append(f".{component}--{modifier} {{ margin: {rng.randint(1, 9)}px; }}")
+            rules.append(f".{component}--{modifier}:hover, .{component}--{modifier}:focus {{ color: var(--accent); }}")
+            rules.append(f".{component} > .{component}__{modifier} + .{component}__{modifier} {{ gap: 1rem; }}")
+    breakpoints = "".join(
+        f".{c}--{m} {{ width: {rng.randint(10, 90)}%; }}" for c in COMPONENTS for m in MODIFIERS[:3]
+    )
+    rules.append(f"@media (max-width: 768px) {{ {breakpoints} }}")
+    rules += [f"{selector} {{ display: none; }}" for selector in SCRIPT_SELECTORS]
+    return "\n".join(rules) + "\n"
+
+
+def build_site(directory: Path, pages: int, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    (directory / "css").mkdir(parents=True)
+    (directory / "css" / "styles.css").write_text(stylesheet(rng))
+    (directory / "js").mkdir()
+    (directory / "js" / "main.js").write_text(SCRIPT)
+    for i in range(pages):
+        used = rng.sample(COMPONENTS, 4)
+        blocks = "".join(
+            f'<div class="{c} {c}--{rng.choice(MODIFIERS)}"><p class="{c}__{MODIFIERS[0]}">'
+            f'{" ".join(rng.choice(WORDS) for _ in range(30))}</p></div>\n'
+            for c in used for _ in range(6)
+        )
+        (directory / f"page-{i}.html").write_text(
+            f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<title>Page {i}</title>\n'
+            f'<link rel="stylesheet" href="css/styles.css">\n</head>\n<body>\n'
+            f'<nav class="nav main-nav"></nav>\n<a class="btn btn--primary nav-links" href="/">Home</a>\n'
+            f'<main>\n{blocks}</main>\n<script src="js/main.js"></script>\n'
+            "</body>\n</html>\n"
+        )
+
+
+def run(pages: int = 200, above_fold_elements: int = 80) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        site_dir = Path(tmp)
+        build_site(site_dir, pages)
+        started = time.perf_counter()
+        report = optimize_css(site_dir, CSSSettings(above_fold_elements=above_fold_elements))
+        elapsed = time.perf_counter() - started
+        purged = (site_dir / "css" / "styles.css").read_text()
+    missing = [selector for selector in SCRIPT_SELECTORS if selector not in purged]
+    sheet = report.stylesheets[0]
+    inlined = sum(p.critical_bytes for p in report.pages) / max(len(report.pages), 1)
+    print(
+        f"{pages} pages: {elapsed:.2f}s ({pages / elapsed:.0f} pages/s), stylesheet "
+        f"{sheet.original_bytes:,} B -> {sheet.purged_bytes:,} B ({sheet.removed_selectors} selectors removed), "
+        f"{inlined / 1024:.1f} KB critical CSS per page, render-blocking requests "
+        f"{report.blocking_before} -> {report.blocking_after}"
+    )
+    if missing:
+        print(f"Purged rules for script-created elements: {', '.join(missing)}")
+    return not missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--above-fold-elements", type=int, default=80)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.pages, args.above_fold_elements) else 1)
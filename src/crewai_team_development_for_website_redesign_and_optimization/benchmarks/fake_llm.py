@@ -0,0 +1,216 @@
+"""Scripted local stand-ins for the chat model and the search API."""
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+
+FINAL = "Thought: I now know the final answer\nFinal Answer: {answer}"
+ACTION = "Thought: I should gather data first\nAction: {tool}\nAction Input: {tool_input}"
+
+
+def frontend_answer(pages: int = 4) -> str:
+    """Multi-file frontend output in the ``// filename:`` format the site writer parses."""
+    nav = "".join(f'<li><a href="page-{i}.html">Page {i}</a></li>' for i in range(1, pages))
+    files = [
+        "// filename: index.html\n<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n"
+        "<title>Fixture redesign</title>\n<link rel=\"stylesheet\" href=\"css/styles.css\">\n"
+        "<script defer src=\"js/main.js\"></script>\n</head>\n"
+        f"<body>\n<nav><ul>{nav}</ul></nav>\n<main><h1>Redesigned home</h1>\n"
+        + "<p>Accreditation services for police departments.</p>\n" * 20
+        + "</main>\n</body>\n</html>"
+    ]
+    for i in range(1, pages):
+        files.append(
+            f"// filename: page-{i}.html\n<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n"
+            f"<title>Page {i}</title>\n<link rel=\"stylesheet\" href=\"css/styles.css\">\n</head>\n"
+            f"<body>\n<h1>Page {i}</h1>\n" + "<p>Standards, policy and training support.</p>\n" * 20
+            + "</body>\n</html>"
+        )
+    files.append(
+        "// filename: css/styles.css\n:root {\n    --primary-color: #2C3E50;\n    --accent-color: #E74C3C;\n}\n"
+        + "".join(f".block-{i} {{\n    margin: {i}px;\n    color: var(--primary-color);\n}}\n" for i in range(50))
+    )
+    files.append(
+        "// filename: js/main.js\ndocument.addEventListener('DOMContentLoaded', function () {\n"
+        "    document.querySelectorAll('a').forEach(function (a) { a.dataset.ready = '1'; });\n});"
+    )
+    return "\n\n".join(files)
+
+
+def default_script(site_url: str, frontend_pages: int = 4) -> List[Dict[str, Any]]:
+    """
+    One entry per tasks.yaml task, matched on a phrase of its description.
+    Entries with an ``action`` call that tool once before answering. The
+    answers carry the phrases format_report files each section under.
+    """
+    return [
+        {
+            "match": "Crawl the current website",
+            "action": ("WebAnalyzer", site_url),
+            "answer": "Website Analysis\nThe crawl found consistent templates, missing meta "
+                      "descriptions on some pages and render-blocking scripts.",
+        },
+        {
+            "match": "propose a modern design",
+            "answer": "Design Proposal\nA clean grid layout with the brand's dark blue and red, "
+                      "Montserrat headings and a prominent call to action.",
+        },
+        {
+            "match": "Develop responsive HTML",
+            "answer": frontend_answer(frontend_pages),
+        },
+        {
+            "match": "Generate visual assets",
+            "answer": "Visual assets: a logo design in SVG, a favicon set and three hero banners.",
+        },
+        {
+            "match": "Rewrite or enhance the current website content",
+            "answer": "Optimized content: rewritten service descriptions with target keywords.",
+        },
+        {
+            "match": "Conduct thorough testing",
+            "action": ("PerformanceTester", site_url),
+            "answer": "QA Report\nAll pages render in current browsers; two contrast issues remain.",
+        },
+        {
+            "match": "Manage the project's timeline",
+            "answer": "Project Timeline\nWeek 1 analysis, week 2 design, weeks 3-4 build and QA.",
+        },
+        {
+            "match": "Condense the material below",
+            "answer": None,
+        },
+    ]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that answers from a script instead of calling a provider.
+
+    The prompt is matched against each entry's ``match`` phrase; the first
+    call for a task with an ``action`` returns a ReAct tool call, and once
+    the prompt contains the tool's observation the final answer follows.
+    Each call sleeps ``latency`` plus ``token_latency`` per output token
+    (whitespace-separated words), so runs are reproducible and the cost of
+    the model is known exactly. Usage is reported like OpenAI's.
+    """
+
+    script: List[Dict[str, Any]]
+    model_name: str = "scripted"
+    latency: float = 0.05
+    token_latency: float = 0.0
+    streaming: bool = False
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _tokens: int = PrivateAttr(default=0)
+    _busy: float = PrivateAttr(default=0.0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def respond(self, prompt: str) -> str:
+        for entry in self.script:
+            if entry["match"] not in prompt:
+                continue
+            if entry.get("action") and "Observation:" not in prompt:
+                tool, tool_input = entry["action"]
+                return ACTION.format(tool=tool, tool_input=tool_input)
+            if entry["answer"] is None:
+                # Summarizer prompts: hand back the start of the material
+                return prompt.split("Material:", 1)[-1].strip()[:2000]
+            return FINAL.format(answer=entry["answer"])
+        return FINAL.format(answer="Done.")
+
+    def _text(self, messages: List[BaseMessage], stop: Optional[List[str]]) -> str:
+        text = self.respond("\n".join(str(m.content) for m in messages))
+        for word in stop or []:
+            text = text.split(word, 1)[0]
+        return text
+
+    def _record(self, prompt_tokens: int, completion_tokens: int, seconds: float) -> None:
+        with self._lock:
+            self._calls += 1
+            self._tokens += prompt_tokens + completion_tokens
+            self._busy += seconds
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        words = self._text(messages, stop).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.token_latency)
+            token = word if i == len(words) - 1 else word + " "
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        self._record(prompt_tokens, len(words), time.perf_counter() - started)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        if self.streaming:
+            text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager))
+            completion_tokens = len(text.split())
+        else:
+            started = time.perf_counter()
+            text = self._text(messages, stop)
+            completion_tokens = len(text.split())
+            time.sleep(self.latency + self.token_latency * completion_tokens)
+            self._record(prompt_tokens, completion_tokens, time.perf_counter() - started)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+                "model_name": self.model_name,
+            },
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"calls": self._calls, "tokens": self._tokens, "busy": self._busy}
+
+
+class ScriptedSearch:
+    """Stand-in for ``SerpAPIWrapper.run``: canned results after a fixed latency."""
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> str:
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        return (
+            f"Top results for '{query.strip()}': 1. Modern professional services websites favour "
+            "clear navigation and trust signals. 2. Mobile-first layouts with fast load times "
+            "rank better. 3. Accessible contrast and typography improve engagement."
+        )
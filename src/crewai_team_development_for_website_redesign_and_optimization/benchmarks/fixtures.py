@@ -0,0 +1,130 @@
+import random
+from pathlib import Path
+
+SECTIONS = ["services", "about", "news", "resources", "training", "contact"]
+
+WORDS = (
+    "accreditation police department standards policy compliance training "
+    "assessment review community service professional officers association "
+    "program support consulting audit readiness documentation leadership "
+    "accountability agency solutions guidance process quality"
+).split()
+
+STYLESHEET = """@import url("base.css");
+
+@font-face {
+    font-family: "Fixture Sans";
+    src: url("../fonts/fixture-sans.woff2") format("woff2");
+}
+
+body {
+    font-family: "Fixture Sans", sans-serif;
+    color: #2C3E50;
+}
+
+.hero {
+    background: url("../images/hero.svg") center/cover;
+    padding: 4rem 2rem;
+}
+"""
+
+BASE_STYLESHEET = """* { box-sizing: border-box; }
+a { color: #E74C3C; }
+"""
+
+SCRIPT = """document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('a').forEach(function (a) { a.dataset.ready = '1'; });
+});
+"""
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="64" height="64"><rect width="64" height="64" fill="#2C3E50"/></svg>'
+
+
+def page_path(index: int) -> str:
+    """Site-relative path of the fixture page with the given index."""
+    if index == 0:
+        return "/"
+    return f"/{SECTIONS[index % len(SECTIONS)]}/page-{index}.html"
+
+
+def fixture_page(index: int, pages: int, rng: random.Random, links_per_page: int = 6, paragraphs: int = 8) -> str:
+    """HTML of fixture page ``index`` of a ``pages``-page site, drawn from ``rng``."""
+    targets = [page_path(rng.randrange(pages)) for _ in range(links_per_page)]
+    # Chain every page to the next one so the whole site is reachable
+    targets.append(page_path((index + 1) % pages))
+    body = [f"<h1>Fixture page {index}</h1>"]
+    for p in range(paragraphs):
+        if p % 3 == 0:
+            body.append(f"<h2>Section {p}</h2>")
+        body.append("<p>" + " ".join(rng.choice(WORDS) for _ in range(60)) + "</p>")
+    body.append('<img src="/images/hero.svg" alt="Hero" width="64" height="64">')
+    body.append('<img src="/images/logo.svg">')
+    links = "".join(f'<li><a href="{t}">Page link</a></li>' for t in targets)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Fixture page {index}</title>
+{'<meta name="description" content="Synthetic fixture page">' if index % 4 else ''}
+<link rel="stylesheet" href="/css/styles.css">
+<script src="/js/app.js"></script>
+</head>
+<body>
+<nav><ul>{links}<li><a href="/private/">Private</a></li><li><a href="https://example.com/">External</a></li></ul></nav>
+<main class="hero">{''.join(body)}</main>
+</body>
+</html>
+"""
+
+
+def build_fixture_site(
+    directory: Path,
+    base_url: str,
+    pages: int = 200,
+    links_per_page: int = 6,
+    paragraphs: int = 8,
+    seed: int = 7,
+) -> Path:
+    """
+    Write a deterministic multi-page site into ``directory``.
+
+    Pages link to each other (plus one external and one robots-disallowed
+    link), reference a shared stylesheet, script, font and images, and are
+    partially listed in ``sitemap.xml`` so both link discovery and sitemap
+    seeding are exercised.
+    """
+    rng = random.Random(seed)
+    directory = Path(directory)
+    base_url = base_url.rstrip("/")
+
+    for sub, name, content in [
+        ("css", "styles.css", STYLESHEET),
+        ("css", "base.css", BASE_STYLESHEET),
+        ("js", "app.js", SCRIPT),
+        ("images", "hero.svg", SVG),
+        ("images", "logo.svg", SVG),
+    ]:
+        (directory / sub).mkdir(parents=True, exist_ok=True)
+        (directory / sub / name).write_text(content)
+    (directory / "fonts").mkdir(parents=True, exist_ok=True)
+    (directory / "fonts" / "fixture-sans.woff2").write_bytes(bytes(rng.getrandbits(8) for _ in range(4096)))
+    (directory / "private").mkdir(parents=True, exist_ok=True)
+    (directory / "private" / "index.html").write_text("<html><head><title>Private</title></head></html>")
+
+    for index in range(pages):
+        html = fixture_page(index, pages, rng, links_per_page, paragraphs)
+        path = directory / ("index.html" if index == 0 else page_path(index).lstrip("/"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(html)
+
+    (directory / "robots.txt").write_text(
+        f"User-agent: *\nDisallow: /private/\n\nSitemap: {base_url}/sitemap.xml\n"
+    )
+    entries = "".join(
+        f"<url><loc>{base_url}{page_path(i)}</loc></url>" for i in range(0, pages, 2)
+    )
+    (directory / "sitemap.xml").write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+    )
+    return directory
@@ -0,0 +1,90 @@
+"""Micro-benchmark: streaming HTML metrics extractor vs. the BeautifulSoup scans it replaced."""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+from bs4 import BeautifulSoup
+
+from ..html_metrics import extract_metrics
+from .fixtures import WORDS
+
+
+def soup_metrics(html: str) -> Dict[str, object]:
+    """The previous analyze_website path: build a tree, then one find_all per element type."""
+    soup = BeautifulSoup(html, "html.parser")
+    meta_desc = soup.find("meta", {"name": "description"})
+    return {
+        "title": soup.title.string if soup.title else None,
+        "meta_description": meta_desc["content"] if meta_desc else None,
+        "headings": len(soup.find_all(["h1", "h2", "h3"])),
+        "images": len(soup.find_all("img")),
+        "links": len(soup.find_all("a")),
+    }
+
+
+def build_page(target_bytes: int, seed: int = 3) -> str:
+    """A synthetic page of roughly ``target_bytes`` with realistic tag density."""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html lang=\"en\"><head><title>Benchmark page</title>",
+        '<meta name="description" content="Large synthetic page">',
+        '<link rel="stylesheet" href="/css/styles.css"><script src="/js/app.js"></script>',
+        "<style>" + "body{margin:0}" * 200 + "</style></head><body>",
+    ]
+    size = sum(len(p) for p in parts)
+    section = 0
+    while size < target_bytes:
+        section += 1
+        block = (
+            f"<section><h2>Section {section}</h2><p>"
+            + " ".join(rng.choice(WORDS) for _ in range(80))
+            + f'</p><img src="/images/{section}.jpg" alt="Image {section}" loading="lazy">'
+            + f'<a href="/page-{section}.html">Read more</a>'
+            + '<a href="https://example.com/" rel="nofollow">Partner</a></section>'
+        )
+        parts.append(block)
+        size += len(block)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def measure(fn: Callable[[str], object], html: str, repeat: int) -> Tuple[float, int]:
+    """Best-of-``repeat`` wall time and peak traced allocation of one call."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes=(50_000, 1_000_000, 5_000_000), repeat: int = 3) -> None:
+    def streaming(html: str):
+        # Feed in network-sized chunks the way the crawler does
+        return extract_metrics(html[i:i + 65536] for i in range(0, len(html), 65536))
+
+    print(f"{'page size':>10} {'extractor':>22} {'beautifulsoup':>22} {'speedup':>8}")
+    for size in sizes:
+        html = build_page(size)
+        fast, fast_peak = measure(streaming, html, repeat)
+        slow, slow_peak = measure(soup_metrics, html, repeat)
+        print(
+            f"{len(html) / 1024:>8.0f}KB "
+            f"{fast * 1000:>9.1f}ms {fast_peak / 1024 / 1024:>7.1f}MB peak "
+            f"{slow * 1000:>9.1f}ms {slow_peak / 1024 / 1024:>7.1f}MB peak "
+            f"{slow / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
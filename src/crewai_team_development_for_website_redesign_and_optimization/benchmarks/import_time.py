@@ -0,0 +1,88 @@
+"""
+Startup budget for the CLI: wall time and imports of the informational commands.
+
+Each command runs in a fresh interpreter under ``-X importtime``. The run
+fails (exit code 1) when a command is over its time budget or loads one of
+the heavy packages that only ``run``/``batch``/``train`` should pay for.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+# Packages that must stay out of --help, validate and tasks
+HEAVY_PACKAGES = ("crewai", "langchain", "langchain_core", "langchain_community", "langchain_openai",
+                  "openai", "httpx", "bs4", "tiktoken", "numpy")
+
+COMMANDS = {
+    "--help": 150,
+    "validate": 600,
+    "tasks": 600,
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds per top-level package from ``-X importtime`` output."""
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Nesting is shown by indentation; only top-level imports are additive
+        if len(name) - len(name.lstrip()) == 1:
+            top = name.strip().split(".")[0]
+            totals[top] = totals.get(top, 0) + int(cumulative)
+    return totals
+
+
+def measure(command: List[str], repeat: int) -> Tuple[float, Dict[str, int], List[str]]:
+    """Best wall time in ms, the import profile and the heavy packages loaded."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", PACKAGE, *command], capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    profile = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", PACKAGE, *command],
+        capture_output=True, text=True, check=True
+    )
+    imported = {
+        line.split("|")[-1].strip()
+        for line in profile.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    heavy = sorted(p for p in HEAVY_PACKAGES if p in imported)
+    return best, parse_importtime(profile.stderr), heavy
+
+
+def run(repeat: int = 5, scale: float = 1.0) -> bool:
+    ok = True
+    print(f"{'command':>10} {'best':>9} {'budget':>9}  slowest top-level imports")
+    for command, budget in COMMANDS.items():
+        best, totals, heavy = measure(command.split(), repeat)
+        budget *= scale
+        slowest = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:3]
+        print(
+            f"{command:>10} {best:>7.0f}ms {budget:>7.0f}ms  "
+            + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest)
+        )
+        if best > budget:
+            ok = False
+            print(f"           over budget by {best - budget:.0f}ms")
+        if heavy:
+            ok = False
+            print(f"           imports heavy packages: {', '.join(heavy)}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow CI machines)")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.repeat, args.scale) else 1)
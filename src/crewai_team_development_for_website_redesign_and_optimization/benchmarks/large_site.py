@@ -0,0 +1,114 @@
+"""
+Peak memory of large-site mode against the in-memory crawl as the site grows.
+
+Pages are generated on request by an in-process transport, so sites of
+tens of thousands of pages need no files or server. Every (mode, size)
+pair runs in a fresh process and reports its peak RSS. The run fails
+(exit code 1) when large-site mode grows by more than ``--max-growth-mb``
+from the smallest site to the largest.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+from ..crawler import SiteCrawler
+from ..large_site import analyze_large_site
+from ..settings import CrawlSettings
+from .fixtures import fixture_page, page_path
+
+BASE_URL = "http://fixture.test"
+
+
+def fixture_transport(pages: int, seed: int = 7) -> httpx.MockTransport:
+    """Serve a ``pages``-page fixture site, rendering each page when it is requested."""
+    paths = {page_path(i): i for i in range(pages)}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        index = paths.get(request.url.path)
+        if index is None:
+            return httpx.Response(404, text="Not found")
+        html = fixture_page(index, pages, random.Random(seed + index))
+        return httpx.Response(200, text=html, headers={"Content-Type": "text/html; charset=utf-8"})
+
+    return httpx.MockTransport(handler)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == "darwin" else 1024)
+
+
+def _measure(mode: str, pages: int, concurrency: int, queue) -> None:
+    settings = CrawlSettings(
+        max_pages=pages + 10,
+        max_depth=pages,
+        concurrency=concurrency,
+        per_host_concurrency=concurrency,
+        use_sitemap=False,
+        snapshots=False,
+    )
+    transport = fixture_transport(pages)
+    started = time.perf_counter()
+    if mode == "large-site":
+        with tempfile.TemporaryDirectory() as tmp:
+            result, aggregate, path = asyncio.run(
+                analyze_large_site(BASE_URL, settings, records_path=Path(tmp) / "pages.jsonl", transport=transport)
+            )
+            summary = aggregate.summary(result, path)
+            crawled = aggregate.pages
+    else:
+        result = asyncio.run(SiteCrawler(settings, transport=transport).crawl(BASE_URL))
+        summary = result.summary()
+        crawled = len(result.pages)
+    elapsed = time.perf_counter() - started
+    queue.put((crawled, elapsed, len(summary), _peak_rss_mb()))
+
+
+def measure(mode: str, pages: int, concurrency: int) -> Tuple[int, float, int, float]:
+    """Pages crawled, seconds, report characters and peak RSS in MB of one fresh-process run."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(mode, pages, concurrency, queue))
+    process.start()
+    outcome = queue.get()
+    process.join()
+    return outcome
+
+
+def run(sizes: List[int] = (500, 5000), concurrency: int = 16, max_growth_mb: float = 10.0) -> bool:
+    sizes = sorted(sizes)
+    peaks: Dict[str, List[float]] = {}
+    print(f"\nPeak RSS by site size (concurrency {concurrency})")
+    print(f"{'mode':<11} {'pages':>7} {'crawled':>8} {'seconds':>8} {'pages/s':>8} {'report':>8} {'peak MB':>8}")
+    for mode in ("large-site", "in-memory"):
+        for pages in sizes:
+            crawled, elapsed, report, peak = measure(mode, pages, concurrency)
+            peaks.setdefault(mode, []).append(peak)
+            print(
+                f"{mode:<11} {pages:>7} {crawled:>8} {elapsed:>8.2f} {crawled / elapsed:>8.1f} "
+                f"{report:>8} {peak:>8.1f}"
+            )
+    growth = {mode: values[-1] - values[0] for mode, values in peaks.items()}
+    print(
+        f"\nGrowth from {sizes[0]} to {sizes[-1]} pages: large-site {growth['large-site']:+.1f} MB, "
+        f"in-memory {growth['in-memory']:+.1f} MB (budget {max_growth_mb:.0f} MB)"
+    )
+    return growth["large-site"] <= max_growth_mb
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-growth-mb", type=float, default=10.0)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.pages, args.concurrency, args.max_growth_mb) else 1)
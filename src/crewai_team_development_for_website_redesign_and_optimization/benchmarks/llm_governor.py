@@ -0,0 +1,101 @@
+"""
+Agents hammering a rate-limited provider, with and without the LLM governor.
+
+The simulated provider enforces ``rpm`` with a token bucket, as OpenAI
+does, on a minute shortened by ``time_scale`` so a run takes seconds, and
+answers anything over it with a 429. Ungoverned callers retry after a short fixed pause the way
+independent client libraries do; governed callers share one LLMGovernor.
+"""
+import argparse
+import threading
+import time
+from typing import Dict
+
+from ..llm_governor import LLMGovernor, TokenBuckets
+from ..settings import LLMGovernorSettings
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class SimulatedProvider:
+    def __init__(self, rpm: float, window: float, latency: float):
+        self.rpm = rpm
+        self.window = window
+        self.latency = latency
+        self.available = rpm
+        self.updated = time.perf_counter()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def complete(self) -> str:
+        with self._lock:
+            now = time.perf_counter()
+            self.available = min(self.rpm, self.available + (now - self.updated) * self.rpm / self.window)
+            self.updated = now
+            if self.available < 1:
+                self.rejected += 1
+                raise RateLimitError("429 Too Many Requests")
+            self.available -= 1
+        time.sleep(self.latency)
+        return "ok"
+
+
+def _run(callers: int, calls: int, provider: SimulatedProvider, governor: LLMGovernor = None) -> Dict[str, float]:
+    done = [0]
+    lock = threading.Lock()
+
+    def caller() -> None:
+        for _ in range(calls):
+            if governor:
+                governor.call(provider.complete, tokens=500)
+            else:
+                for _ in range(50):
+                    try:
+                        provider.complete()
+                        break
+                    except RateLimitError:
+                        time.sleep(provider.window / 100)
+                else:
+                    continue
+            with lock:
+                done[0] += 1
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {"completed": done[0], "seconds": elapsed, "rejected": provider.rejected}
+
+
+def run(rpm: float = 600, callers: int = 24, calls: int = 10, latency: float = 0.05, time_scale: float = 60) -> None:
+    window = 60 / time_scale
+    print(f"{callers} callers x {calls} calls against {rpm:.0f} requests per {window:g}s window")
+    ungoverned = _run(callers, calls, SimulatedProvider(rpm, window, latency))
+    # The governor's budget on the same shortened minute
+    settings = LLMGovernorSettings(
+        requests_per_minute=rpm, max_concurrency=8, backoff_base=window / 20, backoff_max=window, max_retries=20
+    )
+    governor = LLMGovernor(settings, buckets=TokenBuckets(rpm, 1e12, period=window))
+    governed = _run(callers, calls, SimulatedProvider(rpm, window, latency), governor)
+    for label, result in (("ungoverned", ungoverned), ("governed", governed)):
+        print(
+            f"{label:<11} {result['completed']} done in {result['seconds']:.2f}s "
+            f"({result['completed'] / result['seconds']:.1f} calls/s), {result['rejected']} requests rejected with 429"
+        )
+    print(governor.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rpm", type=float, default=600, help="provider limit per (scaled) minute")
+    parser.add_argument("--callers", type=int, default=24)
+    parser.add_argument("--calls", type=int, default=10, help="calls per caller")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--time-scale", type=float, default=60, help="how much faster than real time the clock runs")
+    args = parser.parse_args()
+    run(args.rpm, args.callers, args.calls, args.latency, args.time_scale)
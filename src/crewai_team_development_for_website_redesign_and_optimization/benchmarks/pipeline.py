@@ -0,0 +1,228 @@
+"""
+End-to-end pipeline benchmark with a scripted LLM and a local fixture site.
+
+Runs create_agents -> create_tasks -> execution -> save_website_files ->
+css -> build -> format_report against a synthetic site served by the preview
+server, with ChatOpenAI replaced by ``ScriptedChatModel``, so runs cost
+nothing and are reproducible. Reports wall time, per-stage time, peak RSS
+and throughput, and exits 1 when the pipeline's own overhead (wall time
+minus the scripted model latency) or peak RSS exceeds its threshold.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..settings import (
+    CrawlSettings, LLMCacheSettings, LLMGovernorSettings, PerformanceSettings, load_config, load_tasks
+)
+from .fake_llm import ScriptedChatModel, default_script
+from .fixtures import build_fixture_site
+
+MODES = ("kickoff", "sequential", "dag")
+
+
+@contextlib.contextmanager
+def _stage(timings: Dict[str, float], name: str, verbose: bool) -> Iterator[None]:
+    # The agents print every step; keep the benchmark output readable
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output:
+        yield
+    timings[name] = time.perf_counter() - started
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_once(
+    mode: str,
+    base_url: str,
+    work_dir: Path,
+    latency: float,
+    token_latency: float,
+    llm_cache: bool,
+    trace: bool,
+    verbose: bool,
+) -> Dict[str, Any]:
+    from crewai import Crew, Process
+    from langchain_core.globals import set_llm_cache
+
+    from .. import main
+    from ..llm_cache import install_llm_cache
+    from ..css_optimizer import optimize_css
+    from ..model_routing import ModelRouter
+    from ..site_build import build_site
+    from ..tracing import RunTracer
+
+    config = load_config().model_copy(update={
+        "current_website_url": base_url,
+        "crawl": CrawlSettings(max_pages=50, max_depth=2),
+        "performance": PerformanceSettings(rtt_ms=0, downlink_kbps=100000),
+        # Provider budgets would only add queueing to the scripted model's latency
+        "llm_governor": LLMGovernorSettings(enabled=False),
+    })
+    task_configs = load_tasks()
+    output_dir = work_dir / "output"
+    models: List[ScriptedChatModel] = []
+
+    def llm_factory(model: str = "scripted", max_retries: int = 0, **kwargs: Any) -> ScriptedChatModel:
+        llm = ScriptedChatModel(
+            script=default_script(base_url), model_name=model,
+            latency=latency, token_latency=token_latency, **kwargs
+        )
+        models.append(llm)
+        return llm
+
+    set_llm_cache(None)
+    if llm_cache:
+        install_llm_cache(LLMCacheSettings(path=str(work_dir / "llm_cache.sqlite3")))
+    tracer = RunTracer(config.tracing, output_dir / "traces.jsonl") if trace else None
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    # Every model profile is served by the scripted model
+    router = ModelRouter(config.models, llm_factory, config.llm_governor, task_configs)
+    with _stage(timings, "create_agents", verbose):
+        agents = main.create_agents(config, site_dir=output_dir / "redesigned_site", preview=False, router=router)
+    with _stage(timings, "create_tasks", verbose):
+        if mode == "kickoff":
+            tasks = main.create_tasks(config, task_configs, agents)
+        else:
+            task_map = main.create_task_map(config, task_configs, agents, wire_context=False)
+    with _stage(timings, "execute", verbose), tracer.run_span() if tracer else contextlib.nullcontext():
+        if mode == "kickoff":
+            Crew(agents=list(agents.values()), tasks=tasks, verbose=True, process=Process.sequential).kickoff()
+            outputs = {task_id: task.output.result for task_id, task in zip(task_configs, tasks) if task.output}
+        elif mode == "sequential":
+            outputs = main.run_sequential(task_configs, task_map, agents, tracer=tracer, router=router)
+        else:
+            outputs = main.run_task_graph(task_configs, task_map, agents, config.scheduler, tracer=tracer, router=router)
+    frontend = main.site_files_output(outputs, task_configs) or ""
+    with _stage(timings, "save_website_files", verbose):
+        site_dir = main.save_website_files(frontend, output_dir=output_dir / "redesigned_site")
+    with _stage(timings, "css", verbose):
+        css_report = optimize_css(site_dir, config.css)
+    with _stage(timings, "build", verbose):
+        build_report = build_site(site_dir, output_dir / "dist", config.build)
+    with _stage(timings, "format_report", verbose):
+        report = main.format_report(outputs, task_configs, build_report, tracer=tracer, css_report=css_report)
+        main.save_report(report, output_dir / "report.md")
+    wall = time.perf_counter() - started
+    if tracer:
+        tracer.shutdown()
+
+    calls = sum(m.stats()["calls"] for m in models)
+    tokens = sum(m.stats()["tokens"] for m in models)
+    busy = sum(m.stats()["busy"] for m in models)
+    return {
+        "mode": mode,
+        "llm_cache": llm_cache,
+        "wall": wall,
+        "stages": timings,
+        "llm_calls": calls,
+        "llm_tokens": tokens,
+        "llm_busy": busy,
+        # Time not spent inside the scripted model: the pipeline's own cost
+        "overhead": max(wall - busy, 0.0),
+        "tasks_per_s": len(outputs) / wall if wall else 0.0,
+        "tokens_per_s": tokens / wall if wall else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "sections_filled": sum(
+            1 for section in report.split("\n## ")[1:] if section.partition("\n")[2].strip()
+        ),
+    }
+
+
+def run(
+    modes=MODES,
+    pages: int = 20,
+    latency: float = 0.05,
+    token_latency: float = 0.0,
+    llm_cache: bool = False,
+    repeat: int = 1,
+    trace: bool = False,
+    max_overhead: float = 10.0,
+    max_rss_mb: float = 1500.0,
+    port: int = 8767,
+    verbose: bool = False,
+    json_path: Optional[Path] = None,
+) -> bool:
+    from ..main import start_local_server, stop_local_server
+
+    base_url = f"http://127.0.0.1:{port}"
+    results = []
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep every on-disk cache (LLM, compaction) out of the real one
+        os.environ["CREW_CACHE_DIR"] = str(Path(tmp) / "cache")
+        build_fixture_site(Path(tmp) / "site", base_url, pages=pages)
+        start_local_server(str(Path(tmp) / "site"), port=port)
+        try:
+            print(f"{pages}-page fixture site at {base_url}, {latency * 1000:.0f}ms per LLM call")
+            print(f"{'mode':>10} {'run':>4} {'wall':>8} {'overhead':>9} {'LLM calls':>10} "
+                  f"{'tasks/s':>8} {'tokens/s':>9} {'peak RSS':>9}  slowest stages")
+            for mode in modes:
+                for attempt in range(1, repeat + 1):
+                    # Runs of one mode share the LLM cache, so later ones show the warm path
+                    work_dir = Path(tmp) / mode
+                    result = run_once(mode, base_url, work_dir, latency, token_latency, llm_cache, trace, verbose)
+                    results.append(result)
+                    slowest = sorted(result["stages"].items(), key=lambda item: item[1], reverse=True)[:3]
+                    print(
+                        f"{mode:>10} {attempt:>4} {result['wall']:>7.2f}s {result['overhead']:>8.2f}s "
+                        f"{result['llm_calls']:>10} {result['tasks_per_s']:>8.2f} {result['tokens_per_s']:>9.0f} "
+                        f"{result['peak_rss_mb']:>7.0f}MB  "
+                        + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest)
+                    )
+                    if result["overhead"] > max_overhead:
+                        ok = False
+                        print(f"           overhead over its {max_overhead:.1f}s threshold")
+                    if result["peak_rss_mb"] > max_rss_mb:
+                        ok = False
+                        print(f"           peak RSS over its {max_rss_mb:.0f}MB threshold")
+        finally:
+            stop_local_server()
+    if json_path:
+        Path(json_path).write_text(json.dumps(results, indent=2))
+    return ok
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=MODES, nargs="+", default=list(MODES))
+    parser.add_argument("--pages", type=int, default=20, help="pages in the fixture site")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per scripted LLM call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="extra seconds per output token")
+    parser.add_argument("--llm-cache", action="store_true", help="route the scripted model through the LLM cache")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--trace", action="store_true", help="add the tracing timing breakdown to each report")
+    parser.add_argument("--max-overhead", type=float, default=10.0, help="seconds outside the LLM per run")
+    parser.add_argument("--max-rss-mb", type=float, default=1500.0)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--verbose", action="store_true", help="show the agents' output")
+    parser.add_argument("--json", type=Path, dest="json_path", help="also write the results as JSON")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    ok = run(
+        args.mode, args.pages, args.latency, args.token_latency, args.llm_cache, args.repeat,
+        args.trace, args.max_overhead, args.max_rss_mb, args.port, args.verbose, args.json_path
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Throughput of the preview server vs. a single-threaded SimpleHTTPRequestHandler."""
+import argparse
+import asyncio
+import http.server
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from ..preview_server import make_preview_server
+from .fixtures import build_fixture_site, page_path
+
+
+def _simple_server(directory: str, port: int) -> socketserver.TCPServer:
+    """The server the preview used before: one request at a time, no caching."""
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(socketserver.TCPServer):
+        allow_reuse_address = True
+
+        def handle_error(self, request, client_address):
+            # The stalled-client probe hangs up on queued requests
+            pass
+
+    return Server(("", port), Handler)
+
+
+async def _load(base_url: str, paths, clients: int, revalidate: bool) -> float:
+    """Fetch every path once per client, with ``clients`` concurrent connections."""
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        etags = {}
+
+        async def worker():
+            for path in paths:
+                headers = {"If-None-Match": etags[path]} if revalidate and path in etags else {}
+                response = await client.get(path, headers=headers)
+                if "etag" in response.headers:
+                    etags[path] = response.headers["etag"]
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(clients)])
+        return time.perf_counter() - started
+
+
+def _stalled_client_latency(base_url: str, port: int) -> str:
+    """Time one request while another connection has sent only half a request line."""
+    stalled = socket.create_connection(("127.0.0.1", port))
+    stalled.sendall(b"GET /index.html HT")
+    try:
+        started = time.perf_counter()
+        httpx.get(base_url + "/", timeout=5)
+        return f"{(time.perf_counter() - started) * 1000:.1f}ms"
+    except httpx.TimeoutException:
+        return "timed out after 5s"
+    finally:
+        stalled.close()
+
+
+def run(pages: int = 50, clients: int = 16, port: int = 8766) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        build_fixture_site(Path(tmp), base_url, pages=pages)
+        paths = [page_path(i) for i in range(pages)] + ["/css/styles.css", "/js/app.js"]
+        requests = len(paths) * clients
+        print(f"{requests} requests from {clients} concurrent clients")
+        for name, factory in (("simple", _simple_server), ("preview", make_preview_server)):
+            server = factory(tmp, port)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                asyncio.run(_load(base_url, paths, 1, False))  # warm up
+                cold = asyncio.run(_load(base_url, paths, clients, False))
+                warm = asyncio.run(_load(base_url, paths, clients, True))
+                stalled = _stalled_client_latency(base_url, port)
+                print(
+                    f"{name:>8}: {requests / cold:8.0f} req/s full responses, "
+                    f"{requests / warm:8.0f} req/s with If-None-Match, "
+                    f"next to a stalled client: {stalled}"
+                )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    run(args.pages, args.clients, args.port)
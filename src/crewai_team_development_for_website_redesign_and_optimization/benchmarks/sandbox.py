@@ -0,0 +1,87 @@
+"""Cold-start code execution (one interpreter per run) against the warm sandbox pool."""
+import argparse
+import importlib.util
+import subprocess
+import sys
+import time
+
+from ..load_test import LatencyHistogram
+from ..sandbox import SandboxPool
+from ..settings import SandboxSettings
+
+# A typical agent snippet: parse some HTML and report on it
+SNIPPET = """
+import json, re
+from html.parser import HTMLParser
+
+class Headings(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.found = []
+    def handle_starttag(self, tag, attrs):
+        if re.fullmatch(r"h[1-6]", tag):
+            self.found.append(tag)
+
+parser = Headings()
+parser.feed("<h1>Title</h1>" + "<h2>Section</h2><p>text</p>" * 50)
+print(json.dumps({"headings": len(parser.found)}))
+"""
+
+
+# Packages with C extensions can't be initialised twice in one process, so
+# the worker must keep them loaded between runs
+EXTENSION_SNIPPET = "import numpy as np\nint(np.arange(3).sum())"
+
+
+def _report(label: str, histogram: LatencyHistogram, elapsed: float, runs: int) -> None:
+    print(
+        f"{label:<6} {runs} runs in {elapsed:.2f}s: p50 {histogram.percentile(50) * 1000:.1f} ms, "
+        f"p95 {histogram.percentile(95) * 1000:.1f} ms, max {histogram.max_seconds * 1000:.1f} ms"
+    )
+
+
+def run(runs: int = 200, workers: int = 2) -> None:
+    cold = LatencyHistogram()
+    started = time.perf_counter()
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-I", "-c", SNIPPET], capture_output=True, check=True)
+        cold.record(time.perf_counter() - t)
+    _report("cold", cold, time.perf_counter() - started, runs)
+
+    pool = SandboxPool(SandboxSettings(workers=workers))
+    pool.start()
+    warm = LatencyHistogram()
+    started = time.perf_counter()
+    try:
+        for _ in range(runs):
+            result = pool.execute(SNIPPET)
+            assert result.ok, result.error
+            warm.record(result.total_ms / 1000)
+        _report("warm", warm, time.perf_counter() - started, runs)
+        print(pool.summary())
+    finally:
+        pool.close()
+
+    if importlib.util.find_spec("numpy") is None:
+        return
+    # The same extension package imported on one worker, run after run
+    pool = SandboxPool(SandboxSettings(workers=1))
+    pool.start()
+    try:
+        pids = set()
+        for i in range(1, 4):
+            result = pool.execute(EXTENSION_SNIPPET)
+            assert result.ok and result.result == "3", f"numpy import {i}: {result.error}"
+            pids.add(result.worker_pid)
+        print(f"numpy imported 3 times on {len(pids)} warm worker(s)")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    run(args.runs, args.workers)
@@ -0,0 +1,43 @@
+"""Concurrent near-duplicate searches against the stub backend, with and without the cache."""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ..search_cache import SearchCache, StubSearchBackend
+
+QUERIES = [
+    "modern design trends professional services",
+    "Modern design trends: the professional services",
+    "MODERN design trends — professional  services",
+    "police accreditation website best practices",
+    "Police accreditation website - best practices",
+    "accessible color contrast guidelines",
+]
+
+
+def run(agents: int = 8, rounds: int = 3, latency: float = 0.3) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, cached in (("uncached", False), ("cached", True)):
+            backend = StubSearchBackend(latency)
+            search = SearchCache(backend, Path(tmp) / "search.sqlite3") if cached else backend
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=agents) as pool:
+                # Every agent issues every query, all at once
+                for _ in range(rounds):
+                    list(pool.map(search, QUERIES * agents))
+            elapsed = time.perf_counter() - started
+            lookups = len(QUERIES) * agents * rounds
+            print(f"{label:>9}: {lookups} lookups, {backend.calls} upstream calls, {elapsed:.2f}s")
+            if cached:
+                print(f"           {search.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per upstream search")
+    args = parser.parse_args()
+    run(args.agents, args.rounds, args.latency)
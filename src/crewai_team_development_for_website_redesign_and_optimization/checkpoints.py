@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Bump when the fingerprint inputs change so old checkpoints stop matching
+FINGERPRINT_VERSION = 1
+
+
+def _llm_config(llm: Any) -> Dict[str, Any]:
+    if llm is None:
+        return {}
+    # Governed and routed models: describe the model that will answer
+    while hasattr(llm, "wrapped"):
+        llm = llm.wrapped
+    return {
+        "class": type(llm).__name__,
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+    }
+
+
+def task_fingerprint(task_id: str, task: Any, context: Optional[str]) -> str:
+    """
+    SHA-256 over everything that determines a task's output: its id, the
+    rendered description and expected output, the agent's role, goal,
+    backstory, tools and LLM settings, and the exact upstream context the
+    task is given.
+    """
+    agent = task.agent
+    payload = {
+        "version": FINGERPRINT_VERSION,
+        "task_id": task_id,
+        "description": task.description,
+        "expected_output": getattr(task, "expected_output", None),
+        "task_tools": sorted(t.name for t in task.tools or []),
+        "agent": {
+            "role": agent.role,
+            "goal": agent.goal,
+            "backstory": agent.backstory,
+            "tools": sorted(t.name for t in agent.tools or []),
+            "allow_delegation": agent.allow_delegation,
+            "llm": _llm_config(agent.llm),
+        },
+        "context": context or "",
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Task outputs on disk, one JSON file per (task id, fingerprint).
+
+    Files are written to a temporary sibling and renamed into place, so a
+    run killed mid-write never leaves a truncated checkpoint behind. Older
+    fingerprints of a task are kept, which lets a reverted prompt or config
+    change pick its earlier output up again.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.writes = 0
+
+    def _path(self, task_id: str, key: str) -> Path:
+        return self.directory / task_id / f"{key}.json"
+
+    def load(self, task_id: str, key: str) -> Optional[str]:
+        try:
+            data = json.loads(self._path(task_id, key).read_text())
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return data.get("output")
+
+    def save(self, task_id: str, key: str, output: str, duration: float = 0.0) -> Path:
+        path = self._path(task_id, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "task_id": task_id,
+            "key": key,
+            "created": time.time(),
+            "duration": duration,
+            "output": output,
+        }
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        self.writes += 1
+        return path
+
+    def summary(self) -> str:
+        return f"Checkpoints: {self.hits} task outputs reused, {self.writes} saved to {self.directory}"
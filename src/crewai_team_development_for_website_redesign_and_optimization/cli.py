@@ -0,0 +1,274 @@
+"""
+Command-line interface for the website redesign crew.
+
+Only argparse is imported at module level. Settings (pydantic, PyYAML)
+are loaded by the commands that read config files, and crewai, langchain
+and the network stack only by the commands that run agents, so ``--help``,
+``validate`` and ``tasks`` return without paying for them.
+"""
+import argparse
+import sys
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+PACKAGE_DIR = Path(__file__).parent
+
+
+def _load(args: argparse.Namespace):
+    from .settings import load_config
+
+    config = load_config(args.config)
+    if getattr(args, "mode", None):
+        config.scheduler = config.scheduler.model_copy(update={"mode": args.mode})
+    if getattr(args, "fresh", False):
+        config.checkpoints = config.checkpoints.model_copy(update={"resume": False})
+    return config
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    from .settings import load_tasks
+
+    config = _load(args)
+    from .main import main as run_main
+
+    run_main(
+        config,
+        output_dir=args.output_dir,
+        preview=not args.no_preview,
+        task_configs=load_tasks(args.tasks),
+        rerun_from=getattr(args, "from_task", None)
+    )
+    return 0
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    from .batch import main as batch_main
+
+    report = batch_main(["--config", str(args.config), "--tasks", str(args.tasks), *args.batch_args])
+    return 1 if report.failed else 0
+
+
+def cmd_loadtest(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from .load_test import LoadGenerator
+    from .settings import load_config
+
+    generator = LoadGenerator(load_config(args.config).load_test)
+    for url in args.urls:
+        targets = [url.rstrip("/") + "/" + path.lstrip("/") for path in args.paths] or [url]
+        report = asyncio.run(generator.run(
+            targets, duration=args.duration, concurrency=args.concurrency, rate=args.rate
+        ))
+        print(report.summary() + "\n")
+    return 0
+
+
+def cmd_css(args: argparse.Namespace) -> int:
+    from .css_optimizer import optimize_css
+    from .settings import load_config
+
+    if not args.site_dir.is_dir():
+        print(f"No site at {args.site_dir}", file=sys.stderr)
+        return 1
+    report = optimize_css(args.site_dir, load_config(args.config).css)
+    print(report.markdown() if args.markdown else report.summary())
+    return 0
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    from pydantic import ValidationError
+
+    from .scheduler import TaskGraph
+    from .settings import check_model_profiles, load_agents, load_config, load_tasks
+
+    try:
+        config = load_config(args.config)
+        task_configs = load_tasks(args.tasks)
+        graph = TaskGraph.from_task_configs(task_configs)
+        check_model_profiles(config.models, task_configs, load_agents())
+    except (OSError, ValidationError, ValueError) as e:
+        print(f"Invalid configuration: {e}", file=sys.stderr)
+        return 1
+    print(f"Configuration OK: {config.current_website_url}, {len(graph.dependencies)} tasks, "
+          f"scheduler mode '{config.scheduler.mode}'")
+    return 0
+
+
+def cmd_tasks(args: argparse.Namespace) -> int:
+    from .scheduler import TaskGraph
+    from .settings import load_agents, load_tasks
+
+    task_configs = load_tasks(args.tasks)
+    agent_configs = load_agents()
+    graph = TaskGraph.from_task_configs(task_configs)
+    critical = graph.critical_path_lengths()
+    for i, task_id in enumerate(graph.topological_order(), 1):
+        deps = ", ".join(graph.dependencies[task_id]) or "-"
+        agent = task_configs[task_id].get("agent", "?")
+        profile = (
+            task_configs[task_id].get("model_profile")
+            or (agent_configs.get(agent) or {}).get("model_profile")
+            or "default"
+        )
+        print(f"{i:>2}. {task_id}  [{agent}, {profile}]  "
+              f"after: {deps}  critical path: {critical[task_id]}")
+    return 0
+
+
+def _crew_feature(name: str, args: argparse.Namespace):
+    """
+    Build the crew and return its bound ``name`` method (train/test),
+    which only newer crewai releases provide.
+    """
+    from crewai import Crew, Process
+
+    from .main import create_agents, create_tasks
+    from .settings import load_config, load_tasks
+
+    if not hasattr(Crew, name):
+        from importlib.metadata import version
+
+        hint = " (or use 'test --offline')" if name == "test" else ""
+        raise SystemExit(
+            f"'{name}' needs a crewai release with Crew.{name}(); "
+            f"the installed crewai is {version('crewai')}{hint}"
+        )
+    config = load_config(args.config)
+    agents = create_agents(config, preview=False)
+    crew = Crew(
+        agents=list(agents.values()),
+        tasks=create_tasks(config, load_tasks(args.tasks), agents),
+        process=Process.sequential,
+        verbose=True
+    )
+    return getattr(crew, name)
+
+
+def cmd_train(args: argparse.Namespace) -> int:
+    _crew_feature("train", args)(n_iterations=args.n_iterations, filename=args.filename)
+    return 0
+
+
+def cmd_test(args: argparse.Namespace) -> int:
+    if args.offline:
+        from .benchmarks.pipeline import main as benchmark_main
+
+        return benchmark_main(["--repeat", str(args.n_iterations)])
+    _crew_feature("test", args)(n_iterations=args.n_iterations, openai_model_name=args.model)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="crew",
+        description="Analyze, redesign and rebuild a website with a crew of AI agents."
+    )
+    parser.add_argument("--config", type=Path, default=PACKAGE_DIR / "config" / "config.yaml", help="config.yaml to use")
+    parser.add_argument("--tasks", type=Path, default=PACKAGE_DIR / "config" / "tasks.yaml", help="tasks.yaml to use")
+    # Also accepted after the command, as the console scripts pass them there
+    # ("run_crew --config site.yaml"); SUPPRESS keeps a value given before it
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", type=Path, default=argparse.SUPPRESS, help="config.yaml to use")
+    common.add_argument("--tasks", type=Path, default=argparse.SUPPRESS, help="tasks.yaml to use")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_command = partial(commands.add_parser, parents=[common])
+
+    run = add_command("run", help="run the crew for the configured site")
+    run.add_argument("--mode", choices=["sequential", "dag"], help="override scheduler.mode")
+    run.add_argument("--output-dir", type=Path, default=PACKAGE_DIR / "output")
+    run.add_argument("--no-preview", action="store_true", help="don't start the preview server")
+    run.add_argument("--fresh", action="store_true", help="execute every task, ignoring saved checkpoints")
+    run.set_defaults(func=cmd_run)
+
+    # Everything after "batch" goes to the batch module's own parser
+    batch = add_command("batch", help="run many sites over worker processes", add_help=False)
+    batch.set_defaults(func=cmd_batch)
+
+    loadtest = add_command(
+        "loadtest", help="load-test one or more sites, e.g. the preview against the original"
+    )
+    loadtest.add_argument("urls", nargs="+", metavar="URL", help="base URL; each one is tested in turn")
+    loadtest.add_argument("--path", dest="paths", action="append", default=[], help="path to request on every base URL (repeatable)")
+    loadtest.add_argument("-d", "--duration", type=float)
+    loadtest.add_argument("-c", "--concurrency", type=int)
+    loadtest.add_argument("-r", "--rate", type=float, help="requests per second; omit for closed-loop")
+    loadtest.set_defaults(func=cmd_loadtest)
+
+    css = add_command(
+        "css", help="purge unused CSS and inline critical CSS in a generated site, offline and in place"
+    )
+    css.add_argument("site_dir", nargs="?", type=Path, default=PACKAGE_DIR / "output" / "redesigned_site")
+    css.add_argument("--markdown", action="store_true", help="print the per-file report instead of a summary")
+    css.set_defaults(func=cmd_css)
+
+    validate = add_command("validate", help="check config.yaml and the tasks.yaml graph")
+    validate.set_defaults(func=cmd_validate)
+
+    tasks = add_command("tasks", help="list tasks in execution order")
+    tasks.set_defaults(func=cmd_tasks)
+
+    train = add_command("train", help="train the crew (crewai Crew.train)")
+    train.add_argument("-n", "--n-iterations", type=int, default=1)
+    train.add_argument("-f", "--filename", default="trained_agents_data.pkl")
+    train.set_defaults(func=cmd_train)
+
+    replay = add_command(
+        "replay",
+        help="re-run a task and everything downstream of it, reusing checkpointed upstream outputs"
+    )
+    replay.add_argument("--from", dest="from_task", required=True, metavar="TASK_ID")
+    replay.add_argument("--mode", choices=["sequential", "dag"], help="override scheduler.mode")
+    replay.add_argument("--output-dir", type=Path, default=PACKAGE_DIR / "output")
+    replay.add_argument("--no-preview", action="store_true", help="don't start the preview server")
+    replay.set_defaults(func=cmd_run)
+
+    test = add_command("test", help="test the crew (crewai Crew.test)")
+    test.add_argument("-n", "--n-iterations", type=int, default=1)
+    test.add_argument("-m", "--model", default="gpt-4o-mini")
+    test.add_argument(
+        "--offline", action="store_true",
+        help="run the end-to-end benchmark with a scripted LLM and a local fixture site instead"
+    )
+    test.set_defaults(func=cmd_test)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "batch":
+        args.batch_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.func(args)
+
+
+def _entry(command: str) -> int:
+    return main([command, *sys.argv[1:]])
+
+
+# Console script entry points declared in pyproject.toml
+def run() -> int:
+    return _entry("run")
+
+
+def train() -> int:
+    return _entry("train")
+
+
+def replay() -> int:
+    return _entry("replay")
+
+
+def test() -> int:
+    return _entry("test")
+
+
+def batch() -> int:
+    return _entry("batch")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+import re
+import time
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .crawler import PageResult
+from .settings import ContentSettings
+
+# Runs of letters; longer runs are markup debris or identifiers, not prose
+_WORD_RE = re.compile(r"(?<![^\W\d_])[^\W\d_]{1,30}(?![^\W\d_])")
+_SENTENCE_END_RE = re.compile(r"[.!?]+(?=\s|$)")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+STOPWORDS = frozenset(
+    """a about above after again against all also am an and any are as at be because been before
+    being below between both but by can could did do does doing down during each few for from
+    further had has have having he her here hers herself him himself his how i if in into is it its
+    itself just me more most my myself no nor not now of off on once only or other our ours
+    ourselves out over own same she should so some such than that the their theirs them themselves
+    then there these they this those through to too under until up very was we were what when where
+    which while who whom why will with would you your yours yourself yourselves us may
+    get make one two new use using within without via per""".split()
+)
+
+# Flesch reading ease below this needs college-level reading
+DIFFICULT_READING_EASE = 50.0
+# Share of a page's top keywords found in its title and headings
+MIN_HEADING_ALIGNMENT = 0.25
+# Buckets with more pages than this are compared against their first page only
+MAX_BUCKET_PAIRS = 64
+# Shingles x permutations hashed per MinHash block
+MINHASH_BLOCK_ELEMENTS = 1 << 22
+_SHINGLE_PRIME = np.uint64(1099511628211)
+
+
+class PageContent(BaseModel):
+    url: str
+    words: int
+    sentences: int
+    reading_ease: float
+    keywords: List[str] = Field(default_factory=list)
+    heading_alignment: Optional[float] = None
+    thin: bool = False
+
+
+class ContentReport(BaseModel):
+    pages: List[PageContent] = Field(default_factory=list)
+    # (term, occurrences, pages containing it)
+    top_keywords: List[Tuple[str, int, int]] = Field(default_factory=list)
+    top_phrases: List[Tuple[str, int]] = Field(default_factory=list)
+    # (lowest estimated similarity within the cluster, urls)
+    duplicate_clusters: List[Tuple[float, List[str]]] = Field(default_factory=list)
+    thin_words: int = 0
+    duration: float = 0.0
+
+    def summary(self, max_rows: int = 50) -> str:
+        """Render the site-wide content findings as a plain-text report."""
+        pages = self.pages
+        if not pages:
+            return "Content Analysis: no page text to analyze"
+        words = sum(p.words for p in pages)
+        ease = sorted(pages, key=lambda p: p.reading_ease)
+        thin = [p for p in pages if p.thin]
+        misaligned = sorted(
+            (p for p in pages if p.heading_alignment is not None and p.heading_alignment < MIN_HEADING_ALIGNMENT),
+            key=lambda p: p.heading_alignment,
+        )
+        lines = [
+            f"Content Analysis of {len(pages)} pages ({words} words) in {self.duration:.2f} seconds:",
+            "Readability (Flesch reading ease, higher is easier; 60-70 is plain English):",
+            f"- Site average {sum(p.reading_ease for p in pages) / len(pages):.1f}, "
+            f"{sum(1 for p in pages if p.reading_ease < DIFFICULT_READING_EASE)} pages below "
+            f"{DIFFICULT_READING_EASE:.0f} (difficult)",
+        ]
+        lines += [f"- Hardest: {p.url} ({p.reading_ease:.1f})" for p in ease[:5]]
+        lines.append("Top keywords (term: occurrences / pages):")
+        lines.append("- " + ", ".join(f"{t}: {n}/{d}" for t, n, d in self.top_keywords) if self.top_keywords else "- none")
+        lines.append("Top phrases:")
+        lines.append("- " + ", ".join(f"{t}: {n}" for t, n in self.top_phrases) if self.top_phrases else "- none")
+        lines.append(f"Thin content (under {self.thin_words} words): {len(thin)} pages")
+        lines += [f"- {p.url} ({p.words} words)" for p in thin[:max_rows]]
+        lines.append(f"Headings not reflecting the page's keywords: {len(misaligned)} pages")
+        lines += [
+            f"- {p.url}: title/headings cover {p.heading_alignment:.0%} of {', '.join(p.keywords[:5])}"
+            for p in misaligned[:max_rows]
+        ]
+        lines.append(f"Near-duplicate pages: {len(self.duplicate_clusters)} groups")
+        for similarity, urls in self.duplicate_clusters[:max_rows]:
+            shown = ", ".join(urls[:5]) + (f" and {len(urls) - 5} more" if len(urls) > 5 else "")
+            lines.append(f"- {len(urls)} pages, {similarity:.0%}+ similar: {shown}")
+        lines.append("Per-page content (url | words | reading ease | heading alignment | keywords):")
+        for p in pages[:max_rows]:
+            alignment = f"{p.heading_alignment:.0%}" if p.heading_alignment is not None else "-"
+            lines.append(
+                f"- {p.url} | {p.words} | {p.reading_ease:.1f} | {alignment} | {', '.join(p.keywords)}"
+            )
+        if len(pages) > max_rows:
+            lines.append(f"... {len(pages) - max_rows} more pages not shown")
+        return "\n".join(lines)
+
+
+def count_syllables(word: str) -> int:
+    """Vowel-group estimate, with a silent final e."""
+    groups = len(_VOWEL_GROUP_RE.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and groups > 1:
+        groups -= 1
+    return max(1, groups)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words (letter runs of at most 30 characters)."""
+    return _WORD_RE.findall(text.lower())
+
+
+class ContentAnalyzer:
+    """
+    Site-wide content metrics computed over all pages at once.
+
+    Words are interned once into integer ids; everything after that works on
+    flat NumPy arrays: a sparse document-term matrix (as sorted COO arrays)
+    for TF-IDF keywords, n-gram counts over adjacent ids, per-page syllable
+    and word totals for Flesch reading ease, and MinHash signatures over
+    word shingles with banded LSH to find near-duplicate pages without
+    comparing every pair.
+    """
+
+    def __init__(self, settings: Optional[ContentSettings] = None):
+        self.settings = settings or ContentSettings()
+
+    def analyze(self, pages: Sequence[PageResult]) -> ContentReport:
+        settings = self.settings
+        started = time.perf_counter()
+        pages = [p for p in pages if p.text]
+        report = ContentReport(thin_words=settings.thin_words)
+        if not pages:
+            return report
+        n = len(pages)
+
+        token_lists = [tokenize(p.text) for p in pages]
+        lengths = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=n)
+        vocab: Dict[str, int] = {}
+        for tokens in token_lists:
+            for t in set(tokens).difference(vocab):
+                vocab[t] = len(vocab)
+        ids = np.fromiter(
+            map(vocab.__getitem__, chain.from_iterable(token_lists)), dtype=np.int64, count=int(lengths.sum())
+        )
+        del token_lists
+        terms = list(vocab)
+        v = max(len(terms), 1)
+        doc_ids = np.repeat(np.arange(n), lengths)
+        stop = np.fromiter((len(t) < 3 or t in STOPWORDS for t in terms), dtype=bool, count=len(terms))
+        syllables = np.fromiter((count_syllables(t) for t in terms), dtype=np.float64, count=len(terms))
+
+        # Sparse document-term matrix: one entry per (page, term) present
+        entries, tf = np.unique(doc_ids * v + ids, return_counts=True)
+        entry_doc, entry_term = np.divmod(entries, v)
+        df = np.bincount(entry_term, minlength=len(terms))
+        keywords = self._top_keywords(entry_doc, entry_term, tf, df, stop, n)
+
+        sentences = np.fromiter(
+            (max(1, len(_SENTENCE_END_RE.findall(p.text))) for p in pages), dtype=np.int64, count=n
+        )
+        page_syllables = np.bincount(doc_ids, weights=syllables[ids], minlength=n)
+        safe_words = np.maximum(lengths, 1)
+        reading_ease = 206.835 - 1.015 * lengths / sentences - 84.6 * page_syllables / safe_words
+        alignment = self._heading_alignment(pages, vocab, keywords, v)
+
+        for i, page in enumerate(pages):
+            report.pages.append(PageContent(
+                url=page.url,
+                words=int(lengths[i]),
+                sentences=int(sentences[i]),
+                reading_ease=round(float(reading_ease[i]), 1),
+                keywords=[terms[t] for t in keywords[i]],
+                heading_alignment=alignment[i],
+                thin=bool(lengths[i] < settings.thin_words),
+            ))
+
+        occurrences = np.bincount(ids, minlength=len(terms))
+        occurrences[stop] = 0
+        top = np.argsort(-occurrences, kind="stable")[:20]
+        report.top_keywords = [(terms[t], int(occurrences[t]), int(df[t])) for t in top if occurrences[t] > 1]
+        for size in (2, 3):
+            report.top_phrases += self._top_ngrams(ids, doc_ids, stop, terms, size)
+        report.top_phrases.sort(key=lambda item: -item[1])
+        report.top_phrases = report.top_phrases[:20]
+        report.duplicate_clusters = self._near_duplicates(ids, doc_ids, n, [p.url for p in pages])
+        report.duration = time.perf_counter() - started
+        return report
+
+    def _top_keywords(self, entry_doc, entry_term, tf, df, stop, n) -> List[List[int]]:
+        """The highest TF-IDF non-stopword term ids of every page."""
+        keep = ~stop[entry_term]
+        entry_doc, entry_term, tf = entry_doc[keep], entry_term[keep], tf[keep]
+        weight = tf * (np.log((1 + n) / (1 + df[entry_term])) + 1.0)
+        order = np.lexsort((-weight, entry_doc))
+        entry_doc, entry_term = entry_doc[order], entry_term[order]
+        starts = np.searchsorted(entry_doc, np.arange(n))
+        rank = np.arange(len(entry_doc)) - starts[entry_doc]
+        selected = rank < self.settings.keywords_per_page
+        keywords: List[List[int]] = [[] for _ in range(n)]
+        for doc, term in zip(entry_doc[selected].tolist(), entry_term[selected].tolist()):
+            keywords[doc].append(term)
+        return keywords
+
+    @staticmethod
+    def _heading_alignment(
+        pages: Sequence[PageResult], vocab: Dict[str, int], keywords: List[List[int]], v: int
+    ) -> List[Optional[float]]:
+        """Share of each page's keywords that appear in its title or headings."""
+        heading_keys = np.fromiter(
+            (
+                doc * v + vocab[w]
+                for doc, page in enumerate(pages)
+                for w in tokenize(" ".join([page.title or "", *page.heading_texts]))
+                if w in vocab
+            ),
+            dtype=np.int64,
+        )
+        keyword_docs = np.repeat(np.arange(len(pages)), [len(k) for k in keywords])
+        keyword_keys = keyword_docs * v + np.fromiter(
+            (t for k in keywords for t in k), dtype=np.int64, count=len(keyword_docs)
+        )
+        found = np.isin(keyword_keys, heading_keys)
+        totals = np.bincount(keyword_docs, minlength=len(pages))
+        hits = np.bincount(keyword_docs, weights=found.astype(np.float64), minlength=len(pages))
+        return [round(float(h / t), 2) if t else None for h, t in zip(hits, totals)]
+
+    @staticmethod
+    def _top_ngrams(ids, doc_ids, stop, terms: List[str], size: int, top: int = 20) -> List[Tuple[str, int]]:
+        """Most frequent runs of ``size`` non-stopwords within a page."""
+        count = len(ids) - size + 1
+        if count <= 0:
+            return []
+        valid = doc_ids[:count] == doc_ids[size - 1:]
+        for offset in range(size):
+            valid &= ~stop[ids[offset:offset + count]]
+        positions = np.flatnonzero(valid)
+        if not len(positions):
+            return []
+        # Fold one word at a time, renumbering so codes stay below len(positions)
+        codes = ids[positions]
+        for offset in range(1, size):
+            _, codes = np.unique(codes * len(terms) + ids[positions + offset], return_inverse=True)
+        _, first, counts = np.unique(codes, return_index=True, return_counts=True)
+        best = np.argsort(-counts, kind="stable")[:top]
+        return [
+            (" ".join(terms[ids[positions[first[i]] + offset]] for offset in range(size)), int(counts[i]))
+            for i in best
+            if counts[i] > 1
+        ]
+
+    def _near_duplicates(self, ids, doc_ids, n: int, urls: List[str]) -> List[Tuple[float, List[str]]]:
+        """Groups of pages whose estimated shingle Jaccard similarity reaches the threshold."""
+        settings = self.settings
+        k = settings.shingle_words
+        count = len(ids) - k + 1
+        if count <= 0:
+            return []
+        # Rolling hash of every k-word shingle that stays within one page
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(k):
+            shingles = shingles * _SHINGLE_PRIME + (ids[offset:offset + count].astype(np.uint64) + np.uint64(1))
+        valid = doc_ids[:count] == doc_ids[k - 1:]
+        shingles, shingle_docs = shingles[valid], doc_ids[:count][valid]
+        if not len(shingles):
+            return []
+        starts = np.flatnonzero(np.r_[True, shingle_docs[1:] != shingle_docs[:-1]])
+        docs = shingle_docs[starts]
+
+        permutations = settings.minhash_permutations
+        rng = np.random.default_rng(0)
+        a = rng.integers(0, np.iinfo(np.uint64).max, size=permutations, dtype=np.uint64) | np.uint64(1)
+        b = rng.integers(0, np.iinfo(np.uint64).max, size=permutations, dtype=np.uint64)
+        signatures = np.empty((len(docs), permutations), dtype=np.uint64)
+        block = max(1, MINHASH_BLOCK_ELEMENTS // len(shingles))
+        for lo in range(0, permutations, block):
+            hashed = shingles[:, None] * a[None, lo:lo + block] + b[None, lo:lo + block]
+            signatures[:, lo:lo + block] = np.minimum.reduceat(hashed, starts, axis=0)
+
+        # Pages sharing any band of their signature become candidate pairs
+        bands = max(1, min(settings.lsh_bands, permutations))
+        rows = permutations // bands
+        left: List[np.ndarray] = []
+        right: List[np.ndarray] = []
+        for band in range(bands):
+            _, groups = np.unique(signatures[:, band * rows:(band + 1) * rows], axis=0, return_inverse=True)
+            groups = groups.ravel()
+            order = np.argsort(groups, kind="stable")
+            bounds = np.flatnonzero(np.diff(groups[order])) + 1
+            for members in np.split(order, bounds):
+                if len(members) < 2:
+                    continue
+                if len(members) <= MAX_BUCKET_PAIRS:
+                    i, j = np.triu_indices(len(members), 1)
+                    left.append(members[i])
+                    right.append(members[j])
+                else:
+                    left.append(np.full(len(members) - 1, members[0]))
+                    right.append(members[1:])
+        if not left:
+            return []
+        pairs = np.unique(np.stack([np.concatenate(left), np.concatenate(right)], axis=1), axis=0)
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        accepted = similarity >= settings.duplicate_threshold
+
+        parent = list(range(len(docs)))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        lowest: Dict[int, float] = {}
+        for (i, j), sim in zip(pairs[accepted].tolist(), similarity[accepted].tolist()):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[rj] = ri
+                lowest[ri] = min(lowest.pop(ri, 1.0), lowest.pop(rj, 1.0), sim)
+            else:
+                lowest[ri] = min(lowest.get(ri, 1.0), sim)
+        clusters: Dict[int, List[str]] = {}
+        for i in np.unique(pairs[accepted]).tolist():
+            clusters.setdefault(find(i), []).append(urls[docs[i]])
+        return sorted(
+            ((lowest.get(root, 1.0), sorted(members)) for root, members in clusters.items()),
+            key=lambda cluster: -len(cluster[1]),
+        )
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .settings import CompactionSettings, cache_dir
+
+# Bump when the selection algorithm changes so cached results are recomputed
+COMPACTION_VERSION = 1
+
+_HEADING_RE = re.compile(r"^(?:#{1,6}\s|\*\*[^*\n]+\*\*\s*$|[A-Z][A-Za-z /&-]{2,60}:\s*$)", re.MULTILINE)
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9'-]{2,}")
+_STOPWORDS = frozenset(
+    "the and for with that this from are was were will have has had not but you your our their its "
+    "into such using use based all any each more most other some than then them they what when which "
+    "who how also can should would could been being over under about after before between website".split()
+)
+
+# Summarizer signature: (context, task description, token budget) -> summary
+Summarizer = Callable[[str, str, int], str]
+
+
+def render_mapping(value: Any) -> str:
+    """
+    Compact prompt rendering of a config value: ``key: value`` pairs and
+    comma-separated lists instead of a Python dict repr.
+    """
+    if isinstance(value, dict):
+        return "; ".join(f"{str(k).replace('_', ' ')}: {_render_nested(v)}" for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_render_nested(v) for v in value)
+    return str(value)
+
+
+def _render_nested(value: Any) -> str:
+    if isinstance(value, dict):
+        return "(" + ", ".join(f"{str(k).replace('_', ' ')}: {_render_nested(v)}" for k, v in value.items()) + ")"
+    return render_mapping(value)
+
+
+class TokenCounter:
+    """
+    tiktoken-based token counting and truncation. When the encoding can't be
+    loaded (tiktoken fetches it on first use), falls back to ~4 characters
+    per token so compaction still works offline.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self.encoding_name = encoding
+        try:
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(encoding)
+        except Exception as e:
+            print(f"Token counts are approximate: could not load tiktoken encoding '{encoding}' ({e})")
+            self._encoding = None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is None:
+            return (len(text) + 3) // 4
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, budget: int) -> str:
+        if self._encoding is None:
+            return text[: budget * 4]
+        tokens = self._encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= budget else self._encoding.decode(tokens[:budget])
+
+
+def split_sections(text: str) -> List[str]:
+    """Split at markdown headings (or "Title:" lines), then at blank lines."""
+    starts = sorted({0, *(m.start() for m in _HEADING_RE.finditer(text))})
+    sections = []
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        block = text[start:end].strip()
+        if not block:
+            continue
+        if len(block) > 2000:
+            # Long sections are ranked paragraph by paragraph
+            sections += [p.strip() for p in re.split(r"\n\s*\n", block) if p.strip()]
+        else:
+            sections.append(block)
+    return sections
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def rank_sections(sections: List[str], query: str) -> List[float]:
+    """
+    Relevance of each section to the query (the next task's description
+    and expected output): tf-idf weighted term overlap, length-normalised.
+    """
+    query_terms = set(_terms(query))
+    section_terms = [Counter(_terms(s)) for s in sections]
+    n = len(sections)
+    df = Counter(term for counts in section_terms for term in counts if term in query_terms)
+    scores = []
+    for i, counts in enumerate(section_terms):
+        score = sum(
+            (1 + math.log(counts[term])) * math.log(1 + n / df[term])
+            for term in query_terms if counts.get(term)
+        )
+        length = sum(counts.values()) or 1
+        score /= math.sqrt(length)
+        if i == 0:
+            # Reports usually open with their summary
+            score += 0.5
+        scores.append(score)
+    return scores
+
+
+class CompactionStats(BaseModel):
+    task_id: str
+    budget: int
+    tokens_before: int
+    tokens_after: int
+    method: str
+    cached: bool = False
+
+
+class ContextCompactor:
+    """
+    Fit each task's upstream context into a token budget.
+
+    Contexts within budget pass through unchanged. Larger ones are split
+    into sections, ranked by relevance to the receiving task, and the best
+    sections are kept in their original order until the budget is used.
+    In ``summarize`` mode the selected text is then condensed by the
+    summarizer (an LLM call). Results are cached on disk by a hash of the
+    context, the task and the budget, so reruns and replays compact for free.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[CompactionSettings] = None,
+        summarizer: Optional[Summarizer] = None,
+        directory: Optional[Path] = None
+    ):
+        self.settings = settings or CompactionSettings()
+        self.summarizer = summarizer
+        self.directory = Path(directory or cache_dir() / "compaction")
+        self.counter = TokenCounter(self.settings.encoding)
+        self.stats: List[CompactionStats] = []
+        self._lock = threading.Lock()
+
+    def budget_for(self, task_id: str) -> int:
+        return self.settings.budgets.get(task_id, self.settings.default_budget)
+
+    def compact(self, task_id: str, task: Any, context: Optional[str]) -> Optional[str]:
+        if not context:
+            return context
+        budget = self.budget_for(task_id)
+        before = self.counter.count(context)
+        if before <= budget:
+            self._record(task_id, budget, before, before, "unchanged")
+            return context
+
+        query = f"{task.description}\n{getattr(task, 'expected_output', '') or ''}"
+        key = self._key(context, query, budget)
+        cached = self._load(key)
+        if cached is not None:
+            self._record(task_id, budget, before, cached[1], cached[0], cached=True)
+            return cached[2]
+
+        method, compacted = self._compact(context, query, budget)
+        after = self.counter.count(compacted)
+        self._save(key, method, after, compacted)
+        self._record(task_id, budget, before, after, method)
+        return compacted
+
+    def _compact(self, context: str, query: str, budget: int) -> Tuple[str, str]:
+        summarize = self.settings.mode == "summarize" and self.summarizer is not None
+        # Leave the summarizer more material than the final budget
+        selection_budget = budget * 4 if summarize else budget
+        selected = self._select(context, query, selection_budget)
+        method = "extract"
+        if summarize:
+            try:
+                selected = self.summarizer(selected, query, budget)
+                method = "summarize"
+            except Exception as e:
+                print(f"Context summarization failed, falling back to extraction: {e}")
+                selected = self._select(context, query, budget)
+        if self.counter.count(selected) > budget:
+            selected = self.counter.truncate(selected, budget)
+            method += "+truncate"
+        return method, selected
+
+    def _select(self, context: str, query: str, budget: int) -> str:
+        sections = split_sections(context)
+        scores = rank_sections(sections, query)
+        marker = "\n\n[... {} less relevant sections omitted to fit the context budget]"
+        available = budget - self.counter.count(marker.format(len(sections)))
+        keep = set()
+        used = 0
+        for i in sorted(range(len(sections)), key=lambda i: scores[i], reverse=True):
+            tokens = self.counter.count(sections[i]) + 1
+            if used + tokens <= available:
+                keep.add(i)
+                used += tokens
+        if not keep:
+            # Even the best section is over budget: cut it down
+            best = max(range(len(sections)), key=lambda i: scores[i])
+            return self.counter.truncate(sections[best], available)
+        text = "\n\n".join(sections[i] for i in sorted(keep))
+        omitted = len(sections) - len(keep)
+        return text + (marker.format(omitted) if omitted else "")
+
+    def _key(self, context: str, query: str, budget: int) -> str:
+        payload = json.dumps([
+            COMPACTION_VERSION, self.settings.mode, self.counter.encoding_name,
+            self.counter.exact, budget, query, context
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> Optional[Tuple[str, int, str]]:
+        try:
+            data = json.loads((self.directory / f"{key}.json").read_text())
+            return data["method"], data["tokens"], data["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key: str, method: str, tokens: int, text: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"method": method, "tokens": tokens, "text": text}, f)
+        os.replace(temp_path, self.directory / f"{key}.json")
+
+    def _record(self, task_id: str, budget: int, before: int, after: int, method: str, cached: bool = False):
+        with self._lock:
+            self.stats.append(CompactionStats(
+                task_id=task_id, budget=budget, tokens_before=before, tokens_after=after,
+                method=method, cached=cached
+            ))
+
+    def markdown(self) -> str:
+        lines = [
+            "| Task | Budget | Tokens before | Tokens after | Method |",
+            "| --- | ---: | ---: | ---: | --- |",
+        ]
+        for s in self.stats:
+            method = s.method + (" (cached)" if s.cached else "")
+            lines.append(f"| {s.task_id} | {s.budget:,} | {s.tokens_before:,} | {s.tokens_after:,} | {method} |")
+        before = sum(s.tokens_before for s in self.stats)
+        after = sum(s.tokens_after for s in self.stats)
+        lines.append(f"| **Total** | | {before:,} | {after:,} | |")
+        if not self.counter.exact:
+            lines.append("\nToken counts are approximate (tiktoken encoding unavailable).")
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        before = sum(s.tokens_before for s in self.stats)
+        after = sum(s.tokens_after for s in self.stats)
+        compacted = sum(1 for s in self.stats if s.method != "unchanged")
+        return (
+            f"Context compaction: {compacted} of {len(self.stats)} contexts compacted, "
+            f"{before:,} -> {after:,} tokens"
+        )
@@ -0,0 +1,507 @@
+import asyncio
+import codecs
+import gzip
+import hashlib
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from pydantic import BaseModel, Field
+
+from .html_metrics import MetricsExtractor, PageMetrics
+from .settings import CrawlSettings
+from .site_index import PageSnapshot, SiteSnapshotIndex
+
+USER_AGENT = "WebsiteRedesignCrew/0.1 (+site analysis)"
+
+# File types that are never worth downloading while looking for pages
+SKIPPED_EXTENSIONS = {
+    ".7z", ".avi", ".bmp", ".css", ".doc", ".docx", ".eot", ".exe", ".gif",
+    ".gz", ".ico", ".jpeg", ".jpg", ".js", ".json", ".mov", ".mp3", ".mp4",
+    ".otf", ".pdf", ".png", ".ppt", ".pptx", ".rar", ".svg", ".tar", ".ttf",
+    ".webm", ".webp", ".woff", ".woff2", ".xls", ".xlsx", ".xml", ".zip",
+}
+
+# Per-crawl fields that aren't stored in a page snapshot
+SNAPSHOT_EXCLUDED = {"url", "depth", "change", "changes", "text", "heading_texts"}
+
+# Metrics compared against the previous snapshot when a page has changed
+DIFFED_FIELDS = (
+    "status", "title", "meta_description", "h1", "headings", "images", "images_missing_alt",
+    "images_missing_dimensions", "internal_links", "nofollow_links", "scripts_blocking", "stylesheets",
+)
+
+
+class PageResult(BaseModel):
+    url: str
+    depth: int
+    status: Optional[int] = None
+    elapsed: float = 0.0
+    bytes: int = 0
+    content_type: str = ""
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    h1: int = 0
+    headings: int = 0
+    images: int = 0
+    images_missing_alt: int = 0
+    images_missing_dimensions: int = 0
+    links: int = 0
+    internal_links: int = 0
+    nofollow_links: int = 0
+    scripts_blocking: int = 0
+    stylesheets: int = 0
+    inline_bytes: int = 0
+    error: Optional[str] = None
+    # Compared with the snapshot index: new, changed or unchanged
+    change: Optional[str] = None
+    changes: List[str] = Field(default_factory=list)
+    # Only filled by crawlers created with collect_text
+    text: Optional[str] = None
+    heading_texts: List[str] = Field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+class CrawlResult(BaseModel):
+    start_url: str
+    pages: List[PageResult] = Field(default_factory=list)
+    duration: float = 0.0
+    robots_blocked: int = 0
+    sitemap_urls: int = 0
+    # Set when a snapshot index from an earlier crawl was available
+    previous_crawl: Optional[float] = None
+    skipped: int = 0
+    not_modified: int = 0
+    removed: List[str] = Field(default_factory=list)
+
+    def summary(self, max_rows: int = 50) -> str:
+        """
+        Render the aggregated crawl metrics as a plain-text report. After an
+        earlier crawl of the same site, the per-page rows cover only new and
+        changed pages and a list of what changed comes first.
+        """
+        ok = [p for p in self.pages if p.ok]
+        failed = [p for p in self.pages if not p.ok]
+        times = sorted(p.elapsed for p in ok)
+        lines = [
+            f"Website Analysis for {self.start_url}:",
+            f"Crawled {len(self.pages)} pages ({len(failed)} failed) in {self.duration:.2f} seconds",
+            f"Sitemap URLs seeded: {self.sitemap_urls}, URLs blocked by robots.txt: {self.robots_blocked}",
+        ]
+        if self.previous_crawl is not None:
+            lines += self._delta_lines(max_rows)
+        if times:
+            lines += [
+                "Performance:",
+                f"- Response time avg {sum(times) / len(times):.2f}s, "
+                f"p50 {_percentile(times, 50):.2f}s, p90 {_percentile(times, 90):.2f}s, "
+                f"max {times[-1]:.2f}s",
+                f"- Total HTML transferred: {sum(p.bytes for p in ok) / 1024:.1f} KB",
+            ]
+        lines += [
+            "SEO and structure:",
+            f"- Pages without a title: {sum(1 for p in ok if not p.title)}",
+            f"- Pages without a meta description: {sum(1 for p in ok if not p.meta_description)}",
+            f"- Pages without headings: {sum(1 for p in ok if not p.headings)}",
+            f"- Pages without exactly one h1: {sum(1 for p in ok if p.h1 != 1)}",
+            f"- Images without alt text: {sum(p.images_missing_alt for p in ok)} "
+            f"of {sum(p.images for p in ok)}",
+            f"- Images without width/height: {sum(p.images_missing_dimensions for p in ok)}",
+            f"- Nofollow links: {sum(p.nofollow_links for p in ok)}",
+            "Render blocking:",
+            f"- Render-blocking scripts per page: {_average(ok, 'scripts_blocking'):.1f}",
+            f"- Stylesheets per page: {_average(ok, 'stylesheets'):.1f}",
+            f"- Inline script/style per page: {_average(ok, 'inline_bytes') / 1024:.1f} KB",
+        ]
+        slowest = sorted(ok, key=lambda p: p.elapsed, reverse=True)[:5]
+        if slowest:
+            lines.append("Slowest pages:")
+            lines += [f"- {p.url} ({p.elapsed:.2f}s)" for p in slowest]
+        if failed:
+            lines.append("Failed pages:")
+            lines += [f"- {p.url}: {p.error or p.status}" for p in failed[:max_rows]]
+        rows = ok if self.previous_crawl is None else [p for p in ok if p.change != "unchanged"]
+        if rows or self.previous_crawl is None:
+            lines.append("Per-page metrics (url | status | seconds | KB | headings | images | links | title):")
+        for p in rows[:max_rows]:
+            lines.append(
+                f"- {p.url} | {p.status} | {p.elapsed:.2f} | {p.bytes / 1024:.1f} | "
+                f"{p.headings} | {p.images} | {p.links} | {p.title or 'No title found'}"
+            )
+        if len(rows) > max_rows:
+            lines.append(f"... {len(rows) - max_rows} more pages not shown")
+        return "\n".join(lines)
+
+    def _delta_lines(self, max_rows: int) -> List[str]:
+        new = [p for p in self.pages if p.change == "new"]
+        changed = [p for p in self.pages if p.change == "changed"]
+        unchanged = sum(1 for p in self.pages if p.change == "unchanged")
+        since = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.previous_crawl))
+        lines = [
+            f"Changes since the last crawl ({since}): {len(new)} new, {len(changed)} changed, "
+            f"{len(self.removed)} removed, {unchanged} unchanged "
+            f"({self.skipped} skipped by sitemap lastmod, {self.not_modified} answered 304 Not Modified)",
+        ]
+        for p in changed[:max_rows]:
+            lines.append(f"- changed {p.url}: {'; '.join(p.changes)}")
+        for p in new[: max(0, max_rows - len(changed))]:
+            lines.append(f"- new {p.url}")
+        for url in self.removed[: max(0, max_rows - len(changed) - len(new))]:
+            lines.append(f"- removed {url}")
+        shown = len(changed) + len(new) + len(self.removed)
+        if shown > max_rows:
+            lines.append(f"... {shown - max_rows} more changes not shown")
+        return lines
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _average(pages: List[PageResult], attribute: str) -> float:
+    return sum(getattr(p, attribute) for p in pages) / len(pages) if pages else 0.0
+
+
+def diff_metrics(previous: Dict[str, Any], page: PageResult) -> List[str]:
+    """Describe how ``page`` differs from the metrics stored for it last time."""
+    changes = [
+        f"{name} {previous.get(name)!r} -> {getattr(page, name)!r}"
+        for name in DIFFED_FIELDS
+        if previous.get(name) != getattr(page, name)
+    ]
+    before = previous.get("bytes", 0)
+    if abs(page.bytes - before) >= 1024:
+        changes.append(f"size {before / 1024:.1f} KB -> {page.bytes / 1024:.1f} KB")
+    return changes or ["content changed"]
+
+
+def normalize_url(url: str) -> str:
+    """Drop fragments and default ports so equivalent URLs compare equal."""
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class SiteCrawler:
+    """Breadth-first, same-origin crawler over a pooled async HTTP client.
+
+    Pages are fetched by a fixed pool of workers; a per-host semaphore keeps
+    the load on any single host bounded regardless of the pool size.
+
+    With a snapshot ``index`` pages already known from an earlier crawl are
+    not downloaded again when their sitemap ``lastmod`` is unchanged, and are
+    otherwise fetched with ``If-None-Match``/``If-Modified-Since``; a 304
+    reuses the stored metrics and links. Each page is marked new, changed
+    (with a metric diff) or unchanged. With ``collect_text`` every page's
+    visible text and heading texts are kept for content analysis; pages
+    restored from the index have neither, so such crawls go without one.
+
+    ``crawl()`` returns every page at once; ``iter_pages()`` hands each
+    one over as it is parsed and keeps none of them.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[CrawlSettings] = None,
+        index: Optional[SiteSnapshotIndex] = None,
+        collect_text: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.settings = settings or CrawlSettings()
+        self._index = index
+        self.collect_text = collect_text
+        self._transport = transport
+        self._lastmod: Dict[str, str] = {}
+        self._site = ""
+        self._crawl_started = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._pages: Optional[asyncio.Queue] = None
+        self._robots: Optional[RobotFileParser] = None
+        self._origins: Set[str] = set()
+        self._seen: Set[str] = set()
+        self._scheduled = 0
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._result: Optional[CrawlResult] = None
+
+    @property
+    def result(self) -> Optional[CrawlResult]:
+        """The current or last crawl's counters; only ``crawl()`` fills in its pages."""
+        return self._result
+
+    async def crawl(self, start_url: str) -> CrawlResult:
+        pages = [page async for page in self.iter_pages(start_url)]
+        self._result.pages = pages
+        return self._result
+
+    async def iter_pages(self, start_url: str) -> AsyncIterator[PageResult]:
+        """
+        Yield each page as soon as it has been fetched and parsed. Workers
+        wait while ``concurrency`` pages are ready but not yet consumed, so
+        a slow consumer holds back the crawl rather than piling up pages.
+        """
+        settings = self.settings
+        start_url = normalize_url(start_url if "://" in start_url else "https://" + start_url)
+        self._result = CrawlResult(start_url=start_url)
+        self._origins = {origin_of(start_url)}
+        self._seen = set()
+        self._scheduled = 0
+        self._lastmod = {}
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(settings.per_host_concurrency))
+        self._queue = asyncio.Queue()
+        self._site = origin_of(start_url)
+        if self._index is not None:
+            self._result.previous_crawl = self._index.last_crawl(self._site)
+        self._crawl_started = time.time()
+        started = time.perf_counter()
+
+        limits = httpx.Limits(
+            max_connections=settings.concurrency,
+            max_keepalive_connections=settings.concurrency,
+        )
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=settings.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            transport=self._transport,
+        ) as client:
+            self._client = client
+            sitemaps = await self._load_robots(start_url)
+            self._enqueue(start_url, 0)
+            if settings.use_sitemap:
+                for url in await self._load_sitemaps(sitemaps):
+                    self._result.sitemap_urls += 1
+                    self._enqueue(url, 1)
+
+            self._pages = asyncio.Queue(maxsize=settings.concurrency)
+            workers = [asyncio.create_task(self._worker()) for _ in range(settings.concurrency)]
+            # Workers hand over a page before marking its URL done, so this comes last
+            finished = asyncio.create_task(self._end_of_pages())
+            crawled = 0
+            try:
+                while (page := await self._pages.get()) is not None:
+                    crawled += 1
+                    yield page
+            finally:
+                for task in [finished, *workers]:
+                    task.cancel()
+                await asyncio.gather(finished, *workers, return_exceptions=True)
+
+        self._result.duration = time.perf_counter() - started
+        if self._index is not None:
+            self._result.removed = self._index.finish_crawl(
+                self._site, self._crawl_started, crawled,
+                complete=self._scheduled < settings.max_pages,
+            )
+
+    async def _end_of_pages(self) -> None:
+        await self._queue.join()
+        await self._pages.put(None)
+
+    def _enqueue(self, url: str, depth: int) -> None:
+        try:
+            url = normalize_url(url)
+            parts = urlsplit(url)
+        except ValueError:
+            # e.g. "http://[oops/": skip the link, not the page
+            return
+        if parts.scheme not in ("http", "https") or origin_of(url) not in self._origins:
+            return
+        if url in self._seen or self._scheduled >= self.settings.max_pages:
+            return
+        path = parts.path.lower()
+        if "." in path.rsplit("/", 1)[-1] and path[path.rfind("."):] in SKIPPED_EXTENSIONS:
+            return
+        if self._robots is not None and not self._robots.can_fetch(USER_AGENT, url):
+            self._result.robots_blocked += 1
+            self._seen.add(url)
+            return
+        self._seen.add(url)
+        self._scheduled += 1
+        self._queue.put_nowait((url, depth))
+
+    async def _worker(self) -> None:
+        while True:
+            url, depth = await self._queue.get()
+            try:
+                try:
+                    page, links = await self._fetch_page(url, depth)
+                except Exception as e:
+                    # A worker that dies leaves queue.join() waiting forever
+                    page, links = PageResult(url=url, depth=depth, error=f"{type(e).__name__}: {e}"), []
+                await self._pages.put(page)
+                if depth < self.settings.max_depth:
+                    for link in links:
+                        self._enqueue(link, depth + 1)
+            finally:
+                self._queue.task_done()
+
+    async def _fetch_page(self, url: str, depth: int) -> Tuple[PageResult, List[str]]:
+        snapshot = self._index.get(url) if self._index is not None else None
+        lastmod = self._lastmod.get(url)
+        if snapshot is not None and lastmod and lastmod == snapshot.sitemap_lastmod:
+            self._result.skipped += 1
+            return self._unchanged(url, depth, snapshot, lastmod), snapshot.links
+
+        headers = {}
+        if snapshot is not None:
+            if snapshot.etag:
+                headers["If-None-Match"] = snapshot.etag
+            if snapshot.last_modified:
+                headers["If-Modified-Since"] = snapshot.last_modified
+        page = PageResult(url=url, depth=depth)
+        digest = hashlib.sha256()
+        async with self._host_slots[urlsplit(url).netloc]:
+            started = time.perf_counter()
+            try:
+                async with self._client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and snapshot is not None:
+                        self._result.not_modified += 1
+                        return self._unchanged(url, depth, snapshot, lastmod), snapshot.links
+                    page.status = response.status_code
+                    page.content_type = response.headers.get("content-type", "")
+                    if "html" not in page.content_type or page.status >= 400:
+                        page.elapsed = time.perf_counter() - started
+                        return page, []
+                    # Parse while the body streams in; the document is never held whole
+                    extractor = MetricsExtractor(
+                        str(response.url), collect_links=True, collect_text=self.collect_text
+                    )
+                    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+                    async for chunk in response.aiter_bytes():
+                        page.bytes += len(chunk)
+                        digest.update(chunk)
+                        extractor.feed(decoder.decode(chunk))
+                    extractor.feed(decoder.decode(b"", final=True))
+                    page.elapsed = time.perf_counter() - started
+                    validators = (response.headers.get("etag"), response.headers.get("last-modified"))
+            except httpx.HTTPError as e:
+                page.elapsed = time.perf_counter() - started
+                page.error = f"{type(e).__name__}: {e}"
+                return page, []
+
+        metrics = extractor.close()
+        self._apply_metrics(page, metrics)
+        if self.collect_text:
+            page.text = metrics.text
+            page.heading_texts = [text for _, text in metrics.outline]
+        content_hash = digest.hexdigest()
+        if snapshot is None:
+            page.change = "new" if self._index is not None else None
+        elif content_hash == snapshot.content_hash:
+            page.change = "unchanged"
+        else:
+            page.change = "changed"
+            page.changes = diff_metrics(snapshot.metrics, page)
+        if self._index is not None:
+            self._index.put(
+                self._site,
+                PageSnapshot(
+                    url=url, etag=validators[0], last_modified=validators[1], sitemap_lastmod=lastmod,
+                    content_hash=content_hash, metrics=page.model_dump(exclude=SNAPSHOT_EXCLUDED),
+                    links=metrics.page_links, fetched=time.time(),
+                ),
+                self._crawl_started,
+            )
+        return page, metrics.page_links
+
+    def _unchanged(
+        self, url: str, depth: int, snapshot: PageSnapshot, lastmod: Optional[str]
+    ) -> PageResult:
+        """The stored result for a page the server (or its sitemap) says hasn't changed."""
+        self._index.touch(url, self._crawl_started, lastmod)
+        return PageResult(url=url, depth=depth, change="unchanged", **snapshot.metrics)
+
+    @staticmethod
+    def _apply_metrics(page: PageResult, metrics: PageMetrics) -> None:
+        page.title = metrics.title
+        page.meta_description = metrics.meta_description
+        page.h1 = metrics.heading_counts[0]
+        page.headings = metrics.headings
+        page.images = metrics.images
+        page.images_missing_alt = metrics.images_missing_alt
+        page.images_missing_dimensions = metrics.images_missing_dimensions
+        page.links = metrics.links
+        page.internal_links = metrics.internal_links
+        page.nofollow_links = metrics.nofollow_links
+        page.scripts_blocking = metrics.scripts_blocking
+        page.stylesheets = metrics.stylesheets
+        page.inline_bytes = metrics.inline_script_bytes + metrics.inline_style_bytes
+
+    async def _load_robots(self, start_url: str) -> List[str]:
+        """Fetch robots.txt, adopt the canonical origin and return sitemap URLs."""
+        origin = origin_of(start_url)
+        try:
+            response = await self._client.get(f"{origin}/robots.txt")
+        except httpx.HTTPError:
+            return [f"{origin}/sitemap.xml"]
+
+        # A redirect here (e.g. to the www. host) tells us the canonical origin
+        canonical = origin_of(str(response.url))
+        self._origins.add(canonical)
+        sitemaps = [f"{canonical}/sitemap.xml"]
+        if response.status_code == 200:
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+            if self.settings.respect_robots:
+                self._robots = parser
+            sitemaps = parser.site_maps() or sitemaps
+        return sitemaps
+
+    async def _load_sitemaps(self, sitemap_urls: List[str]) -> List[str]:
+        """Resolve sitemap (and sitemap index) files into page URLs."""
+        pending = list(sitemap_urls)
+        visited: Set[str] = set()
+        urls: List[str] = []
+        while pending and len(urls) < self.settings.max_sitemap_urls:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                response = await self._client.get(sitemap_url)
+                if response.status_code != 200:
+                    continue
+                content = response.content
+                if content[:2] == b"\x1f\x8b":
+                    content = gzip.decompress(content)
+                root = ET.fromstring(content)
+            except (httpx.HTTPError, ET.ParseError, OSError):
+                continue
+
+            is_index = root.tag.endswith("sitemapindex")
+            # Each <url> or <sitemap> entry holds a <loc> and an optional <lastmod>
+            for entry in root:
+                loc = lastmod = None
+                for element in entry:
+                    if element.tag.endswith("loc") and element.text:
+                        loc = element.text.strip()
+                    elif element.tag.endswith("lastmod") and element.text:
+                        lastmod = element.text.strip()
+                if not loc:
+                    continue
+                if is_index:
+                    pending.append(loc)
+                else:
+                    urls.append(loc)
+                    if lastmod:
+                        self._lastmod[normalize_url(loc)] = lastmod
+        return urls[: self.settings.max_sitemap_urls]
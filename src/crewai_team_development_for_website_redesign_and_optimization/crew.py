@@ -1,47 +1,66 @@
-from crewai import Agent, Crew, Process, Task
-from langchain_community.tools import Tool
-from langchain_community.utilities import SerpAPIWrapper
-from langchain_openai import ChatOpenAI
-from bs4 import BeautifulSoup
-import requests
-import os
+from functools import partial
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from crewai import Crew
+
 # Load environment variables
 load_dotenv()
 
 class WebsiteRedesignCrew:
     """Website Redesign and Optimization crew"""
 
-    def __init__(self, website_url=None):
+    def __init__(self, website_url=None, llm=None, search=None):
         if website_url:
             website_url = website_url.replace("www.", "")
             if not website_url.startswith("http"):
                 website_url = "https://" + website_url
         self.website_url = website_url or "https://example.com"
+        # Stand-ins for ChatOpenAI and SerpAPI (see benchmarks.fake_llm)
+        self._llm = llm
+        self._search = search
+        # Agents, tools and the LLM client are created on first use in crew()
         self.agents = []
         self.tasks = []
-        self._setup_agents()
-        self._setup_tasks()
 
     def _setup_agents(self):
-        # Create tools
-        search = SerpAPIWrapper(serpapi_api_key=os.getenv('SERPER_API_KEY'))
+        from crewai import Agent
+        from langchain_community.tools import Tool
+
+        from .llm_governor import governed
+        from .model_routing import ModelRouter
+        from .sandbox import execute_code
+        from .search_cache import make_search
+        from .site_search import search_site
+
+        # Create tools; every agent shares one cached search
+        search = self._search or make_search()
         self.tools = [
             Tool(
                 name="search",
-                func=search.run,
+                func=search,
                 description="Search the internet for information about websites, design trends, and best practices."
+            ),
+            Tool(
+                name="SiteSearch",
+                func=partial(search_site, site_url=self.website_url),
+                description=f"Searches the pages of {self.website_url} and returns the passages most relevant to a question, with their URLs."
             )
         ]
 
-        # Create the LLM
-        llm = ChatOpenAI(
-            temperature=0.7,
-            model="gpt-3.5-turbo",
-            max_tokens=2000
+        code_executor = Tool(
+            name="CodeExecutor",
+            func=execute_code,
+            description="Runs Python code in a warm sandbox worker and returns its stdout, stderr, the value of a final expression or the traceback, with timings."
         )
 
+        # Models come from the default profiles (the developer gets the code
+        # profile); all of them share the process-wide rate-limit budgets
+        router = ModelRouter()
+        llm = governed(self._llm) if self._llm else router.chat_model("standard")
+        code_llm = llm if self._llm else router.chat_model("code")
+
         self.agents = [
             Agent(
                 role="Website Analyzer",
@@ -63,14 +82,16 @@ class WebsiteRedesignCrew:
                 role="Frontend Developer",
                 goal="Implement pixel-perfect, performant, and maintainable frontend code",
                 backstory="Senior frontend developer with deep expertise in modern frameworks and best practices.",
-                tools=self.tools,
-                llm=llm,
+                tools=self.tools + [code_executor],
+                llm=code_llm,
                 verbose=True,
                 allow_code_execution=True
             )
         ]
 
     def _setup_tasks(self):
+        from crewai import Task
+
         self.tasks = [
             Task(
                 description=f"""
@@ -102,8 +123,16 @@ class WebsiteRedesignCrew:
             )
         ]
 
-    def crew(self) -> Crew:
+    def crew(self) -> "Crew":
         """Create the website redesign crew"""
+        from crewai import Crew, Process
+
+        from .llm_cache import install_llm_cache
+
+        if not self.agents:
+            self._setup_agents()
+            self._setup_tasks()
+        install_llm_cache()
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
@@ -0,0 +1,929 @@
+import posixpath
+import re
+import time
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from .html_metrics import extract_metrics
+from .settings import CSSSettings
+from .site_build import (
+    _CSS_IMPORT_RE,
+    _CSS_TOKEN_RE,
+    _CSS_URL_RE,
+    _STRING,
+    HTML_EXTENSIONS,
+    _resolve,
+    _saving,
+    _transform_outside,
+)
+
+# At-rules whose block holds style rules; every other block at-rule is kept whole
+GROUP_AT_RULES = ("@media", "@supports", "@layer", "@container", "@document", "@-moz-document")
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"
+}
+# An open element of the same kind is closed by these start tags
+IMPLIED_END_TAGS = {"p": {"p"}, "li": {"li"}, "dt": {"dt", "dd"}, "dd": {"dt", "dd"}, "option": {"option"},
+                    "tr": {"tr"}, "td": {"td", "th"}, "th": {"td", "th"}}
+PSEUDO_ELEMENTS = {"before", "after", "first-line", "first-letter", "marker", "placeholder", "selection",
+                   "backdrop", "file-selector-button", "cue", "part", "slotted"}
+STRUCTURAL_PSEUDOS = {"root", "empty", "first-child", "last-child", "only-child", "first-of-type",
+                      "last-of-type", "only-of-type", "nth-child", "nth-last-child", "nth-of-type",
+                      "nth-last-of-type"}
+ASYNC_ONLOAD = "this.media='all'; this.onload=null"
+
+_BLOCK_TOKEN_RE = re.compile(rf"{_STRING}|[{{}};]")
+_LIST_TOKEN_RE = re.compile(rf"{_STRING}|[()\[\],]")
+_IDENT = r"(?:[\w-]|\\[0-9a-fA-F]{1,6}\s?|\\.|[^\x00-\x7f])+"
+_IDENT_RE = re.compile(_IDENT)
+_COMBINATOR_RE = re.compile(r"\s*([>+~])\s*|\s+")
+_ATTRIBUTE_RE = re.compile(
+    rf"""\[\s*(?:(?:{_IDENT}|\*)?\|(?!=))?({_IDENT})\s*(?:([~|^$*]?=)\s*("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|{_IDENT})"""
+    r"""\s*([iIsS])?\s*)?\]"""
+)
+_ESCAPE_RE = re.compile(r"\\([0-9a-fA-F]{1,6}\s?|.)")
+_NTH_RE = re.compile(r"^\s*(?:([+-]?\d*)n\s*(?:([+-])\s*(\d+))?|([+-]?\d+))\s*$")
+_SKIPPED_BLOCKS_RE = re.compile(
+    r"<!--.*?-->|<(noscript|script|style|template|textarea)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+_LINK_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_TAG_ATTR_RE = re.compile(r"""([^\s"'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?""")
+_MEDIA_ATTR_RE = re.compile(r"""\s+media\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+_CRITICAL_STYLE_RE = re.compile(r"<style\b[^>]*\bdata-critical\b", re.IGNORECASE)
+_SCRIPT_STRING_RE = re.compile(rf"{_STRING}|`(?:\\.|[^`\\])*`")
+_CREATE_ELEMENT_RE = re.compile(r"""createElement(?:NS)?\s*\((?:[^,()]*,)?\s*['"`]([A-Za-z][\w-]*)""")
+_MARKUP_TAG_RE = re.compile(r"<([A-Za-z][\w-]*)")
+_FONT_FAMILY_RE = re.compile(r"font-family\s*:\s*([^;}]+)", re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class CSSRule:
+    """One statement of a stylesheet."""
+    # "style", "group" (an at-rule holding rules, like @media) or "at" (kept verbatim)
+    kind: str
+    # Selector list or at-rule prelude, as written
+    prelude: str
+    # Declarations as written, or the block of an opaque at-rule; None for statements like @import
+    body: Optional[str] = None
+    rules: List["CSSRule"] = field(default_factory=list)
+
+    @property
+    def selectors(self) -> List[str]:
+        return split_selector_list(self.prelude) if self.kind == "style" else []
+
+    @property
+    def at_keyword(self) -> str:
+        return self.prelude.split(None, 1)[0].lower() if self.kind != "style" else ""
+
+
+def _block_end(text: str, pos: int) -> int:
+    """Index just past the ``}`` that closes the block opened before ``pos``."""
+    depth = 1
+    for match in _BLOCK_TOKEN_RE.finditer(text, pos):
+        token = match.group(0)
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return len(text) + 1
+
+
+def _parse_rules(text: str, pos: int) -> Tuple[List[CSSRule], int]:
+    rules: List[CSSRule] = []
+    start = pos
+    while True:
+        match = _BLOCK_TOKEN_RE.search(text, pos)
+        if match is None:
+            tail = text[start:].strip()
+            if tail.startswith("@"):
+                rules.append(CSSRule("at", tail))
+            return rules, len(text)
+        token = match.group(0)
+        pos = match.end()
+        if token[0] in "\"'":
+            continue
+        prelude = text[start:match.start()].strip()
+        if token == "}":
+            return rules, pos
+        if token == ";":
+            # Only at-rule statements are valid here; stray declarations are dropped like a browser would
+            if prelude.startswith("@"):
+                rules.append(CSSRule("at", prelude))
+        elif prelude.lower().startswith(GROUP_AT_RULES):
+            children, pos = _parse_rules(text, pos)
+            rules.append(CSSRule("group", prelude, rules=children))
+        else:
+            end = _block_end(text, pos)
+            rules.append(CSSRule("at" if prelude.startswith("@") else "style", prelude, text[pos:end - 1]))
+            pos = end
+        start = pos
+
+
+def parse_css(css: str) -> List[CSSRule]:
+    """Parse a stylesheet into rules; comments are dropped, everything else is kept as written."""
+    return _parse_rules(_transform_outside(css, _CSS_TOKEN_RE, lambda code: code), 0)[0]
+
+
+def render_css(rules: Iterable[CSSRule], indent: str = "") -> str:
+    out = []
+    for rule in rules:
+        if rule.kind == "group":
+            inner = render_css(rule.rules, indent + "    ")
+            out.append(f"{indent}{rule.prelude} {{\n{inner}\n{indent}}}")
+        elif rule.body is None:
+            out.append(f"{indent}{rule.prelude};")
+        else:
+            out.append(f"{indent}{rule.prelude} {{{rule.body}}}")
+    return "\n\n".join(out) if not indent else "\n".join(out)
+
+
+def split_selector_list(text: str) -> List[str]:
+    """Split on top-level commas (not those inside :is(...) or [attr="a,b"])."""
+    parts = []
+    depth = 0
+    start = 0
+    for match in _LIST_TOKEN_RE.finditer(text):
+        token = match.group(0)
+        if token in "([":
+            depth += 1
+        elif token in ")]":
+            depth -= 1
+        elif token == "," and depth == 0:
+            parts.append(text[start:match.start()].strip())
+            start = match.end()
+    parts.append(text[start:].strip())
+    return [p for p in parts if p]
+
+
+def _unescape(ident: str) -> str:
+    def replace_escape(match):
+        value = match.group(1)
+        if re.match(r"[0-9a-fA-F]", value):
+            return chr(int(value.strip(), 16))
+        return value
+    return _ESCAPE_RE.sub(replace_escape, ident)
+
+
+@dataclass(slots=True)
+class Compound:
+    """A compound selector such as ``a.nav-link[href]:first-child``."""
+    tag: Optional[str] = None
+    ids: List[str] = field(default_factory=list)
+    classes: List[str] = field(default_factory=list)
+    # (name, operator, value, case-insensitive)
+    attributes: List[Tuple[str, Optional[str], Optional[str], bool]] = field(default_factory=list)
+    # (name, argument); pseudo-elements are dropped while parsing
+    pseudos: List[Tuple[str, Optional[str]]] = field(default_factory=list)
+
+
+def _paren_end(text: str, pos: int) -> int:
+    """Index of the ``)`` matching the ``(`` at ``pos``."""
+    depth = 0
+    for match in _LIST_TOKEN_RE.finditer(text, pos):
+        token = match.group(0)
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+            if depth == 0:
+                return match.start()
+    raise ValueError(f"unbalanced parentheses in {text!r}")
+
+
+@lru_cache(maxsize=8192)
+def parse_selector(selector: str) -> Tuple[Tuple[str, Compound], ...]:
+    """
+    A complex selector as ``(combinator, compound)`` pairs, left to right;
+    the first combinator is "". Raises ValueError for syntax it can't read.
+    """
+    parts: List[Tuple[str, Compound]] = []
+    combinator = ""
+    compound: Optional[Compound] = None
+    i, n = 0, len(selector)
+    while i < n:
+        c = selector[i]
+        if c.isspace() or c in ">+~":
+            match = _COMBINATOR_RE.match(selector, i)
+            if compound is not None:
+                parts.append((combinator, compound))
+                compound = None
+            combinator = match.group(1) or " "
+            i = match.end()
+            continue
+        if compound is None:
+            compound = Compound()
+        if c == "*":
+            i += 1
+            if selector.startswith("|", i):
+                i += 1
+        elif c in "#.":
+            match = _IDENT_RE.match(selector, i + 1)
+            if not match:
+                raise ValueError(f"bad selector {selector!r}")
+            (compound.ids if c == "#" else compound.classes).append(_unescape(match.group(0)))
+            i = match.end()
+        elif c == "[":
+            match = _ATTRIBUTE_RE.match(selector, i)
+            if not match:
+                raise ValueError(f"bad attribute selector in {selector!r}")
+            name, operator, value, flag = match.groups()
+            if value and value[0] in "\"'":
+                value = value[1:-1]
+            compound.attributes.append(
+                (_unescape(name).lower(), operator, _unescape(value) if value else value, (flag or "").lower() == "i")
+            )
+            i = match.end()
+        elif c == ":":
+            element = selector.startswith("::", i)
+            match = _IDENT_RE.match(selector, i + (2 if element else 1))
+            if not match:
+                raise ValueError(f"bad pseudo-class in {selector!r}")
+            name = match.group(0).lower()
+            i = match.end()
+            argument = None
+            if selector.startswith("(", i):
+                end = _paren_end(selector, i)
+                argument = selector[i + 1:end].strip()
+                i = end + 1
+            # Pseudo-elements style a part of an element that is there anyway
+            if not element and name not in PSEUDO_ELEMENTS:
+                compound.pseudos.append((name, argument))
+        else:
+            match = _IDENT_RE.match(selector, i)
+            if not match:
+                raise ValueError(f"bad selector {selector!r}")
+            i = match.end()
+            if selector.startswith("|", i):
+                # ns|tag: namespaces are ignored
+                match = _IDENT_RE.match(selector, i + 1) or match
+                i = max(i + 1, match.end())
+            compound.tag = _unescape(match.group(0)).lower()
+    if compound is None:
+        raise ValueError(f"incomplete selector {selector!r}")
+    parts.append((combinator, compound))
+    return tuple(parts)
+
+
+class Element:
+    __slots__ = ("tag", "attrs", "parent", "children", "index", "order", "has_text", "classes")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional["Element"], order: int):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List[Element] = []
+        self.index = len(parent.children) if parent is not None else 0
+        self.order = order
+        self.has_text = False
+        self.classes: FrozenSet[str] = frozenset((attrs.get("class") or "").split())
+
+
+class _DOMBuilder(HTMLParser):
+    """Element tree of an HTML page, plus its inline scripts and styles."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.document = Element("#document", {}, None, -1)
+        self.elements: List[Element] = []
+        self.scripts: List[str] = []
+        self.styles: List[str] = []
+        self._stack = [self.document]
+
+    def handle_starttag(self, tag, attrs):
+        closes = IMPLIED_END_TAGS.get(tag)
+        if closes and self._stack[-1].tag in closes:
+            self._stack.pop()
+        parent = self._stack[-1]
+        element = Element(tag, {name: value or "" for name, value in attrs}, parent, len(self.elements))
+        parent.children.append(element)
+        self.elements.append(element)
+        if element.attrs.get("style"):
+            self.styles.append(element.attrs["style"])
+        if tag not in VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self._stack[-1].tag == tag:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                break
+
+    def parse_marked_section(self, i, report=1):
+        # HTMLParser asserts on unknown sections ("<![foo"); skip them and keep
+        # going, as a page cut short would let the purge drop live rules
+        try:
+            return super().parse_marked_section(i, report)
+        except AssertionError:
+            end = self.rawdata.find(">", i)
+            return -1 if end < 0 else end + 1
+
+    def handle_data(self, data):
+        current = self._stack[-1]
+        if current.tag == "script":
+            self.scripts.append(data)
+        elif current.tag == "style":
+            self.styles.append(data)
+        elif data.strip():
+            current.has_text = True
+
+
+class PageDOM:
+    """A parsed page with its elements indexed by id, class and tag for selector matching."""
+
+    def __init__(self, rel_path: str, html: str, above_fold_elements: int):
+        builder = _DOMBuilder()
+        builder.feed(html)
+        builder.close()
+        self.rel_path = rel_path
+        self.elements = builder.elements
+        self.scripts = builder.scripts
+        self.styles = builder.styles
+        self.by_id: Dict[str, List[Element]] = {}
+        self.by_class: Dict[str, List[Element]] = {}
+        self.by_tag: Dict[str, List[Element]] = {}
+        body_order = -1
+        for element in self.elements:
+            self.by_tag.setdefault(element.tag, []).append(element)
+            for name in element.classes:
+                self.by_class.setdefault(name, []).append(element)
+            if element.attrs.get("id"):
+                self.by_id.setdefault(element.attrs["id"], []).append(element)
+            if element.tag == "body" and body_order < 0:
+                body_order = element.order
+        # <html>, <head>, <body> and the first elements of the body
+        self.fold_limit = body_order + 1 + above_fold_elements
+
+    def candidates(self, compound: Compound, mode: "_MatchMode") -> Iterable[Element]:
+        """Elements that could match ``compound``, from the narrowest index that applies."""
+        dynamic = mode.dynamic if mode.assume else frozenset()
+        for name in compound.ids:
+            if name not in dynamic:
+                return self.by_id.get(name, ())
+        for name in compound.classes:
+            if name not in dynamic:
+                return self.by_class.get(name, ())
+        if compound.tag and not (mode.assume and compound.tag in mode.created):
+            return self.by_tag.get(compound.tag, ())
+        return self.elements
+
+
+@dataclass(frozen=True)
+class _MatchMode:
+    """
+    How to treat what the static HTML can't settle. ``assume`` is the
+    answer for user-action pseudo-classes (:hover) and unknown syntax,
+    ``dynamic`` holds class, id and attribute names the site's scripts may
+    add and ``created`` the tags they may insert. ``flip`` inverts
+    ``assume`` under :not(), so "may ever match" stays conservative there too.
+    """
+    assume: bool
+    dynamic: FrozenSet[str] = frozenset()
+    created: FrozenSet[str] = frozenset()
+    flip: bool = True
+
+    def negated(self) -> "_MatchMode":
+        return replace(self, assume=not self.assume) if self.flip else self
+
+
+def _nth_matches(argument: Optional[str], position: int, mode: _MatchMode) -> bool:
+    argument = (argument or "").lower()
+    if argument in ("odd", "even"):
+        return position % 2 == (argument == "odd")
+    match = _NTH_RE.match(argument)
+    if not match:
+        # "An+B of S" and anything else unreadable
+        return mode.assume
+    if match.group(4) is not None:
+        return position == int(match.group(4))
+    a = match.group(1)
+    a = -1 if a == "-" else int(a) if a not in ("", "+") else 1
+    b = int(match.group(3) or 0) * (-1 if match.group(2) == "-" else 1)
+    if a == 0:
+        return position == b
+    steps, remainder = divmod(position - b, a)
+    return remainder == 0 and steps >= 0
+
+
+def _siblings(element: Element, of_type: bool) -> List[Element]:
+    siblings = element.parent.children if element.parent is not None else [element]
+    return [s for s in siblings if s.tag == element.tag] if of_type else siblings
+
+
+def _pseudo_matches(element: Element, name: str, argument: Optional[str], mode: _MatchMode) -> bool:
+    if name in ("not", "is", "where", "matches", "any", "-webkit-any", "-moz-any"):
+        inner = mode.negated() if name == "not" else mode
+        try:
+            found = any(
+                _matches(element, parse_selector(s), inner) for s in split_selector_list(argument or "")
+            )
+        except ValueError:
+            return mode.assume
+        return not found if name == "not" else found
+    if name not in STRUCTURAL_PSEUDOS:
+        # :hover, :focus, :checked, :has() ...: not decidable from the markup
+        return mode.assume
+    if name == "root":
+        return element.parent is not None and element.parent.parent is None
+    if name == "empty":
+        return not element.children and not element.has_text
+    siblings = _siblings(element, name.endswith("of-type"))
+    position = siblings.index(element) + 1
+    if name in ("first-child", "first-of-type"):
+        return position == 1
+    if name in ("last-child", "last-of-type"):
+        return position == len(siblings)
+    if name in ("only-child", "only-of-type"):
+        return len(siblings) == 1
+    if name.startswith("nth-last"):
+        return _nth_matches(argument, len(siblings) - position + 1, mode)
+    return _nth_matches(argument, position, mode)
+
+
+def _attribute_matches(actual: str, operator: str, value: str, ignore_case: bool) -> bool:
+    if ignore_case:
+        actual, value = actual.lower(), value.lower()
+    if operator == "=":
+        return actual == value
+    if operator == "~=":
+        return value in actual.split()
+    if operator == "|=":
+        return actual == value or actual.startswith(value + "-")
+    if not value:
+        return False
+    if operator == "^=":
+        return actual.startswith(value)
+    if operator == "$=":
+        return actual.endswith(value)
+    return value in actual
+
+
+def _compound_matches(element: Element, compound: Compound, mode: _MatchMode) -> bool:
+    if element.parent is None:
+        return False
+    if compound.tag and compound.tag != element.tag and not (mode.assume and compound.tag in mode.created):
+        return False
+    dynamic = mode.dynamic if mode.assume else frozenset()
+    for name in compound.ids:
+        if element.attrs.get("id") != name and name not in dynamic:
+            return False
+    for name in compound.classes:
+        if name not in element.classes and name not in dynamic:
+            return False
+    for name, operator, value, ignore_case in compound.attributes:
+        actual = element.attrs.get(name)
+        if name in dynamic:
+            continue
+        if actual is None or (operator and not _attribute_matches(actual, operator, value, ignore_case)):
+            return False
+    return all(_pseudo_matches(element, name, argument, mode) for name, argument in compound.pseudos)
+
+
+def _script_created(compound: Compound, mode: _MatchMode) -> bool:
+    """Whether an element the site's scripts create could match ``compound`` on its own."""
+    dynamic = mode.dynamic
+    return (
+        mode.assume and compound.tag in mode.created
+        and all(name in dynamic for name in compound.ids + compound.classes)
+        and all(name in dynamic for name, *_ in compound.attributes)
+    )
+
+
+def _matches_self_or_ancestor(element: Optional[Element], parts, mode: _MatchMode, i: int) -> bool:
+    while element is not None and element.parent is not None:
+        if _matches(element, parts, mode, i):
+            return True
+        element = element.parent
+    return False
+
+
+def _matches(element: Element, parts: Tuple[Tuple[str, Compound], ...], mode: _MatchMode, i: int = -1) -> bool:
+    """Whether ``element`` matches the selector ``parts[:i + 1]``, checked right to left."""
+    i = len(parts) - 1 if i < 0 else i
+    combinator, compound = parts[i]
+    if i > 0 and combinator in " >" and _script_created(compound, mode):
+        # The script may append the element to ``element`` itself, even an empty one
+        if _matches(element, parts, mode, i - 1) or (
+            combinator == " " and _matches_self_or_ancestor(element.parent, parts, mode, i - 1)
+        ):
+            return True
+    if not _compound_matches(element, compound, mode):
+        return False
+    if i == 0:
+        return True
+    if combinator == ">":
+        return element.parent is not None and _matches(element.parent, parts, mode, i - 1)
+    if combinator == " ":
+        return _matches_self_or_ancestor(element.parent, parts, mode, i - 1)
+    siblings = element.parent.children if element.parent is not None else []
+    if combinator == "+":
+        return element.index > 0 and _matches(siblings[element.index - 1], parts, mode, i - 1)
+    return any(_matches(s, parts, mode, i - 1) for s in siblings[:element.index])
+
+
+def selector_matches(page: PageDOM, selector: str, mode: _MatchMode, above_fold: bool = False) -> bool:
+    """Whether any element of ``page`` (or only of its first screen) matches ``selector``."""
+    try:
+        parts = parse_selector(selector)
+    except ValueError:
+        return mode.assume
+    for element in page.candidates(parts[-1][1], mode):
+        if above_fold and element.order >= page.fold_limit:
+            # Candidate lists are in document order
+            break
+        if _matches(element, parts, mode):
+            return True
+    return False
+
+
+def script_names(scripts: Iterable[str]) -> FrozenSet[str]:
+    """Every identifier-like word inside the string literals of ``scripts``."""
+    names: Set[str] = set()
+    for script in scripts:
+        for literal in _SCRIPT_STRING_RE.findall(script):
+            names.update(re.findall(r"-?[A-Za-z_][\w-]*", literal))
+    return frozenset(names)
+
+
+def script_tags(scripts: Iterable[str]) -> FrozenSet[str]:
+    """Tags ``scripts`` create with createElement() or write in markup strings ('<button ...>')."""
+    tags: Set[str] = set()
+    for script in scripts:
+        tags.update(_CREATE_ELEMENT_RE.findall(script))
+        for literal in _SCRIPT_STRING_RE.findall(script):
+            tags.update(_MARKUP_TAG_RE.findall(literal))
+    return frozenset(tag.lower() for tag in tags)
+
+
+def _filter_rules(rules: List[CSSRule], keep: Callable[[str], bool]) -> List[CSSRule]:
+    """Style rules reduced to the selectors ``keep`` accepts; emptied groups are dropped."""
+    kept = []
+    for rule in rules:
+        if rule.kind == "style":
+            selectors = rule.selectors
+            used = [s for s in selectors if keep(s)]
+            if len(used) == len(selectors):
+                kept.append(rule)
+            elif used:
+                kept.append(replace(rule, prelude=", ".join(used)))
+        elif rule.kind == "group":
+            children = _filter_rules(rule.rules, keep)
+            if children:
+                kept.append(replace(rule, rules=children))
+        else:
+            kept.append(rule)
+    return kept
+
+
+def _style_bodies(rules: Iterable[CSSRule]) -> Iterable[str]:
+    for rule in rules:
+        if rule.kind == "style":
+            yield rule.body or ""
+        elif rule.kind == "group":
+            yield from _style_bodies(rule.rules)
+
+
+def _is_referenced(rule: CSSRule, declarations: str) -> bool:
+    """Whether an @font-face or @keyframes rule is used by ``declarations``."""
+    if rule.at_keyword == "@font-face":
+        family = _FONT_FAMILY_RE.search(rule.body or "")
+        names = [family.group(1).strip().strip("\"'")] if family else []
+    else:
+        names = rule.prelude.split()[1:2]
+    return not names or any(
+        re.search(rf"(?<![\w-])['\"]?{re.escape(name)}['\"]?(?![\w-])", declarations, re.IGNORECASE)
+        for name in names
+    )
+
+
+def _drop_unreferenced(rules: List[CSSRule], declarations: str) -> List[CSSRule]:
+    kept = []
+    for rule in rules:
+        if rule.kind == "group":
+            rule = replace(rule, rules=_drop_unreferenced(rule.rules, declarations))
+            if not rule.rules:
+                continue
+        elif rule.kind == "at" and rule.at_keyword.endswith(("@font-face", "keyframes")):
+            if not _is_referenced(rule, declarations):
+                continue
+        kept.append(rule)
+    return kept
+
+
+def _rebase_urls(css: str, from_rel: str, to_rel: str) -> str:
+    """Rewrite relative url() references of a stylesheet at ``from_rel`` for a document at ``to_rel``."""
+    def rebase(match):
+        prefix, quote, ref, close = match.groups()
+        resolved = _resolve(ref, from_rel)
+        if not resolved or ref.strip().startswith("/"):
+            return match.group(0)
+        target, suffix = resolved
+        new_ref = posixpath.relpath(target, posixpath.dirname(to_rel) or ".")
+        return f"{prefix}{quote}{new_ref}{suffix}{quote}{close}"
+    return _CSS_URL_RE.sub(rebase, css)
+
+
+def _tag_attributes(tag: str) -> Dict[str, str]:
+    inner = tag[len("<link"):].rstrip(">").rstrip("/")
+    return {
+        m.group(1).lower(): next((v for v in m.groups()[1:] if v is not None), "")
+        for m in _TAG_ATTR_RE.finditer(inner)
+    }
+
+
+def _blocking_links(html: str, page_rel: str, stylesheets: Dict[str, "Stylesheet"]) -> List[Tuple[re.Match, str]]:
+    """Render-blocking ``<link rel=stylesheet>`` tags of the page that load one of ``stylesheets``."""
+    skipped = [m.span() for m in _SKIPPED_BLOCKS_RE.finditer(html)]
+    links = []
+    for match in _LINK_RE.finditer(html):
+        if any(start <= match.start() < end for start, end in skipped):
+            continue
+        attrs = _tag_attributes(match.group(0))
+        rel = attrs.get("rel", "").lower().split()
+        media = attrs.get("media", "all").lower()
+        if "stylesheet" not in rel or "alternate" in rel or media not in ("all", "screen", ""):
+            continue
+        resolved = _resolve(attrs.get("href", ""), page_rel)
+        if resolved and resolved[0] in stylesheets:
+            links.append((match, resolved[0]))
+    return links
+
+
+def _async_link(tag: str) -> str:
+    """The link as a print stylesheet switched to all media once loaded, with a no-script fallback."""
+    closing = "/>" if tag.endswith("/>") else ">"
+    loading = _MEDIA_ATTR_RE.sub("", tag[:-len(closing)]).rstrip()
+    return f'{loading} media="print" onload="{ASYNC_ONLOAD}"{closing}<noscript>{tag}</noscript>'
+
+
+class Stylesheet:
+    """A stylesheet of the site, parsed, with its purged rules."""
+
+    def __init__(self, rel_path: str, text: str):
+        self.rel_path = rel_path
+        self.original_bytes = len(text.encode("utf-8"))
+        self.rules = parse_css(text)
+        self.kept = self.rules
+        self.imports: List[str] = []
+        for rule in self.rules:
+            if rule.at_keyword == "@import":
+                match = _CSS_IMPORT_RE.search(rule.prelude) or _CSS_URL_RE.search(rule.prelude)
+                resolved = _resolve(match.group(3), rel_path) if match else None
+                if resolved:
+                    self.imports.append(resolved[0])
+
+    def imported(self, stylesheets: Dict[str, "Stylesheet"], seen: Optional[Set[str]] = None) -> List["Stylesheet"]:
+        """This stylesheet after the ones it imports, depth first, each once."""
+        seen = set() if seen is None else seen
+        seen.add(self.rel_path)
+        ordered = []
+        for rel in self.imports:
+            if rel in stylesheets and rel not in seen:
+                ordered += stylesheets[rel].imported(stylesheets, seen)
+        return ordered + [self]
+
+
+class StylesheetResult(BaseModel):
+    path: str
+    original_bytes: int
+    purged_bytes: int
+    rules: int
+    removed_selectors: int
+
+
+class PageCSSResult(BaseModel):
+    path: str
+    critical_bytes: int = 0
+    # The critical CSS was cut at critical_max_kb
+    truncated: bool = False
+    blocking_before: int = 0
+    blocking_after: int = 0
+    # Bytes of local render-blocking stylesheets (imports included)
+    blocking_css_before: int = 0
+    blocking_css_after: int = 0
+
+
+class CSSReport(BaseModel):
+    site_dir: str
+    stylesheets: List[StylesheetResult] = Field(default_factory=list)
+    pages: List[PageCSSResult] = Field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def original_bytes(self) -> int:
+        return sum(s.original_bytes for s in self.stylesheets)
+
+    @property
+    def purged_bytes(self) -> int:
+        return sum(s.purged_bytes for s in self.stylesheets)
+
+    @property
+    def blocking_before(self) -> int:
+        return sum(p.blocking_before for p in self.pages)
+
+    @property
+    def blocking_after(self) -> int:
+        return sum(p.blocking_after for p in self.pages)
+
+    def markdown(self) -> str:
+        """Stylesheet savings and per-page critical CSS as a markdown section for report.md."""
+        lines = [
+            f"Optimized {len(self.stylesheets)} stylesheets for {len(self.pages)} pages of "
+            f"`{self.site_dir}` in {self.duration:.2f} seconds.",
+            "",
+            "| Stylesheet | Rules | Selectors removed | Before | After | Saved |",
+            "| --- | ---: | ---: | ---: | ---: | ---: |",
+        ]
+        for s in self.stylesheets:
+            lines.append(
+                f"| {s.path} | {s.rules} | {s.removed_selectors} | {s.original_bytes:,} B | "
+                f"{s.purged_bytes:,} B | {_saving(s.original_bytes, s.purged_bytes)} |"
+            )
+        lines += [
+            "",
+            "| Page | Critical CSS inlined | Render-blocking requests | Render-blocking CSS |",
+            "| --- | ---: | ---: | ---: |",
+        ]
+        for p in self.pages:
+            critical = f"{p.critical_bytes:,} B{' (truncated)' if p.truncated else ''}"
+            lines.append(
+                f"| {p.path} | {critical} | {p.blocking_before} -> {p.blocking_after} | "
+                f"{p.blocking_css_before:,} B -> {p.blocking_css_after:,} B |"
+            )
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        inlined = [p.critical_bytes for p in self.pages if p.critical_bytes]
+        average = sum(inlined) / len(inlined) / 1024 if inlined else 0.0
+        return (
+            f"CSS: {self.original_bytes:,} B -> {self.purged_bytes:,} B after purging unused rules "
+            f"({_saving(self.original_bytes, self.purged_bytes)} saved), critical CSS inlined on "
+            f"{len(inlined)}/{len(self.pages)} pages (avg {average:.1f} KB), render-blocking requests "
+            f"{self.blocking_before} -> {self.blocking_after}"
+        )
+
+
+def _blocking_requests(html: str) -> int:
+    resources = extract_metrics(html, collect_resources=True).resources
+    return sum(1 for kind, _, blocking in resources if blocking and kind in ("stylesheet", "script"))
+
+
+def optimize_css(site_dir: Path, settings: Optional[CSSSettings] = None) -> CSSReport:
+    """
+    Purge unused CSS from the site in ``site_dir`` and inline each page's
+    critical CSS, in place.
+
+    Every stylesheet is parsed and each selector matched against the DOM
+    of every HTML page; selectors no page matches are removed, then
+    @font-face and @keyframes rules nothing refers to. User-action states
+    (:hover, :focus) count as matching, and so do class, id and attribute
+    names that appear in the string literals of the site's scripts, which
+    may add them later, and elements of the tags the scripts create. Per page, the rules matching its first
+    ``above_fold_elements`` body elements are inlined in a ``<style>`` in
+    ``<head>`` and its stylesheet links load without blocking rendering.
+    """
+    settings = settings or CSSSettings()
+    site_dir = Path(site_dir)
+    started = time.perf_counter()
+    rel_paths = sorted(
+        p.relative_to(site_dir).as_posix()
+        for p in site_dir.rglob("*")
+        if p.is_file() and not p.name.startswith(".") and p.suffix != ".gz"
+    )
+    html_paths = [r for r in rel_paths if posixpath.splitext(r)[1].lower() in HTML_EXTENSIONS]
+    stylesheets = {
+        rel: Stylesheet(rel, (site_dir / rel).read_text(errors="replace"))
+        for rel in rel_paths if rel.lower().endswith(".css")
+    }
+    documents = {rel: (site_dir / rel).read_text(errors="replace") for rel in html_paths}
+    pages = [PageDOM(rel, html, settings.above_fold_elements) for rel, html in documents.items()]
+    report = CSSReport(site_dir=str(site_dir))
+
+    inline_css = "\n".join(style for page in pages for style in page.styles)
+    if settings.purge and pages:
+        scripts = [page_script for page in pages for page_script in page.scripts]
+        if settings.scan_scripts:
+            scripts += [(site_dir / r).read_text(errors="replace") for r in rel_paths if r.endswith((".js", ".mjs"))]
+        mode = _MatchMode(assume=True)
+        if settings.scan_scripts:
+            mode = _MatchMode(assume=True, dynamic=script_names(scripts), created=script_tags(scripts))
+        safelist = [re.compile(pattern) for pattern in settings.safelist]
+        used: Dict[str, bool] = {}
+
+        def keep(selector: str) -> bool:
+            if selector not in used:
+                used[selector] = any(p.search(selector) for p in safelist) or any(
+                    selector_matches(page, selector, mode) for page in pages
+                )
+            return used[selector]
+
+        for sheet in stylesheets.values():
+            sheet.kept = _filter_rules(sheet.rules, keep)
+        declarations = inline_css + "\n".join(
+            body for sheet in stylesheets.values() for body in _style_bodies(sheet.kept)
+        )
+        for sheet in stylesheets.values():
+            sheet.kept = _drop_unreferenced(sheet.kept, declarations)
+
+    for rel, sheet in stylesheets.items():
+        before, after = list(_flatten(sheet.rules)), list(_flatten(sheet.kept))
+        removed = sum(len(r.selectors) for r in before) - sum(len(r.selectors) for r in after)
+        purged_bytes = sheet.original_bytes
+        # Untouched stylesheets keep their comments and formatting
+        if removed or len(after) < len(before):
+            purged = render_css(sheet.kept) + "\n"
+            (site_dir / rel).write_text(purged)
+            purged_bytes = len(purged.encode("utf-8"))
+        report.stylesheets.append(StylesheetResult(
+            path=rel,
+            original_bytes=sheet.original_bytes,
+            purged_bytes=purged_bytes,
+            rules=sum(1 for r in after if r.kind == "style"),
+            removed_selectors=removed,
+        ))
+    sizes = {s.path: s.purged_bytes for s in report.stylesheets}
+    original_sizes = {s.path: s.original_bytes for s in report.stylesheets}
+
+    critical_mode = _MatchMode(assume=False, flip=False)
+    for page in pages:
+        html = documents[page.rel_path]
+        result = PageCSSResult(path=page.rel_path, blocking_before=_blocking_requests(html))
+        links = _blocking_links(html, page.rel_path, stylesheets)
+        loaded = _dedupe_sheets(stylesheets[rel].imported(stylesheets) for _, rel in links)
+        result.blocking_css_before = sum(original_sizes[s.rel_path] for s in loaded)
+        if settings.critical and links and not _CRITICAL_STYLE_RE.search(html):
+            critical, result.truncated = _critical_css(page, loaded, critical_mode, settings)
+            result.critical_bytes = len(critical.encode("utf-8"))
+            first, _ = links[0]
+            out = [html[:first.start()], f"<style data-critical>\n{critical}\n</style>\n"]
+            last = first.start()
+            for match, _ in links:
+                out += [html[last:match.start()], _async_link(match.group(0))]
+                last = match.end()
+            html = "".join(out + [html[last:]])
+            (site_dir / page.rel_path).write_text(html)
+            loaded = []
+        result.blocking_css_after = sum(sizes[s.rel_path] for s in loaded)
+        result.blocking_after = _blocking_requests(html)
+        report.pages.append(result)
+
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def _flatten(rules: Iterable[CSSRule]) -> Iterable[CSSRule]:
+    for rule in rules:
+        yield rule
+        yield from _flatten(rule.rules)
+
+
+def _dedupe_sheets(groups: Iterable[List[Stylesheet]]) -> List[Stylesheet]:
+    seen: Dict[str, Stylesheet] = {}
+    for group in groups:
+        for sheet in group:
+            seen.setdefault(sheet.rel_path, sheet)
+    return list(seen.values())
+
+
+def _critical_css(
+    page: PageDOM, sheets: List[Stylesheet], mode: _MatchMode, settings: CSSSettings
+) -> Tuple[str, bool]:
+    """The rules of ``sheets`` that apply to the page's first screen, within critical_max_kb."""
+    matched: Dict[str, bool] = {}
+
+    def above_fold(selector: str) -> bool:
+        if selector not in matched:
+            matched[selector] = selector_matches(page, selector, mode, above_fold=True)
+        return matched[selector]
+
+    chosen: List[Tuple[Stylesheet, List[CSSRule]]] = []
+    for sheet in sheets:
+        rules = [
+            r for r in _filter_rules(sheet.kept, above_fold)
+            if r.kind != "at" or r.at_keyword.endswith(("@font-face", "keyframes"))
+        ]
+        chosen.append((sheet, rules))
+    declarations = "\n".join(body for _, rules in chosen for body in _style_bodies(rules))
+
+    budget = int(settings.critical_max_kb * 1024)
+    parts: List[str] = []
+    size = 0
+    for sheet, rules in chosen:
+        for rule in _drop_unreferenced(rules, declarations):
+            text = _rebase_urls(render_css([rule]), sheet.rel_path, page.rel_path).replace("</", "<\\/")
+            size += len(text.encode("utf-8")) + 1
+            if size > budget:
+                return "\n".join(parts), True
+            parts.append(text)
+    return "\n".join(parts), False
@@ -0,0 +1,292 @@
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlsplit
+
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+# Caps that keep a result small no matter how large the page is
+MAX_TEXT_CHARS = 200
+MAX_META_TAGS = 64
+MAX_OUTLINE = 200
+# Visible text kept per page with collect_text
+MAX_BODY_TEXT_CHARS = 100_000
+
+_SKIPPED_SCHEMES = ("mailto:", "tel:", "javascript:", "data:")
+
+
+@dataclass(slots=True)
+class PageMetrics:
+    """Compact summary of one HTML document; text fields are truncated."""
+    title: Optional[str] = None
+    lang: Optional[str] = None
+    canonical: Optional[str] = None
+    meta: Dict[str, str] = field(default_factory=dict)
+    heading_counts: List[int] = field(default_factory=lambda: [0] * 6)
+    outline: List[Tuple[int, str]] = field(default_factory=list)
+    images: int = 0
+    images_missing_alt: int = 0
+    images_missing_dimensions: int = 0
+    images_lazy: int = 0
+    internal_links: int = 0
+    external_links: int = 0
+    nofollow_links: int = 0
+    scripts_external: int = 0
+    scripts_async: int = 0
+    scripts_defer: int = 0
+    scripts_blocking: int = 0
+    scripts_inline: int = 0
+    stylesheets: int = 0
+    inline_script_bytes: int = 0
+    inline_style_bytes: int = 0
+    html_bytes: int = 0
+    page_links: List[str] = field(default_factory=list)
+    resources: List[Tuple[str, str, bool]] = field(default_factory=list)
+    text: str = ""
+
+    @property
+    def meta_description(self) -> Optional[str]:
+        return self.meta.get("description")
+
+    @property
+    def headings(self) -> int:
+        return sum(self.heading_counts)
+
+    @property
+    def links(self) -> int:
+        return self.internal_links + self.external_links
+
+
+def _absolute(base_url: str, href: str) -> Optional[str]:
+    """``href`` resolved against ``base_url``; None when it isn't a valid URL ("http://[oops/")."""
+    try:
+        url = urljoin(base_url, href)
+        urlsplit(url)
+    except ValueError:
+        return None
+    return url
+
+
+class MetricsExtractor(HTMLParser):
+    """
+    Single-pass HTML metrics extractor driven by parser events.
+
+    No tree is built: each tag updates counters as it is seen, and only the
+    title, meta tags and heading outline keep (truncated) text. Feed the
+    document in chunks of any size and call ``close()`` to get the result.
+    With ``collect_links`` the absolute URLs of same-origin ``<a href>``
+    targets are kept for crawling; with ``collect_resources`` every
+    subresource is recorded as ``(kind, absolute url, render_blocking)``;
+    with ``collect_text`` the visible text (outside scripts, styles and the
+    title) is kept, up to ``MAX_BODY_TEXT_CHARS``. Markup HTMLParser gives
+    up on (an unknown ``<![foo`` section) ends the parsed part of the page.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        collect_links: bool = False,
+        collect_resources: bool = False,
+        collect_text: bool = False,
+    ):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.collect_links = collect_links
+        self.collect_resources = collect_resources
+        self.collect_text = collect_text
+        self._body_text: List[str] = []
+        self._body_len = 0
+        self.metrics = PageMetrics()
+        self._origin = urlsplit(base_url).netloc.lower()
+        self._text_target: Optional[str] = None
+        self._text: List[str] = []
+        self._text_len = 0
+        self._heading_level = 0
+        self._raw_tag: Optional[str] = None
+        self._noscript = 0
+        self._broken = False
+
+    def feed(self, data: str) -> None:
+        self.metrics.html_bytes += len(data.encode("utf-8"))
+        if self._broken:
+            return
+        try:
+            super().feed(data)
+        except AssertionError:
+            self._give_up()
+
+    def close(self) -> PageMetrics:
+        if not self._broken:
+            try:
+                super().close()
+            except AssertionError:
+                self._give_up()
+        self._finish_text()
+        if self._body_text:
+            # Chunks break at tags, so block elements don't run words together
+            self.metrics.text = " ".join(" ".join(self._body_text).split())
+            self._body_text = []
+        return self.metrics
+
+    def _give_up(self) -> None:
+        self._broken = True
+        self.rawdata = ""
+
+    def handle_starttag(self, tag, attrs):
+        m = self.metrics
+        if tag == "a":
+            self._handle_link(attrs)
+        elif tag == "img":
+            attrs = dict(attrs)
+            m.images += 1
+            if not (attrs.get("alt") or "").strip():
+                m.images_missing_alt += 1
+            if not (attrs.get("width") and attrs.get("height")):
+                m.images_missing_dimensions += 1
+            if attrs.get("loading") == "lazy":
+                m.images_lazy += 1
+            self._add_resource("image", attrs.get("src"), False)
+        elif tag in HEADING_TAGS:
+            self._finish_text()
+            self._heading_level = HEADING_TAGS[tag]
+            m.heading_counts[self._heading_level - 1] += 1
+            self._start_text("heading")
+        elif tag == "script":
+            attrs = dict(attrs)
+            self._raw_tag = "script"
+            if attrs.get("src"):
+                m.scripts_external += 1
+                if "async" in attrs:
+                    m.scripts_async += 1
+                elif "defer" in attrs or attrs.get("type") == "module":
+                    m.scripts_defer += 1
+                else:
+                    m.scripts_blocking += 1
+                blocking = not ("async" in attrs or "defer" in attrs or attrs.get("type") == "module")
+                self._add_resource("script", attrs["src"], blocking)
+            else:
+                m.scripts_inline += 1
+        elif tag == "style":
+            self._raw_tag = "style"
+        elif tag == "link":
+            attrs = dict(attrs)
+            rel = (attrs.get("rel") or "").lower().split()
+            if "stylesheet" in rel:
+                m.stylesheets += 1
+                # Print-only or alternate stylesheets don't hold up first paint
+                media = (attrs.get("media") or "all").lower()
+                blocking = "alternate" not in rel and media in ("all", "screen", "")
+                self._add_resource("stylesheet", attrs.get("href"), blocking)
+            elif "preload" in rel or "modulepreload" in rel:
+                kind = {"style": "stylesheet", "font": "font", "image": "image"}.get(attrs.get("as"), "script")
+                self._add_resource(kind, attrs.get("href"), False)
+            elif "icon" in rel:
+                self._add_resource("image", attrs.get("href"), False)
+            elif "canonical" in rel and attrs.get("href"):
+                m.canonical = attrs["href"]
+        elif tag == "meta":
+            attrs = dict(attrs)
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name and len(m.meta) < MAX_META_TAGS:
+                m.meta[name] = (attrs.get("content") or "")[:MAX_TEXT_CHARS]
+        elif tag == "title" and m.title is None:
+            self._start_text("title")
+        elif tag == "noscript":
+            self._noscript += 1
+        elif tag == "html":
+            m.lang = dict(attrs).get("lang")
+        elif tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = _absolute(self.base_url, href) or self.base_url
+
+    def handle_endtag(self, tag):
+        if tag == self._raw_tag:
+            self._raw_tag = None
+        elif tag == "noscript" and self._noscript:
+            self._noscript -= 1
+        elif tag == "title" and self._text_target == "title":
+            self._finish_text()
+        elif tag in HEADING_TAGS and self._text_target == "heading":
+            self._finish_text()
+
+    def handle_data(self, data):
+        if self._raw_tag == "script":
+            self.metrics.inline_script_bytes += len(data.encode("utf-8"))
+        elif self._raw_tag == "style":
+            self.metrics.inline_style_bytes += len(data.encode("utf-8"))
+        else:
+            if self._text_target and self._text_len < MAX_TEXT_CHARS:
+                chunk = data[: MAX_TEXT_CHARS - self._text_len]
+                self._text.append(chunk)
+                self._text_len += len(chunk)
+            if self.collect_text and self._text_target != "title" and self._body_len < MAX_BODY_TEXT_CHARS:
+                chunk = data[: MAX_BODY_TEXT_CHARS - self._body_len]
+                self._body_text.append(chunk)
+                self._body_len += len(chunk)
+
+    def _handle_link(self, attrs):
+        m = self.metrics
+        attrs = dict(attrs)
+        href = (attrs.get("href") or "").strip()
+        if not href or href.lower().startswith(_SKIPPED_SCHEMES):
+            return
+        url = _absolute(self.base_url, href)
+        if url is None:
+            return
+        if "nofollow" in (attrs.get("rel") or "").lower().split():
+            m.nofollow_links += 1
+        if "//" in href[:8]:
+            # Absolute or protocol-relative: compare hosts
+            internal = urlsplit(url).netloc.lower() == self._origin
+        else:
+            internal = True
+        if internal:
+            m.internal_links += 1
+            if self.collect_links and not href.startswith("#"):
+                m.page_links.append(url)
+        else:
+            m.external_links += 1
+
+    def _add_resource(self, kind: str, href: Optional[str], blocking: bool):
+        # A browser running scripts doesn't load what is inside <noscript>
+        if self.collect_resources and href and not href.startswith("data:") and not self._noscript:
+            url = _absolute(self.base_url, href.strip())
+            if url is not None:
+                self.metrics.resources.append((kind, url, blocking))
+
+    def _start_text(self, target: str):
+        self._text_target = target
+        self._text = []
+        self._text_len = 0
+
+    def _finish_text(self):
+        if self._text_target is None:
+            return
+        text = " ".join("".join(self._text).split())
+        if self._text_target == "title":
+            self.metrics.title = text or None
+        elif len(self.metrics.outline) < MAX_OUTLINE:
+            self.metrics.outline.append((self._heading_level, text))
+        self._text_target = None
+        self._text = []
+        self._text_len = 0
+
+
+def extract_metrics(
+    html: Union[str, Iterable[str]],
+    base_url: str = "",
+    collect_links: bool = False,
+    collect_resources: bool = False,
+    collect_text: bool = False,
+) -> PageMetrics:
+    """Extract PageMetrics from a whole document or an iterable of text chunks."""
+    extractor = MetricsExtractor(
+        base_url, collect_links=collect_links, collect_resources=collect_resources, collect_text=collect_text
+    )
+    if isinstance(html, str):
+        extractor.feed(html)
+    else:
+        for chunk in html:
+            extractor.feed(chunk)
+    return extractor.close()
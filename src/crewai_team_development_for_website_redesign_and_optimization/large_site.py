@@ -0,0 +1,290 @@
+import heapq
+import json
+import time
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .crawler import CrawlResult, PageResult, SiteCrawler, normalize_url
+from .load_test import LatencyHistogram
+from .settings import OUTPUT_DIR, CrawlSettings
+from .site_index import SiteSnapshotIndex
+
+RECORDS_FORMAT = "page-records/1"
+
+
+@dataclass(slots=True)
+class PageRecord:
+    """The per-page metrics of a large-site crawl; no text, links or model overhead."""
+    url: str
+    depth: int
+    status: Optional[int]
+    elapsed: float
+    bytes: int
+    title: Optional[str]
+    has_meta_description: bool
+    h1: int
+    headings: int
+    images: int
+    images_missing_alt: int
+    images_missing_dimensions: int
+    links: int
+    nofollow_links: int
+    scripts_blocking: int
+    stylesheets: int
+    inline_bytes: int
+    error: Optional[str]
+    change: Optional[str]
+    changes: Optional[str]
+
+    @classmethod
+    def from_page(cls, page: PageResult) -> "PageRecord":
+        return cls(
+            page.url, page.depth, page.status, round(page.elapsed, 4), page.bytes, page.title,
+            bool(page.meta_description), page.h1, page.headings, page.images, page.images_missing_alt,
+            page.images_missing_dimensions, page.links, page.nofollow_links, page.scripts_blocking,
+            page.stylesheets, page.inline_bytes, page.error, page.change, "; ".join(page.changes) or None,
+        )
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+RECORD_FIELDS = [f.name for f in fields(PageRecord)]
+
+
+class PageRecordWriter:
+    """
+    Page records appended to a JSONL file: a header line naming the
+    fields, then one JSON array per page in that order.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._file: IO[str] = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"format": RECORDS_FORMAT, "fields": RECORD_FIELDS}) + "\n")
+
+    def write(self, record: PageRecord) -> None:
+        self._file.write(json.dumps(astuple(record), separators=(",", ":")) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "PageRecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_records(path: Path) -> Iterator[PageRecord]:
+    """Stream the records of a file written by PageRecordWriter."""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != RECORDS_FORMAT:
+            raise ValueError(f"{path} is not a page record file")
+        names = header["fields"]
+        for line in f:
+            values = dict(zip(names, json.loads(line)))
+            yield PageRecord(**{name: values.get(name) for name in RECORD_FIELDS})
+
+
+def _keep_worst(heap: List[Tuple[float, str]], size: int, value: float, url: str) -> None:
+    """Keep the ``size`` largest values seen so far in a min-heap."""
+    if len(heap) < size:
+        heapq.heappush(heap, (value, url))
+    elif value > heap[0][0]:
+        heapq.heapreplace(heap, (value, url))
+
+
+class SiteAggregate:
+    """
+    Site-level crawl metrics updated one page record at a time.
+
+    Only counters, sums, a log-bucketed response-time histogram, heaps of
+    the ``worst`` slowest and largest pages and the first ``max_rows`` rows
+    of each listing are kept, so memory is the same for 50 pages or 50,000.
+    """
+
+    def __init__(self, max_rows: int = 50, worst: int = 5):
+        self.max_rows = max_rows
+        self.worst = worst
+        self.pages = 0
+        self.ok = 0
+        self.failed = 0
+        self.times = LatencyHistogram()
+        self.html_bytes = 0
+        self.no_title = 0
+        self.no_meta_description = 0
+        self.no_headings = 0
+        self.not_one_h1 = 0
+        self.images = 0
+        self.images_missing_alt = 0
+        self.images_missing_dimensions = 0
+        self.nofollow_links = 0
+        self.scripts_blocking = 0
+        self.stylesheets = 0
+        self.inline_bytes = 0
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.slowest: List[Tuple[float, str]] = []
+        self.largest: List[Tuple[float, str]] = []
+        self.failed_rows: List[PageRecord] = []
+        self.rows: List[PageRecord] = []
+        # After an earlier crawl, only new and changed pages get a row
+        self.delta_rows: List[PageRecord] = []
+        self.delta_pages = 0
+        self.changed_pages: List[PageRecord] = []
+        self.new_urls: List[str] = []
+
+    def add(self, record: PageRecord) -> None:
+        self.pages += 1
+        if record.change == "new":
+            self.new += 1
+            if len(self.new_urls) < self.max_rows:
+                self.new_urls.append(record.url)
+        elif record.change == "changed":
+            self.changed += 1
+            if len(self.changed_pages) < self.max_rows:
+                self.changed_pages.append(record)
+        elif record.change == "unchanged":
+            self.unchanged += 1
+        if not record.ok:
+            self.failed += 1
+            if len(self.failed_rows) < self.max_rows:
+                self.failed_rows.append(record)
+            return
+        self.ok += 1
+        self.times.record(record.elapsed)
+        self.html_bytes += record.bytes
+        self.no_title += not record.title
+        self.no_meta_description += not record.has_meta_description
+        self.no_headings += not record.headings
+        self.not_one_h1 += record.h1 != 1
+        self.images += record.images
+        self.images_missing_alt += record.images_missing_alt
+        self.images_missing_dimensions += record.images_missing_dimensions
+        self.nofollow_links += record.nofollow_links
+        self.scripts_blocking += record.scripts_blocking
+        self.stylesheets += record.stylesheets
+        self.inline_bytes += record.inline_bytes
+        _keep_worst(self.slowest, self.worst, record.elapsed, record.url)
+        _keep_worst(self.largest, self.worst, record.bytes, record.url)
+        if len(self.rows) < self.max_rows:
+            self.rows.append(record)
+        if record.change != "unchanged":
+            self.delta_pages += 1
+            if len(self.delta_rows) < self.max_rows:
+                self.delta_rows.append(record)
+
+    def _average(self, total: int) -> float:
+        return total / self.ok if self.ok else 0.0
+
+    def summary(self, result: CrawlResult, records_path: Optional[Path] = None) -> str:
+        """The crawl as a plain-text report, like CrawlResult.summary, from the aggregates alone."""
+        max_rows = self.max_rows
+        lines = [
+            f"Website Analysis for {result.start_url} (large-site mode):",
+            f"Crawled {self.pages} pages ({self.failed} failed) in {result.duration:.2f} seconds",
+            f"Sitemap URLs seeded: {result.sitemap_urls}, URLs blocked by robots.txt: {result.robots_blocked}",
+        ]
+        if records_path is not None:
+            lines.append(f"Per-page records (JSONL, one array per page after a header line): {records_path}")
+        if result.previous_crawl is not None:
+            since = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.previous_crawl))
+            lines.append(
+                f"Changes since the last crawl ({since}): {self.new} new, {self.changed} changed, "
+                f"{len(result.removed)} removed, {self.unchanged} unchanged "
+                f"({result.skipped} skipped by sitemap lastmod, {result.not_modified} answered 304 Not Modified)"
+            )
+            changed = self.changed_pages
+            new = self.new_urls[: max(0, max_rows - len(changed))]
+            lines += [f"- changed {r.url}: {r.changes}" for r in changed]
+            lines += [f"- new {url}" for url in new]
+            lines += [f"- removed {url}" for url in result.removed[: max(0, max_rows - len(changed) - len(new))]]
+            shown = self.new + self.changed + len(result.removed)
+            if shown > max_rows:
+                lines.append(f"... {shown - max_rows} more changes not shown")
+        times = self.times
+        if times.total:
+            lines += [
+                "Performance:",
+                f"- Response time avg {times.mean:.2f}s, p50 {times.percentile(50):.2f}s, "
+                f"p90 {times.percentile(90):.2f}s, p99 {times.percentile(99):.2f}s, max {times.max_seconds:.2f}s",
+                f"- Total HTML transferred: {self.html_bytes / 1024:.1f} KB",
+            ]
+        lines += [
+            "SEO and structure:",
+            f"- Pages without a title: {self.no_title}",
+            f"- Pages without a meta description: {self.no_meta_description}",
+            f"- Pages without headings: {self.no_headings}",
+            f"- Pages without exactly one h1: {self.not_one_h1}",
+            f"- Images without alt text: {self.images_missing_alt} of {self.images}",
+            f"- Images without width/height: {self.images_missing_dimensions}",
+            f"- Nofollow links: {self.nofollow_links}",
+            "Render blocking:",
+            f"- Render-blocking scripts per page: {self._average(self.scripts_blocking):.1f}",
+            f"- Stylesheets per page: {self._average(self.stylesheets):.1f}",
+            f"- Inline script/style per page: {self._average(self.inline_bytes) / 1024:.1f} KB",
+        ]
+        if self.slowest:
+            lines.append("Slowest pages:")
+            lines += [f"- {url} ({elapsed:.2f}s)" for elapsed, url in sorted(self.slowest, reverse=True)]
+        if self.largest:
+            lines.append("Largest pages:")
+            lines += [f"- {url} ({size / 1024:.1f} KB)" for size, url in sorted(self.largest, reverse=True)]
+        if self.failed_rows:
+            lines.append("Failed pages:")
+            lines += [f"- {r.url}: {r.error or r.status}" for r in self.failed_rows]
+        rows, total = (self.rows, self.ok) if result.previous_crawl is None else (self.delta_rows, self.delta_pages)
+        if rows or result.previous_crawl is None:
+            lines.append("Per-page metrics (url | status | seconds | KB | headings | images | links | title):")
+        for r in rows:
+            lines.append(
+                f"- {r.url} | {r.status} | {r.elapsed:.2f} | {r.bytes / 1024:.1f} | "
+                f"{r.headings} | {r.images} | {r.links} | {r.title or 'No title found'}"
+            )
+        if total > len(rows):
+            where = f" (all of them are in {records_path})" if records_path is not None else ""
+            lines.append(f"... {total - len(rows)} more pages not shown{where}")
+        return "\n".join(lines)
+
+
+def records_path_for(start_url: str, settings: CrawlSettings) -> Path:
+    """Where the page records of a large-site crawl of ``start_url`` go."""
+    url = normalize_url(start_url if "://" in start_url else "https://" + start_url)
+    host = urlsplit(url).netloc.replace(":", "_") or "site"
+    return Path(settings.records_dir or OUTPUT_DIR / "crawls") / f"{host}.jsonl"
+
+
+async def analyze_large_site(
+    start_url: str,
+    settings: Optional[CrawlSettings] = None,
+    index: Optional[SiteSnapshotIndex] = None,
+    records_path: Optional[Path] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Tuple[CrawlResult, SiteAggregate, Path]:
+    """
+    Crawl ``start_url`` as a pipeline: each page is fetched and parsed by
+    the crawler, reduced to a PageRecord, added to the site aggregates and
+    written to the record file, then dropped. Returns the crawl counters,
+    the aggregates and the record file.
+    """
+    settings = settings or CrawlSettings()
+    records_path = Path(records_path or records_path_for(start_url, settings))
+    crawler = SiteCrawler(settings, index, transport=transport)
+    aggregate = SiteAggregate()
+    with PageRecordWriter(records_path) as writer:
+        async for page in crawler.iter_pages(start_url):
+            record = PageRecord.from_page(page)
+            aggregate.add(record)
+            writer.write(record)
+    return crawler.result, aggregate, records_path
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+
+from .settings import LLMCacheSettings, cache_dir
+from .tracing import record_cache_lookup
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Content-addressed LLM response cache stored in SQLite.
+
+    Entries are keyed by a SHA-256 of langchain's ``llm_string`` (model,
+    temperature, bound tools and stop words) and the serialized messages, so
+    any change to a prompt or model setting is a miss. Old entries expire
+    after ``max_age_seconds`` and the least recently used ones are evicted
+    once the stored payloads exceed ``max_bytes``. With ``bypass`` set every
+    lookup misses but fresh responses are still written back.
+    """
+
+    EVICT_EVERY = 32
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_seconds: float = 30 * 86400,
+        bypass: bool = False,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Several crews (threads or processes) may share one cache file
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.bypass:
+            self.misses += 1
+            record_cache_lookup("llm", False)
+            return None
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                record_cache_lookup("llm", False)
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        self.hits += 1
+        record_cache_lookup("llm", True)
+        return [loads(generation) for generation in loads(zlib.decompress(row[0]).decode("utf-8"))]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        value = zlib.compress(dumps([dumps(generation) for generation in return_val]).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(prompt, llm_string), value, len(value), now, now),
+            )
+            self._conn.commit()
+            self.writes += 1
+        if self.writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under the size cap."""
+        removed = 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created < ?", (time.time() - self.max_age_seconds,)
+            )
+            removed += cursor.rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total > self.max_bytes:
+                # Trim to 90% so we don't evict again on the very next write
+                target = total - int(self.max_bytes * 0.9)
+                freed = 0
+                victims = []
+                for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed"):
+                    if freed >= target:
+                        break
+                    victims.append((key,))
+                    freed += size
+                self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+                removed += len(victims)
+            self._conn.commit()
+        self.evictions += removed
+        return removed
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "bypass": self.bypass,
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (
+            f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries, "
+            f"{stats['bytes'] / 1024:.1f} KB on disk{' [bypassed]' if stats['bypass'] else ''}"
+        )
+
+
+def install_llm_cache(settings: Optional[LLMCacheSettings] = None) -> Optional[SQLiteLLMCache]:
+    """
+    Register the persistent cache as langchain's global LLM cache.
+
+    Set ``LLM_CACHE_BYPASS=1`` to force fresh responses for a single run
+    without touching the configuration.
+    """
+    settings = settings or LLMCacheSettings()
+    if not settings.enabled:
+        return None
+    existing = get_llm_cache()
+    if isinstance(existing, SQLiteLLMCache):
+        return existing
+    bypass = settings.bypass or os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+    cache = SQLiteLLMCache(
+        Path(settings.path) if settings.path else cache_dir() / "llm_cache.sqlite3",
+        max_bytes=int(settings.max_size_mb * 1024 * 1024),
+        max_age_seconds=settings.max_age_days * 86400,
+        bypass=bypass,
+    )
+    set_llm_cache(cache)
+    return cache
@@ -0,0 +1,410 @@
+import heapq
+import itertools
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+
+from .context_compaction import TokenCounter
+from .load_test import LatencyHistogram
+from .settings import LLMGovernorSettings, cache_dir
+from .tracing import annotate_span
+
+T = TypeVar("T")
+
+# Higher runs first; tasks set it to their remaining critical-path length
+_priority_var: ContextVar[int] = ContextVar("crew_llm_priority", default=0)
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """Give the LLM calls made in this context ``priority`` in the governor's queue."""
+    token = _priority_var.set(priority)
+    try:
+        yield
+    finally:
+        _priority_var.reset(token)
+
+
+def estimate_tokens(messages: List[BaseMessage], counter: TokenCounter) -> int:
+    """Prompt tokens of ``messages`` as OpenAI counts them (about 4 per message of framing)."""
+    return sum(counter.count(str(m.content)) + 4 for m in messages) + 3
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    """openai.RateLimitError, or any error carrying an HTTP 429."""
+    if type(error).__name__ == "RateLimitError":
+        return True
+    return getattr(error, "status_code", None) == 429 or getattr(
+        getattr(error, "response", None), "status_code", None
+    ) == 429
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from a Retry-After header."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class BucketState:
+    requests: float
+    tokens: float
+    updated: float
+    cooldown_until: float = 0.0
+
+
+class TokenBuckets:
+    """
+    Requests-per-minute and tokens-per-minute buckets, refilled continuously
+    (``period`` is the minute; the benchmarks shorten it).
+
+    A call takes one request and its estimated tokens; once it finishes the
+    difference from the actual usage is settled, so the token level can go
+    into debt after an underestimate. With a ``path`` the state lives in
+    SQLite and every update is one ``BEGIN IMMEDIATE`` transaction, so all
+    processes sharing the file draw from the same budget.
+    """
+
+    def __init__(
+        self, requests_per_minute: float, tokens_per_minute: float, path: Optional[Path] = None, period: float = 60.0
+    ):
+        self.capacity = (requests_per_minute, tokens_per_minute)
+        self.rates = (requests_per_minute / period, tokens_per_minute / period)
+        self._lock = threading.Lock()
+        self._state = BucketState(requests_per_minute, tokens_per_minute, time.time())
+        self._conn = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS buckets (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    cooldown_until REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO buckets VALUES (1, ?, ?, ?, 0)",
+                (requests_per_minute, tokens_per_minute, time.time()),
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[BucketState]:
+        with self._lock:
+            if self._conn is None:
+                self._refill(self._state)
+                yield self._state
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT requests, tokens, updated, cooldown_until FROM buckets WHERE id = 1"
+                ).fetchone()
+                state = BucketState(*row)
+                self._refill(state)
+                yield state
+                self._conn.execute(
+                    "UPDATE buckets SET requests = ?, tokens = ?, updated = ?, cooldown_until = ? WHERE id = 1",
+                    (state.requests, state.tokens, state.updated, state.cooldown_until),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _refill(self, state: BucketState) -> None:
+        now = time.time()
+        elapsed = max(0.0, now - state.updated)
+        state.requests = min(self.capacity[0], state.requests + elapsed * self.rates[0])
+        state.tokens = min(self.capacity[1], state.tokens + elapsed * self.rates[1])
+        state.updated = now
+
+    def take(self, tokens: int) -> float:
+        """Take one request and ``tokens``, or return the seconds until that is possible."""
+        tokens = min(tokens, self.capacity[1])
+        with self._transaction() as state:
+            if state.cooldown_until > state.updated:
+                return state.cooldown_until - state.updated
+            wait = max((1 - state.requests) / self.rates[0], (tokens - state.tokens) / self.rates[1])
+            if wait > 0:
+                return wait
+            state.requests -= 1
+            state.tokens -= tokens
+            return 0.0
+
+    def settle(self, tokens: float) -> None:
+        """Charge (or refund, when negative) the difference from the estimate."""
+        with self._transaction() as state:
+            state.tokens = min(self.capacity[1], state.tokens - tokens)
+
+    def cool_down(self, seconds: float) -> None:
+        """Hold every caller (in every sharing process) for ``seconds``."""
+        with self._transaction() as state:
+            state.cooldown_until = max(state.cooldown_until, state.updated + seconds)
+
+
+class LLMGovernor:
+    """
+    Admission control for LLM calls, shared by every agent in the process.
+
+    A call waits in a priority queue (highest priority, then arrival) until
+    it is at the head, fewer than ``max_concurrency`` calls are in flight and
+    the RPM/TPM buckets hold one request plus its estimated tokens. A call
+    that is rate-limited anyway puts every caller on hold for a jittered,
+    exponentially growing pause (or the provider's Retry-After), then
+    retries through the queue, so a 429 slows the whole process down
+    instead of setting off a storm of independent retries.
+    """
+
+    def __init__(self, settings: Optional[LLMGovernorSettings] = None, buckets: Optional[TokenBuckets] = None):
+        self.settings = settings = settings or LLMGovernorSettings()
+        path = None
+        if settings.shared:
+            path = Path(settings.path) if settings.path else cache_dir() / "llm_governor.sqlite3"
+        self.buckets = buckets or TokenBuckets(settings.requests_per_minute, settings.tokens_per_minute, path)
+        self.calls = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.errors = 0
+        self.tokens_estimated = 0
+        self.tokens_used = 0
+        self.max_queue_depth = 0
+        self.wait = LatencyHistogram()
+        self.counter = TokenCounter()
+        self._waiting: List[Tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._inflight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self, tokens: int, priority: Optional[int] = None) -> float:
+        """Block until the call may start; returns the seconds spent queued."""
+        priority = _priority_var.get() if priority is None else priority
+        ticket = (-priority, next(self._tickets))
+        started = time.perf_counter()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket and self._inflight < self.settings.max_concurrency:
+                        timeout = self.buckets.take(tokens)
+                        if timeout <= 0:
+                            break
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            self._inflight += 1
+            waited = time.perf_counter() - started
+            self.wait.record(waited)
+            self.tokens_estimated += tokens
+        return waited
+
+    def release(self, estimated: int, used: Optional[int] = None) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self.calls += 1
+            if used is not None:
+                self.tokens_used += used
+                self.buckets.settle(used - estimated)
+            self._cond.notify_all()
+
+    def _back_off(self, attempt: int, error: BaseException) -> None:
+        self.rate_limited += 1
+        self.retries += 1
+        ceiling = min(self.settings.backoff_max, self.settings.backoff_base * 2 ** attempt)
+        pause = retry_after(error) or random.uniform(ceiling / 2, ceiling)
+        self.buckets.cool_down(pause)
+        with self._cond:
+            self._cond.notify_all()
+
+    def call(self, fn: Callable[[], T], tokens: int, usage: Callable[[T], Optional[int]] = lambda _: None) -> T:
+        """Run ``fn`` under the budgets, retrying it when it is rate-limited."""
+        for attempt in range(self.settings.max_retries + 1):
+            waited = self.acquire(tokens)
+            annotate_span(**{"llm.queue_wait_ms": round(waited * 1000, 1), "llm.attempts": attempt + 1})
+            used = None
+            try:
+                result = fn()
+                used = usage(result)
+                return result
+            except Exception as e:
+                if not is_rate_limit(e) or attempt == self.settings.max_retries:
+                    self.errors += 1
+                    raise
+                self._back_off(attempt, e)
+            finally:
+                self.release(tokens, used)
+        raise AssertionError("unreachable")
+
+    def stream(self, fn: Callable[[], Iterator[T]], tokens: int) -> Iterator[T]:
+        """Like ``call`` for a streamed response; only retried before its first chunk."""
+        for attempt in range(self.settings.max_retries + 1):
+            waited = self.acquire(tokens)
+            annotate_span(**{"llm.queue_wait_ms": round(waited * 1000, 1), "llm.attempts": attempt + 1})
+            started = False
+            try:
+                for chunk in fn():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_rate_limit(e) or attempt == self.settings.max_retries:
+                    self.errors += 1
+                    raise
+                self._back_off(attempt, e)
+            finally:
+                self.release(tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "errors": self.errors,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "inflight": self._inflight,
+            "wait_p50": self.wait.percentile(50),
+            "wait_p95": self.wait.percentile(95),
+            "wait_max": self.wait.max_seconds,
+            "tokens_estimated": self.tokens_estimated,
+            "tokens_used": self.tokens_used,
+        }
+
+    def markdown(self) -> str:
+        stats = self.stats()
+        lines = [
+            "| Calls | Rate-limited | Errors | Max queue depth | Queue wait p50 | p95 | max | Tokens (estimated / used) |",
+            "| ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: |",
+            f"| {stats['calls']} | {stats['rate_limited']} | {stats['errors']} | {stats['max_queue_depth']} "
+            f"| {stats['wait_p50'] * 1000:.0f} ms | {stats['wait_p95'] * 1000:.0f} ms | {stats['wait_max'] * 1000:.0f} ms "
+            f"| {stats['tokens_estimated']:,} / {stats['tokens_used']:,} |",
+        ]
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (
+            f"LLM governor: {stats['calls']} calls, {stats['rate_limited']} rate-limited, "
+            f"queue wait p50 {stats['wait_p50'] * 1000:.0f} ms / p95 {stats['wait_p95'] * 1000:.0f} ms / "
+            f"max {stats['wait_max'] * 1000:.0f} ms, max queue depth {stats['max_queue_depth']}"
+        )
+
+
+class GovernedChatModel(BaseChatModel):
+    """
+    A chat model whose calls go through an LLMGovernor.
+
+    Wraps ``llm`` (built with its own retries off, so only the governor
+    retries): the prompt is measured with tiktoken, the expected output is
+    the model's ``max_tokens`` or the governor's default, and the actual
+    usage reported by the provider settles the token bucket. Identifying
+    params are the wrapped model's, so LLM cache keys are unchanged.
+    """
+
+    llm: BaseChatModel
+
+    _governor: LLMGovernor = PrivateAttr()
+
+    def __init__(self, governor: LLMGovernor, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._governor = governor
+
+    @property
+    def wrapped(self) -> BaseChatModel:
+        return self.llm
+
+    @property
+    def _llm_type(self) -> str:
+        return self.llm._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.llm._identifying_params
+
+    def _estimate(self, messages: List[BaseMessage], kwargs: Dict[str, Any]) -> int:
+        completion = kwargs.get("max_tokens") or getattr(self.llm, "max_tokens", None)
+        return estimate_tokens(messages, self._governor.counter) + (completion or self._governor.settings.completion_tokens)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self._governor.call(
+            lambda: self.llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate(messages, kwargs),
+            usage=lambda result: ((result.llm_output or {}).get("token_usage") or {}).get("total_tokens"),
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        yield from self._governor.stream(
+            lambda: self.llm._stream(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self._estimate(messages, kwargs),
+        )
+
+
+_shared: Optional[LLMGovernor] = None
+_shared_lock = threading.Lock()
+
+
+def shared_governor(settings: Optional[LLMGovernorSettings] = None) -> LLMGovernor:
+    """The process-wide governor, created with the first caller's settings."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMGovernor(settings)
+        return _shared
+
+
+def governed(
+    llm: BaseChatModel, settings: Optional[LLMGovernorSettings] = None, callbacks: Optional[List[Any]] = None
+) -> BaseChatModel:
+    """
+    ``llm`` behind the shared governor, or unchanged when it is disabled.
+    ``callbacks`` go on whichever model is returned, since the wrapped
+    model's own callbacks are bypassed.
+    """
+    settings = settings or LLMGovernorSettings()
+    if not settings.enabled:
+        if callbacks:
+            llm.callbacks = callbacks
+        return llm
+    return GovernedChatModel(shared_governor(settings), llm=llm, callbacks=callbacks)
@@ -0,0 +1,234 @@
+import asyncio
+import math
+import time
+from collections import Counter
+from itertools import cycle
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel, Field
+
+from .crawler import USER_AGENT
+from .settings import LoadTestSettings
+
+# 16 buckets per doubling: percentiles are exact to within ~4.4%
+BUCKETS_PER_OCTAVE = 16
+# Latencies are bucketed in microseconds
+MIN_LATENCY_US = 1.0
+
+
+class LatencyHistogram(BaseModel):
+    """
+    Log-bucketed latency histogram with constant memory, however many
+    requests are recorded. Bucket ``i`` covers ``[2**(i/16), 2**((i+1)/16))``
+    microseconds.
+    """
+    counts: Dict[int, int] = Field(default_factory=dict)
+    total: int = 0
+    sum_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = max(seconds * 1e6, MIN_LATENCY_US)
+        bucket = int(math.log2(micros) * BUCKETS_PER_OCTAVE)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.sum_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    @staticmethod
+    def bucket_upper(bucket: int) -> float:
+        return 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e6
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile, in seconds."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.bucket_upper(bucket), self.max_seconds)
+        return self.max_seconds
+
+    @property
+    def mean(self) -> float:
+        return self.sum_seconds / self.total if self.total else 0.0
+
+    def render(self, rows: int = 10, width: int = 40) -> List[str]:
+        """Text histogram, with buckets merged into at most ``rows`` rows."""
+        if not self.total:
+            return []
+        buckets = sorted(self.counts)
+        step = max(1, math.ceil((buckets[-1] - buckets[0] + 1) / rows))
+        merged: List[Tuple[float, float, int]] = []
+        for start in range(buckets[0], buckets[-1] + 1, step):
+            count = sum(self.counts.get(b, 0) for b in range(start, start + step))
+            merged.append((2 ** (start / BUCKETS_PER_OCTAVE) / 1e6, self.bucket_upper(start + step - 1), count))
+        peak = max(count for _, _, count in merged)
+        return [
+            f"{low * 1000:9.2f} - {high * 1000:9.2f} ms | {'#' * round(width * count / peak):<{width}} {count}"
+            for low, high, count in merged
+        ]
+
+
+class LoadTestReport(BaseModel):
+    urls: List[str]
+    mode: str
+    concurrency: int
+    rate: Optional[float] = None
+    duration: float = 0.0
+    requests: int = 0
+    bytes_received: int = 0
+    status_counts: Dict[int, int] = Field(default_factory=dict)
+    exceptions: Dict[str, int] = Field(default_factory=dict)
+    latency: LatencyHistogram = Field(default_factory=LatencyHistogram)
+
+    @property
+    def errors(self) -> int:
+        return sum(self.exceptions.values()) + sum(n for s, n in self.status_counts.items() if s >= 400)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def summary(self) -> str:
+        """Render throughput, latency percentiles and errors as plain text."""
+        latency = self.latency
+        target = f", target {self.rate:.0f} req/s" if self.rate else ""
+        lines = [
+            f"Load Test of {', '.join(self.urls[:5])}{' ...' if len(self.urls) > 5 else ''}:",
+            f"Mode: {self.mode}, {self.concurrency} connections{target}, {self.duration:.1f}s",
+            f"Requests: {self.requests} ({self.throughput:.1f} req/s), "
+            f"{self.bytes_received / self.duration / 1024 if self.duration else 0:.1f} KB/s received",
+            f"Latency: p50 {latency.percentile(50) * 1000:.1f} ms, p90 {latency.percentile(90) * 1000:.1f} ms, "
+            f"p99 {latency.percentile(99) * 1000:.1f} ms, max {latency.max_seconds * 1000:.1f} ms, "
+            f"mean {latency.mean * 1000:.1f} ms",
+            f"Errors: {self.errors} ({self.errors / self.requests if self.requests else 0:.1%})",
+        ]
+        if self.status_counts:
+            lines.append("Status codes: " + ", ".join(f"{s}: {n}" for s, n in sorted(self.status_counts.items())))
+        if self.exceptions:
+            lines.append("Exceptions: " + ", ".join(f"{e}: {n}" for e, n in sorted(self.exceptions.items())))
+        lines.append("Latency histogram:")
+        lines += latency.render()
+        return "\n".join(lines)
+
+
+class LoadGenerator:
+    """
+    Drive a set of URLs over pooled keep-alive connections for a fixed time.
+
+    In closed-loop mode (no ``rate``) ``concurrency`` workers each send their
+    next request as soon as the previous one completes, measuring capacity.
+    With a ``rate`` requests are started on a fixed schedule whatever the
+    response times, at most ``concurrency`` at once; latency is measured
+    from each request's scheduled start, so a saturated server shows up as
+    queueing delay instead of silently lowering the offered load.
+    """
+
+    def __init__(self, settings: Optional[LoadTestSettings] = None):
+        self.settings = settings or LoadTestSettings()
+
+    async def run(
+        self,
+        urls: List[str],
+        duration: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+    ) -> LoadTestReport:
+        settings = self.settings
+        _check_options(duration=duration, concurrency=concurrency, rate=rate)
+        duration = min(duration or settings.duration, settings.max_duration)
+        concurrency = min(concurrency or settings.concurrency, settings.max_concurrency)
+        rate = rate if rate is not None else settings.rate
+        rate = min(rate, settings.max_rate) if rate else None
+        report = LoadTestReport(
+            urls=urls, mode="open-loop" if rate else "closed-loop", concurrency=concurrency, rate=rate
+        )
+        statuses: Counter = Counter()
+        exceptions: Counter = Counter()
+        targets = cycle(urls)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(
+            limits=limits, timeout=settings.timeout, headers={"User-Agent": USER_AGENT}
+        ) as client:
+            async def fetch(url: str, scheduled: float) -> None:
+                try:
+                    response = await client.get(url)
+                    statuses[response.status_code] += 1
+                    report.bytes_received += response.num_bytes_downloaded
+                except httpx.HTTPError as e:
+                    exceptions[type(e).__name__] += 1
+                report.latency.record(time.perf_counter() - scheduled)
+                report.requests += 1
+
+            started = time.perf_counter()
+            deadline = started + duration
+            if rate:
+                slots = asyncio.Semaphore(concurrency)
+                pending = set()
+
+                async def scheduled_fetch(url: str, scheduled: float) -> None:
+                    try:
+                        await fetch(url, scheduled)
+                    finally:
+                        slots.release()
+
+                interval = 1.0 / rate
+                sent = 0
+                while True:
+                    scheduled = started + sent * interval
+                    if scheduled >= deadline:
+                        break
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    # At most ``concurrency`` requests in flight; late ones keep
+                    # their scheduled start, so the wait counts as latency
+                    await slots.acquire()
+                    task = asyncio.create_task(scheduled_fetch(next(targets), scheduled))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                    sent += 1
+                if pending:
+                    await asyncio.gather(*pending)
+            else:
+                async def worker() -> None:
+                    while time.perf_counter() < deadline:
+                        await fetch(next(targets), time.perf_counter())
+
+                await asyncio.gather(*[worker() for _ in range(concurrency)])
+            report.duration = time.perf_counter() - started
+
+        report.status_counts = dict(statuses)
+        report.exceptions = dict(exceptions)
+        return report
+
+
+def _check_options(**options: Optional[float]) -> None:
+    for name, value in options.items():
+        if value is not None and value <= 0:
+            raise ValueError(f"{name} must be greater than 0, got {value:g}")
+
+
+def parse_load_test_input(tool_input: str) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Split tool input such as ``http://localhost:8000/ /about.html duration=10
+    rate=50`` into URLs and options. Paths are resolved against the first URL.
+    """
+    urls: List[str] = []
+    options: Dict[str, float] = {}
+    for token in tool_input.replace(",", " ").split():
+        if "=" in token and not token.startswith("http"):
+            key, _, value = token.partition("=")
+            if key in ("duration", "concurrency", "rate"):
+                options[key] = float(value)
+                _check_options(**{key: options[key]})
+        elif token.startswith("/") and urls:
+            urls.append(str(httpx.URL(urls[0]).join(token)))
+        else:
+            urls.append(token if "://" in token else f"http://{token}")
+    return urls, options
@@ -1,50 +1,75 @@
-from typing import List, Dict, Any
-import yaml
+from typing import List, Dict, Any, Callable, Optional, Set, Tuple
 from pathlib import Path
-from pydantic import BaseModel, Field
+from contextlib import nullcontext
 from crewai import Agent, Task, Crew, Process
+from crewai.tools.agent_tools import AgentTools
 from langchain.tools import Tool
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from bs4 import BeautifulSoup
-import requests
-import os
-import http.server
-import socketserver
+from langchain_openai import ChatOpenAI
+from functools import partial
+import asyncio
 import threading
+import time
 from dotenv import load_dotenv
 
+from .checkpoints import CheckpointStore, task_fingerprint
+from .context_compaction import ContextCompactor, render_mapping
+from .content_analysis import ContentAnalyzer
+from .crawler import PageResult, SiteCrawler
+from .css_optimizer import CSSReport, optimize_css
+from .large_site import analyze_large_site
+from .llm_cache import install_llm_cache
+from .llm_governor import LLMGovernor, governed, llm_priority, shared_governor
+from .load_test import LoadGenerator, parse_load_test_input
+from .model_routing import ModelRouter
+from .page_weight import PageWeightAnalyzer
+from .preview_server import make_preview_server
+from .report import IncrementalReport
+from .sandbox import SandboxPool, execute_code, shared_sandbox
+from .scheduler import DagScheduler, TaskGraph
+from .settings import (
+    OUTPUT_DIR,
+    Config,
+    ContentSettings,
+    CrawlSettings,
+    LLMGovernorSettings,
+    LoadTestSettings,
+    PerformanceSettings,
+    PreviewSettings,
+    SchedulerSettings,
+    load_agents,
+    load_config,
+    load_tasks,
+)
+from .site_build import BuildReport, build_site
+from .site_index import open_site_index
+from .site_search import search_site
+from .site_writer import SiteWriterCallbackHandler, write_site_files
+from .tracing import RunTracer, annotate_span
+
 # Load environment variables
 load_dotenv()
 
+SITE_DIR = OUTPUT_DIR / "redesigned_site"
+DIST_DIR = OUTPUT_DIR / "dist"
+
 # Global variables for server
 PORT = 8000
 server_thread = None
 httpd = None
 
-class Config(BaseModel):
-    current_website_url: str
-    industry: str
-    target_audience: str
-    brand_guidelines: Dict[str, Any]
-    tools: Dict[str, List[str]]
-
-def start_local_server(directory: str):
+def start_local_server(directory: str, port: int = PORT, settings: Optional[PreviewSettings] = None):
     """Start a local HTTP server in a separate thread."""
     global server_thread, httpd
     
-    class Handler(http.server.SimpleHTTPRequestHandler):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, directory=directory, **kwargs)
-    
     # Stop existing server if running
     stop_local_server()
     
     # Start new server
-    httpd = socketserver.TCPServer(("", PORT), Handler)
+    httpd = make_preview_server(directory, port, settings)
     server_thread = threading.Thread(target=httpd.serve_forever)
     server_thread.daemon = True
     server_thread.start()
-    print(f"\nLocal server started at http://localhost:{PORT}")
+    print(f"\nLocal server started at http://localhost:{port}")
 
 def stop_local_server():
     """Stop the local HTTP server if it's running."""
@@ -56,92 +81,100 @@ def stop_local_server():
         httpd = None
         print("\nLocal server stopped")
 
-def save_website_files(content: str) -> Path:
+def save_website_files(
+    content: str,
+    on_file: Optional[Callable[[Path], None]] = None,
+    output_dir: Path = SITE_DIR
+) -> Path:
     """
     Parse the generated code and save each file in the redesigned_site folder.
     Returns the path to the redesigned_site folder.
     """
-    output_dir = Path(__file__).parent / "output" / "redesigned_site"
-    output_dir.mkdir(parents=True, exist_ok=True)
     print(f"\nSaving website files to: {output_dir}")
     
-    # Split the content into separate files based on file markers
-    files = {}
-    current_file = None
-    current_content = []
-    
-    for line in content.split('\n'):
-        # Check for file markers like "// filename: example.html" or "/* filename: style.css */"
-        if '// filename:' in line or '/* filename:' in line:
-            # Save previous file if exists
-            if current_file:
-                files[current_file] = '\n'.join(current_content)
-                print(f"Prepared content for: {current_file}")
-            # Extract new filename
-            current_file = line.split('filename:')[1].strip().strip('*/ ')
-            current_content = []
-        else:
-            if current_file:
-                current_content.append(line)
-    
-    # Save the last file
-    if current_file and current_content:
-        files[current_file] = '\n'.join(current_content)
-        print(f"Prepared content for: {current_file}")
-    
-    # If no file markers found, assume it's a single HTML file
-    if not files:
-        files['index.html'] = content
-        print("No file markers found, saving as index.html")
-    
-    # Save all files
-    for filename, content in files.items():
-        file_path = output_dir / filename
-        # Create parent directories if they don't exist
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(file_path, 'w') as f:
-                f.write(content)
-            print(f"Successfully saved: {file_path}")
-        except Exception as e:
-            print(f"Error saving {filename}: {str(e)}")
+    # Feed the content through the streaming writer in slices; each file is
+    # written atomically as soon as its "// filename:" section ends
+    chunk_size = 64 * 1024
+    written = write_site_files(
+        (content[i:i + chunk_size] for i in range(0, len(content), chunk_size)),
+        output_dir,
+        on_file=on_file
+    )
+    if written and "filename:" not in content:
+        print("No file markers found, saved as index.html")
     
     return output_dir
 
-def analyze_website(tool_input: str) -> str:
+def preview_when_ready(path: Path, site_dir: Path = SITE_DIR, settings: Optional[PreviewSettings] = None):
+    """Start the preview server as soon as the run's generated index.html exists."""
+    site_dir = Path(site_dir)
+    if path.name == "index.html" and path.parent == site_dir and not server_thread:
+        start_local_server(str(site_dir), settings=settings)
+
+def analyze_website(tool_input: str, settings: Optional[CrawlSettings] = None) -> str:
+    """
+    Crawl the site behind the given URL and return aggregated per-page metrics,
+    with only what changed since the last crawl listed page by page. Crawls
+    allowed more than large_site_pages pages stream their pages into
+    aggregates and a record file instead of holding them.
+    """
     try:
         url = tool_input.strip()
+        settings = settings or CrawlSettings()
         # Check if it's a local URL
         if "localhost" in url or "127.0.0.1" in url:
             if not server_thread:
                 return "Error: Local server is not running. Please start the server first."
         
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Basic analysis
-        title = soup.title.string if soup.title else "No title found"
-        meta_desc = soup.find('meta', {'name': 'description'})
-        meta_desc = meta_desc['content'] if meta_desc else "No meta description found"
+        index = open_site_index(settings)
+        try:
+            if settings.max_pages > settings.large_site_pages:
+                result, aggregate, records_path = asyncio.run(analyze_large_site(url, settings, index))
+                if not aggregate.pages:
+                    return f"Error analyzing website: no pages could be fetched from {url}"
+                return aggregate.summary(result, records_path)
+            result = asyncio.run(SiteCrawler(settings, index).crawl(url))
+        finally:
+            if index:
+                index.close()
+        if not result.pages:
+            return f"Error analyzing website: no pages could be fetched from {url}"
+        return result.summary()
+    except Exception as e:
+        return f"Error analyzing website: {str(e)}"
+
+def test_performance(tool_input: str, settings: Optional[PerformanceSettings] = None) -> str:
+    """Measure page weight and the render-blocking critical path of a single page."""
+    try:
+        url = tool_input.strip()
+        if "localhost" in url or "127.0.0.1" in url:
+            if not server_thread:
+                return "Error: Local server is not running. Please start the server first."
         
-        # Structure analysis
-        headings = len(soup.find_all(['h1', 'h2', 'h3']))
-        images = len(soup.find_all('img'))
-        links = len(soup.find_all('a'))
+        report = asyncio.run(PageWeightAnalyzer(settings).analyze(url))
+        return report.summary()
+    except Exception as e:
+        return f"Error testing performance: {str(e)}"
+
+def monitor_performance(tool_input: str, settings: Optional[LoadTestSettings] = None) -> str:
+    """Load-test one or more URLs and report throughput, latency percentiles and errors."""
+    try:
+        urls, options = parse_load_test_input(tool_input)
+        if not urls:
+            return "Error: no URL given to load-test."
+        if any("localhost" in url or "127.0.0.1" in url for url in urls):
+            if not server_thread:
+                return "Error: Local server is not running. Please start the server first."
         
-        analysis = f"""
-        Website Analysis for {url}:
-        Title: {title}
-        Meta Description: {meta_desc}
-        Structure:
-        - {headings} headings found
-        - {images} images found
-        - {links} links found
-        Performance: Response time was {response.elapsed.total_seconds():.2f} seconds
-        """
-        return analysis
+        report = asyncio.run(LoadGenerator(settings).run(
+            urls,
+            duration=options.get("duration"),
+            concurrency=int(options["concurrency"]) if "concurrency" in options else None,
+            rate=options.get("rate")
+        ))
+        return report.summary()
     except Exception as e:
-        return f"Error analyzing website: {str(e)}"
+        return f"Error running load test: {str(e)}"
 
 def research_design(tool_input: str) -> str:
     return f"Design research results for: {tool_input}"
@@ -342,15 +375,72 @@ def generate_code(tool_input: str) -> str:
 def generate_image(tool_input: str) -> str:
     return f"Generated image based on: {tool_input}"
 
-def analyze_content(tool_input: str) -> str:
-    return f"Content analysis results for: {tool_input}"
-
-def create_agents(config: Config) -> Dict[str, Agent]:
+def analyze_content(
+    tool_input: str,
+    settings: Optional[ContentSettings] = None,
+    crawl_settings: Optional[CrawlSettings] = None
+) -> str:
+    """
+    Crawl the site behind the given URL (or take the given text as one page)
+    and report readability, keywords, heading alignment, thin content and
+    near-duplicate pages.
+    """
+    try:
+        text = tool_input.strip()
+        settings = settings or ContentSettings()
+        if text.startswith(("http://", "https://")) and " " not in text:
+            if "localhost" in text or "127.0.0.1" in text:
+                if not server_thread:
+                    return "Error: Local server is not running. Please start the server first."
+            result = asyncio.run(SiteCrawler(crawl_settings, collect_text=True).crawl(text))
+            pages = [p for p in result.pages if p.ok]
+            if not pages:
+                return f"Error analyzing content: no pages could be fetched from {text}"
+        else:
+            pages = [PageResult(url="(provided text)", depth=0, text=text)]
+        report = ContentAnalyzer(settings).analyze(pages)
+        return report.summary(settings.max_rows)
+    except Exception as e:
+        return f"Error analyzing content: {str(e)}"
+
+def create_agents(
+    config: Config,
+    site_dir: Path = SITE_DIR,
+    preview: bool = True,
+    llm_factory: Callable[..., Any] = ChatOpenAI,
+    router: Optional[ModelRouter] = None,
+    agent_configs: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Agent]:
+    """
+    Build the seven agents. Each agent's model is its ``model_profile``
+    from agents.yaml (``config.models``), served by ``router``; without
+    one, a router is made whose models come from ``llm_factory``, which is
+    called with ChatOpenAI's keyword arguments. The benchmarks pass a
+    scripted local model.
+    """
+    router = router or ModelRouter(config.models, llm_factory, config.llm_governor)
+    agent_configs = load_agents() if agent_configs is None else agent_configs
+    
+    def llm_for(agent_id: str, callbacks: Optional[List[Any]] = None):
+        return router.chat_model((agent_configs.get(agent_id) or {}).get("model_profile"), callbacks=callbacks)
+    
     # Create tools
     web_analyzer = Tool(
         name="WebAnalyzer",
-        func=analyze_website,
-        description="Analyzes websites for layout, content structure, SEO, and performance."
+        func=partial(analyze_website, settings=config.crawl),
+        description="Crawls a website from the given URL and analyzes every page for layout, content structure, SEO, and performance."
+    )
+    
+    performance_tester = Tool(
+        name="PerformanceTester",
+        func=partial(test_performance, settings=config.performance),
+        description="Fetches every subresource of a page (CSS, JS, images, fonts, CSS @imports) and reports page weight, compression, cache headers, render-blocking requests and the modelled critical-path latency."
+    )
+    
+    performance_monitor = Tool(
+        name="PerformanceMonitor",
+        func=partial(monitor_performance, settings=config.load_test),
+        description="Load-tests one or more URLs (paths like /about.html resolve against the first URL) over pooled keep-alive connections and reports requests/s, p50/p90/p99 latency, a latency histogram, error rate and bytes/s. Optional settings after the URLs: duration=<seconds> concurrency=<connections> rate=<requests per second, omit for closed-loop>."
     )
     
     design_research = Tool(
@@ -365,16 +455,44 @@ def create_agents(config: Config) -> Dict[str, Agent]:
         description="Generates HTML, CSS, and JavaScript code based on design specifications."
     )
     
+    code_executor = Tool(
+        name="CodeExecutor",
+        func=partial(execute_code, settings=config.sandbox),
+        description=f"Runs Python code (plain or in a ```python block) in a warm sandbox worker and returns its stdout, stderr, the value of a final expression or the traceback, with timings. Each run starts from a clean state; limits are {config.sandbox.cpu_seconds}s CPU, {config.sandbox.wall_seconds:g}s wall time and {config.sandbox.memory_mb} MB of memory."
+    )
+    execution_tools = [code_executor] if config.sandbox.enabled else []
+    
     image_generator = Tool(
         name="ImageGenerator",
         func=generate_image,
         description="Generates images based on descriptions."
     )
     
+    site_search = Tool(
+        name="SiteSearch",
+        func=partial(
+            search_site,
+            site_url=config.current_website_url,
+            settings=config.site_search,
+            crawl_settings=config.crawl
+        ),
+        description=f"Searches the pages of {config.current_website_url} and returns the passages most relevant to a question, with their URLs. Input is the question; start it with another site's URL (e.g. the local preview) to search that site instead."
+    )
+    
     content_analyzer = Tool(
         name="ContentAnalyzer",
-        func=analyze_content,
-        description="Analyzes and optimizes content for SEO and engagement."
+        func=partial(analyze_content, settings=config.content, crawl_settings=config.crawl),
+        description="Crawls a website from the given URL (or takes a block of text) and reports readability scores, top keywords and phrases, whether each page's title and headings match its keywords, thin pages and groups of near-duplicate pages."
+    )
+    
+    # Stream the frontend developer's tokens straight into site files so the
+    # preview can come up while the rest of the code is still being generated
+    code_llm = llm_for(
+        "code_generator_agent",
+        callbacks=[SiteWriterCallbackHandler(
+            site_dir,
+            on_file=partial(preview_when_ready, site_dir=site_dir, settings=config.preview) if preview else None
+        )]
     )
     
     agents = {
@@ -383,7 +501,8 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             goal='Analyze websites and provide detailed technical reports',
             backstory="""Expert in website analysis with deep knowledge of SEO, 
             performance optimization, and user experience.""",
-            tools=[web_analyzer],
+            tools=[web_analyzer, performance_tester],
+            llm=llm_for("analysis_agent"),
             verbose=True,
             allow_delegation=True
         ),
@@ -392,7 +511,8 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             goal='Create modern and effective website designs',
             backstory="""Experienced UI/UX designer with expertise in modern web design 
             trends and user-centered design principles.""",
-            tools=[design_research],
+            tools=[design_research, site_search],
+            llm=llm_for("design_advisor_agent"),
             verbose=True,
             allow_delegation=True
         ),
@@ -403,7 +523,8 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             technologies and best practices. You write clean, maintainable code and ensure 
             cross-browser compatibility. You're skilled at implementing responsive designs 
             and optimizing website performance.""",
-            tools=[code_generator],
+            tools=[code_generator, *execution_tools],
+            llm=code_llm,
             verbose=True,
             allow_delegation=True,
             allow_code_execution=True,
@@ -415,6 +536,7 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             backstory="""Creative designer specialized in web graphics and brand 
             consistency.""",
             tools=[image_generator],
+            llm=llm_for("asset_creator_agent"),
             verbose=True,
             allow_delegation=True
         ),
@@ -423,7 +545,8 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             goal='Optimize website content for engagement and SEO',
             backstory="""Content strategist with expertise in SEO and engaging 
             writing.""",
-            tools=[content_analyzer],
+            tools=[content_analyzer, site_search],
+            llm=llm_for("content_refinement_agent"),
             verbose=True,
             allow_delegation=True
         ),
@@ -433,7 +556,8 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             backstory="""Detail-oriented QA engineer with extensive testing 
             experience. You're skilled at writing and executing test cases to verify 
             website functionality and performance.""",
-            tools=[web_analyzer],
+            tools=[web_analyzer, performance_tester, performance_monitor, site_search, *execution_tools],
+            llm=llm_for("quality_assurance_agent"),
             verbose=True,
             allow_delegation=True,
             allow_code_execution=True
@@ -444,24 +568,31 @@ def create_agents(config: Config) -> Dict[str, Agent]:
             backstory="""Experienced digital project manager with a track record of 
             successful website launches""",
             tools=[],
+            llm=llm_for("project_manager_agent"),
             verbose=True,
             allow_delegation=True
         )
     }
     return agents
 
-def load_config() -> Config:
-    config_path = Path(__file__).parent / "config" / "config.yaml"
-    with open(config_path, "r") as f:
-        config_data = yaml.safe_load(f)
-    return Config(**config_data)
-
-def load_tasks() -> Dict[str, Dict[str, Any]]:
-    tasks_path = Path(__file__).parent / "config" / "tasks.yaml"
-    with open(tasks_path, "r") as f:
-        return yaml.safe_load(f)
-
-def create_tasks(config: Config, task_configs: Dict[str, Dict[str, Any]], agents: Dict[str, Agent]) -> List[Task]:
+def site_files_output(outputs: Dict[str, Any], task_configs: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """The output of the task marked ``site_files`` in tasks.yaml, which holds the generated site."""
+    for task_id, task_config in task_configs.items():
+        if task_config.get("site_files") and isinstance(outputs.get(task_id), str):
+            return outputs[task_id]
+    return None
+
+def create_task_map(
+    config: Config,
+    task_configs: Dict[str, Dict[str, Any]],
+    agents: Dict[str, Agent],
+    wire_context: bool = True
+) -> Dict[str, Task]:
+    """
+    Build the crewai tasks keyed by their tasks.yaml id.
+    With wire_context=False the tasks' context lists are left empty, for
+    schedulers that hand upstream outputs to each task themselves.
+    """
     # First create all tasks without context
     tasks_dict = {}
     for task_id, task_config in task_configs.items():
@@ -470,7 +601,7 @@ def create_tasks(config: Config, task_configs: Dict[str, Dict[str, Any]], agents
             current_website_url=config.current_website_url,
             industry=config.industry,
             target_audience=config.target_audience,
-            brand_guidelines=config.brand_guidelines
+            brand_guidelines=render_mapping(config.brand_guidelines)
         )
         
         task = Task(
@@ -482,118 +613,393 @@ def create_tasks(config: Config, task_configs: Dict[str, Dict[str, Any]], agents
         tasks_dict[task_id] = task
     
     # Now add context/dependencies
-    for task_id, task_config in task_configs.items():
-        if "context" in task_config:
-            context_tasks = [tasks_dict[context_id] for context_id in task_config["context"]]
-            tasks_dict[task_id].context = context_tasks
+    if wire_context:
+        for task_id, task_config in task_configs.items():
+            if "context" in task_config:
+                context_tasks = [tasks_dict[context_id] for context_id in task_config["context"]]
+                tasks_dict[task_id].context = context_tasks
     
-    return list(tasks_dict.values())
+    return tasks_dict
 
-def save_report(report_content: str):
-    output_path = Path(__file__).parent / "output" / "report.md"
+def create_tasks(config: Config, task_configs: Dict[str, Dict[str, Any]], agents: Dict[str, Agent]) -> List[Task]:
+    return list(create_task_map(config, task_configs, agents).values())
+
+def make_summarizer(model: str, governor: Optional[LLMGovernorSettings] = None) -> Callable[[str, str, int], str]:
+    """
+    LLM summarizer for context compaction; its calls go through the LLM
+    cache and the LLM governor.
+    """
+    governor = governor or LLMGovernorSettings()
+    retries = {"max_retries": 0} if governor.enabled else {}
+    llm = governed(ChatOpenAI(model=model, temperature=0, **retries), governor)
+    
+    def summarize(context: str, task_description: str, budget: int) -> str:
+        prompt = (
+            f"Condense the material below to at most {budget} tokens for the next task. "
+            "Keep the facts, numbers, URLs, names and recommendations that task needs; "
+            "drop everything else.\n\n"
+            f"Next task:\n{task_description}\n\nMaterial:\n{context}"
+        )
+        return llm.invoke(prompt).content
+    
+    return summarize
+
+def add_delegation_tools(tasks: Dict[str, Task], agents: Dict[str, Agent]):
+    """Attach the same delegation tools crewai's sequential process would."""
+    for task in tasks.values():
+        if task.agent.allow_delegation:
+            others = [agent for agent in agents.values() if agent is not task.agent]
+            task.tools += AgentTools(agents=others).tools()
+
+def execute_task(
+    task_id: str,
+    task: Task,
+    context: Optional[str],
+    checkpoints: Optional[CheckpointStore] = None,
+    rerun: Set[str] = frozenset(),
+    compactor: Optional[ContextCompactor] = None,
+    tracer: Optional[RunTracer] = None,
+    report: Optional[IncrementalReport] = None,
+    router: Optional[ModelRouter] = None
+) -> str:
+    """
+    Execute one task, or return its checkpointed output when the task, its
+    agent and its context are unchanged and it isn't marked for rerun.
+    The context is first fitted into the task's token budget, and the
+    output is checkpointed as soon as the task finishes. With a tracer,
+    the task and everything its agent does are recorded as spans; with a
+    report, the task's tokens stream into it and its output is added to
+    its section on completion. With a router, the task's LLM calls use its
+    model profile and their latency and tokens are recorded.
+    """
+    with tracer.task_span(task_id, task) if tracer else nullcontext(), \
+            router.task(task_id) if router else nullcontext():
+        if compactor:
+            context = compactor.compact(task_id, task, context)
+        key = task_fingerprint(task_id, task, context) if checkpoints else None
+        output = None
+        if checkpoints and task_id not in rerun:
+            output = checkpoints.load(task_id, key)
+            if output is not None:
+                print(f"\n[checkpoint] Reusing saved output of task: {task_id}")
+                annotate_span(checkpoint="hit")
+        if output is None:
+            started = time.perf_counter()
+            with report.stream(task_id) if report else nullcontext():
+                output = task.execute(context=context)
+            if checkpoints:
+                checkpoints.save(task_id, key, output, time.perf_counter() - started)
+    if report:
+        report.add(task_id, output)
+    return output
+
+def run_sequential(
+    task_configs: Dict[str, Dict[str, Any]],
+    tasks: Dict[str, Task],
+    agents: Dict[str, Agent],
+    checkpoints: Optional[CheckpointStore] = None,
+    rerun: Set[str] = frozenset(),
+    compactor: Optional[ContextCompactor] = None,
+    tracer: Optional[RunTracer] = None,
+    report: Optional[IncrementalReport] = None,
+    router: Optional[ModelRouter] = None
+) -> Dict[str, str]:
+    """
+    Run the tasks one after another the way crewai's sequential process
+    does (each task gets its context tasks' outputs, or else the previous
+    task's output), with checkpointing. Returns outputs keyed by task id.
+    """
+    add_delegation_tools(tasks, agents)
+    outputs: Dict[str, str] = {}
+    previous = ""
+    for task_id, task in tasks.items():
+        context_ids = task_configs[task_id].get("context")
+        context = "\n".join(outputs[c] for c in context_ids) if context_ids else previous
+        # Async tasks run inline here; as in crewai, their output isn't passed on
+        passes_output = not task.async_execution
+        task.async_execution = False
+        print(f"\n[sequential] Starting task: {task_id}")
+        outputs[task_id] = execute_task(
+            task_id, task, context or None, checkpoints, rerun, compactor, tracer, report, router
+        )
+        if passes_output:
+            previous = outputs[task_id]
+    return outputs
+
+def run_task_graph(
+    task_configs: Dict[str, Dict[str, Any]],
+    tasks: Dict[str, Task],
+    agents: Dict[str, Agent],
+    settings: SchedulerSettings,
+    checkpoints: Optional[CheckpointStore] = None,
+    rerun: Set[str] = frozenset(),
+    compactor: Optional[ContextCompactor] = None,
+    tracer: Optional[RunTracer] = None,
+    report: Optional[IncrementalReport] = None,
+    router: Optional[ModelRouter] = None
+) -> Dict[str, str]:
+    """
+    Run the tasks concurrently along the context edges of tasks.yaml.
+    Returns each task's output keyed by task id, in topological order.
+    """
+    graph = TaskGraph.from_task_configs(task_configs)
+    
+    add_delegation_tools(tasks, agents)
+    for task in tasks.values():
+        # The scheduler provides the concurrency; each task runs inline in its worker
+        task.async_execution = False
+    
+    # An agent's executor holds per-task state, so one agent never runs two tasks at once
+    agent_locks = {id(agent): threading.Lock() for agent in agents.values()}
+    # LLM calls of tasks on the longest remaining chain are admitted first
+    priority = graph.critical_path_lengths()
+    
+    def execute(task_id: str, upstream: Dict[str, str]) -> str:
+        task = tasks[task_id]
+        context = "\n".join(upstream.values()) or None
+        with agent_locks[id(task.agent)], llm_priority(priority[task_id]):
+            print(f"\n[scheduler] Starting task: {task_id}")
+            return execute_task(task_id, task, context, checkpoints, rerun, compactor, tracer, report, router)
+    
+    def on_complete(task_id: str, output: str):
+        print(f"\n[scheduler] Finished task: {task_id}")
+    
+    scheduler = DagScheduler(graph, max_parallel=settings.max_parallel, on_task_complete=on_complete)
+    return scheduler.run(execute)
+
+def save_report(report_content: str, output_path: Path = OUTPUT_DIR / "report.md"):
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w") as f:
         f.write(report_content)
     return output_path
 
-def format_report(results: List[Any]) -> str:
-    report = "# Website Redesign Project Report\n\n"
-    
-    # Website Analysis
-    report += "## Website Analysis\n"
-    analysis_result = next((r for r in results if isinstance(r, str) and "Website Analysis" in r), None)
-    if analysis_result:
-        report += analysis_result + "\n\n"
-    
-    # Design Proposal
-    report += "## Design Proposal\n"
-    design_result = next((r for r in results if isinstance(r, str) and "Design Proposal" in r), None)
-    if design_result:
-        report += design_result + "\n\n"
-    
-    # Visual Assets
-    report += "## Visual Assets\n"
-    assets_result = next((r for r in results if isinstance(r, str) and "logo design" in r.lower()), None)
-    if assets_result:
-        report += assets_result + "\n\n"
-    
-    # Content Optimization
-    report += "## Content Optimization\n"
-    content_result = next((r for r in results if isinstance(r, str) and "content" in r.lower()), None)
-    if content_result:
-        report += content_result + "\n\n"
-    
-    # QA Report
-    report += "## Quality Assurance Report\n"
-    qa_result = next((r for r in results if isinstance(r, str) and "QA" in r), None)
-    if qa_result:
-        report += qa_result + "\n\n"
-    
-    # Project Timeline
-    report += "## Project Timeline\n"
-    timeline_result = next((r for r in results if isinstance(r, str) and "Project Timeline" in r), None)
-    if timeline_result:
-        report += timeline_result + "\n\n"
-    
-    return report
-
-def main():
-    print("\nStarting Website Redesign Project...")
+def add_summary_sections(
+    report: IncrementalReport,
+    build_report: Optional[BuildReport] = None,
+    compactor: Optional[ContextCompactor] = None,
+    tracer: Optional[RunTracer] = None,
+    governor: Optional[LLMGovernor] = None,
+    router: Optional[ModelRouter] = None,
+    sandbox: Optional[SandboxPool] = None,
+    css_report: Optional[CSSReport] = None
+):
+    """Append the sections that follow the task outputs."""
+    if css_report:
+        report.add_section("CSS Optimization", css_report.markdown())
+    if build_report:
+        report.add_section("Build Optimization", build_report.markdown())
+    if compactor and compactor.stats:
+        report.add_section("Context Compaction", compactor.markdown())
+    if governor and governor.calls:
+        report.add_section("LLM Rate Limits", governor.markdown())
+    if router and router.usage:
+        report.add_section("Model Routing", router.markdown())
+    if sandbox and sandbox.executions:
+        report.add_section("Code Execution", sandbox.markdown())
+    if tracer:
+        report.add_section("Timing Breakdown", tracer.markdown())
+
+def format_report(
+    outputs: Dict[str, str],
+    task_configs: Dict[str, Dict[str, Any]],
+    build_report: Optional[BuildReport] = None,
+    compactor: Optional[ContextCompactor] = None,
+    tracer: Optional[RunTracer] = None,
+    css_report: Optional[CSSReport] = None
+) -> str:
+    """Render the whole report at once from task outputs keyed by task id."""
+    report = IncrementalReport(None, task_configs)
+    for task_id, output in outputs.items():
+        report.add(task_id, output)
+    add_summary_sections(report, build_report, compactor, tracer, css_report=css_report)
+    return report.render()
+
+def run_pipeline(
+    config: Config,
+    task_configs: Dict[str, Dict[str, Any]],
+    output_dir: Path = OUTPUT_DIR,
+    preview: bool = True,
+    rerun_from: Optional[str] = None
+) -> Tuple[List[Any], Path]:
+    """
+    Run every task for one site and write its files, build and report under
+    output_dir. Returns the task outputs and the report path.
     
-    # Load configuration
-    print("Loading configuration...")
-    config = load_config()
-    task_configs = load_tasks()
+    With checkpoints enabled, tasks whose saved output still matches are
+    skipped. rerun_from forces that task and everything downstream of it
+    to execute again.
+    """
+    site_dir = output_dir / "redesigned_site"
+    dist_dir = output_dir / "dist"
+    dag_mode = config.scheduler.mode == "dag"
+    # Fail fast on unknown context ids or dependency cycles
+    graph = TaskGraph.from_task_configs(task_configs) if dag_mode else TaskGraph.sequential(task_configs)
+    
+    checkpoints = None
+    rerun: Set[str] = set()
+    if config.checkpoints.enabled:
+        checkpoints = CheckpointStore(Path(config.checkpoints.path or output_dir / "checkpoints"))
+        if not config.checkpoints.resume:
+            rerun = set(task_configs)
+    if rerun_from:
+        if rerun_from not in task_configs:
+            raise ValueError(f"Unknown task id: {rerun_from}")
+        if not checkpoints:
+            raise ValueError("Replaying from a task needs checkpoints.enabled in config.yaml")
+        rerun |= {rerun_from} | graph.descendants(rerun_from)
+        print(f"\nRe-running {', '.join(t for t in task_configs if t in rerun)}")
+    llm_cache = install_llm_cache(config.llm_cache)
+    governor = shared_governor(config.llm_governor) if config.llm_governor.enabled else None
+    sandbox = None
+    if config.sandbox.enabled:
+        # Workers warm up while the first tasks run
+        sandbox = shared_sandbox(config.sandbox)
+        sandbox.start(wait=False)
+    compactor = None
+    if config.compaction.enabled:
+        summarizer = make_summarizer(config.compaction.summary_model, config.llm_governor) if config.compaction.mode == "summarize" else None
+        compactor = ContextCompactor(config.compaction, summarizer)
+    tracer = None
+    if config.tracing.enabled:
+        tracer = RunTracer(config.tracing, Path(config.tracing.path or output_dir / "traces.jsonl"))
     
     # Create agents and tasks
     print("\nCreating agents and tasks...")
-    agents = create_agents(config)
-    tasks = create_tasks(config, task_configs, agents)
+    router = ModelRouter(config.models, governor=config.llm_governor, task_configs=task_configs)
+    agents = create_agents(config, site_dir=site_dir, preview=preview, router=router)
+    # Upstream outputs are passed explicitly so they can be compacted and
+    # checkpointed ones can stand in
+    in_process = dag_mode or checkpoints or compactor
+    wire_context = not in_process
+    task_map = create_task_map(config, task_configs, agents, wire_context=wire_context)
+    tasks = list(task_map.values())
     
     print(f"\nTotal tasks to be executed: {len(tasks)}")
     for i, task in enumerate(tasks, 1):
         print(f"{i}. {task.description[:100]}...")
     
-    # Create and run the crew
-    print("\nInitializing crew and starting tasks...")
-    crew = Crew(
-        agents=list(agents.values()),
-        tasks=tasks,
-        verbose=True,
-        process=Process.sequential
-    )
+    # report.md fills in as tasks finish
+    report = IncrementalReport(output_dir / "report.md", task_configs)
     
-    try:
-        results = crew.kickoff()
+    run_span = nullcontext()
+    if tracer:
+        run_span = tracer.run_span(**{"site.url": config.current_website_url, "scheduler.mode": config.scheduler.mode})
+    with run_span:
+        if dag_mode:
+            print(f"\nRunning tasks as a dependency graph (up to {config.scheduler.max_parallel} at once)...")
+            outputs = run_task_graph(
+                task_configs, task_map, agents, config.scheduler, checkpoints, rerun, compactor, tracer, report,
+                router
+            )
+        elif in_process:
+            print("\nRunning tasks sequentially...")
+            outputs = run_sequential(
+                task_configs, task_map, agents, checkpoints, rerun, compactor, tracer, report, router
+            )
+        else:
+            # Create and run the crew
+            print("\nInitializing crew and starting tasks...")
+            def on_task_done(task_id: str, output: Any):
+                report.add(task_id, output.result)
+            
+            for task_id, task in task_map.items():
+                task.callback = partial(on_task_done, task_id)
+            crew = Crew(
+                agents=list(agents.values()),
+                tasks=tasks,
+                verbose=True,
+                process=Process.sequential
+            )
+            with report.stream(None):
+                crew.kickoff()
+            # kickoff() only returns the last output; the report needs every task's
+            outputs = {task_id: task.output.result for task_id, task in task_map.items() if task.output}
+        results = list(outputs.values())
         print("\nAll tasks completed. Processing results...")
+        if llm_cache:
+            print(llm_cache.summary())
+        if checkpoints:
+            print(checkpoints.summary())
+        if compactor:
+            print(compactor.summary())
+        if governor:
+            print(governor.summary())
+        if sandbox and sandbox.executions:
+            print(sandbox.summary())
+        if router.usage:
+            print(router.summary())
+            router.save(
+                Path(config.models.usage_path or output_dir / "model_usage.jsonl"),
+                site=config.current_website_url, scheduler=config.scheduler.mode
+            )
         
-        # Extract HTML content from frontend developer's output
-        frontend_result = next((r for r in results if isinstance(r, str) and "<!DOCTYPE html>" in r), None)
+        frontend_result = site_files_output(outputs, task_configs)
+        build_report = None
+        css_report = None
         if frontend_result:
-            website_dir = save_website_files(frontend_result)
+            with tracer.span("save site files") if tracer else nullcontext():
+                website_dir = save_website_files(frontend_result, output_dir=site_dir)
             print(f"\nWebsite files saved to: {website_dir}")
             
-            # Start local server
-            start_local_server(str(website_dir))
-            print("\nYou can now view the redesigned website at:")
-            print(f"http://localhost:{PORT}")
+            # Purge unused rules and inline critical CSS in the saved files
+            if config.css.enabled:
+                with tracer.span("css") if tracer else nullcontext():
+                    css_report = optimize_css(website_dir, config.css)
+                print(css_report.summary())
+            
+            # Minify, fingerprint and precompress into the dist folder
+            if config.build.enabled:
+                with tracer.span("build") if tracer else nullcontext():
+                    build_report = build_site(website_dir, dist_dir, config.build)
+                print(build_report.summary())
+                website_dir = dist_dir
+            
+            # Start local server (it may already be up from streamed files);
+            # restart it on dist when a build was made
+            if preview:
+                if not server_thread or config.build.enabled:
+                    start_local_server(str(website_dir), settings=config.preview)
+                print("\nYou can now view the redesigned website at:")
+                print(f"http://localhost:{PORT}")
         else:
             print("\nWarning: No website content found in the results")
-        
-        # Generate and save the report
-        report_content = format_report(results)
-        report_path = save_report(report_content)
-        print(f"Report saved to: {report_path}")
+    
+    # Complete the report with the CSS, build, compaction, rate-limit, routing, code execution and timing sections
+    add_summary_sections(report, build_report, compactor, tracer, governor, router, sandbox, css_report)
+    report_path = report.finish()
+    print(f"Report saved to: {report_path}")
+    if tracer:
+        tracer.shutdown()
+        print(tracer.summary())
+    return results, report_path
+
+def main(
+    config: Optional[Config] = None,
+    output_dir: Path = OUTPUT_DIR,
+    preview: bool = True,
+    task_configs: Optional[Dict[str, Dict[str, Any]]] = None,
+    rerun_from: Optional[str] = None
+):
+    print("\nStarting Website Redesign Project...")
+    
+    # Load configuration
+    print("Loading configuration...")
+    config = config or load_config()
+    task_configs = task_configs or load_tasks()
+    
+    try:
+        results, _ = run_pipeline(config, task_configs, output_dir, preview=preview, rerun_from=rerun_from)
         
         print("\nProject completed successfully!")
         
         # Keep the server running until user interrupts
-        try:
-            while True:
-                input("\nPress Ctrl+C to stop the server and exit...")
-        except KeyboardInterrupt:
-            print("\nStopping server...")
-            stop_local_server()
+        if preview:
+            try:
+                while True:
+                    input("\nPress Ctrl+C to stop the server and exit...")
+            except KeyboardInterrupt:
+                print("\nStopping server...")
+                stop_local_server()
         
         return results
         
@@ -0,0 +1,305 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+from langchain_openai import ChatOpenAI
+
+from .context_compaction import TokenCounter
+from .llm_governor import estimate_tokens, governed
+from .settings import LLMGovernorSettings, ModelProfile, ModelRoutingSettings
+from .tracing import annotate_span
+
+# Used by profiles without a model when $OPENAI_MODEL_NAME is unset
+DEFAULT_MODEL = "gpt-4"
+
+
+@dataclass
+class TaskModelUsage:
+    """The LLM calls of one task: profiles used, latency and tokens."""
+    task_id: str
+    # From tasks.yaml; None leaves each agent on its own profile
+    profile: Optional[str]
+    active: Optional[str] = None
+    started: float = field(default_factory=time.perf_counter)
+    # When ``active`` took over and the task's tokens at that point, so
+    # every profile's budget counts from its own start
+    switched: float = field(default_factory=time.perf_counter)
+    switched_tokens: int = 0
+    wall: float = 0.0
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_seconds: float = 0.0
+    # Calls per profile, in order of first use
+    profiles: Dict[str, int] = field(default_factory=dict)
+    models: Dict[str, str] = field(default_factory=dict)
+    fallbacks: List[str] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "profile": self.profile,
+            "profiles": self.profiles,
+            "models": self.models,
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "llm_seconds": round(self.llm_seconds, 3),
+            "wall_seconds": round(self.wall, 3),
+            "fallbacks": self.fallbacks,
+        }
+
+
+_usage_var: ContextVar[Optional[TaskModelUsage]] = ContextVar("crew_task_model_usage", default=None)
+
+
+def is_timeout(error: BaseException) -> bool:
+    """TimeoutError, or a client's timeout exception (openai.APITimeoutError, httpx timeouts)."""
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+
+class ModelRouter:
+    """
+    Chat models per profile, and the profile each LLM call goes to.
+
+    Agents get a RoutedChatModel for their agents.yaml profile. While a
+    task runs (inside ``task()``) its tasks.yaml profile, if any, takes
+    over for every call made for it, delegation included. A call is
+    moved to the profile's ``fallback`` once the task has spent the
+    profile's latency or token budget on it, and retried there when the
+    request times out; the task stays on the fallback from then on.
+    Every task's calls, tokens, LLM time and fallbacks are recorded.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[ModelRoutingSettings] = None,
+        llm_factory: Callable[..., BaseChatModel] = ChatOpenAI,
+        governor: Optional[LLMGovernorSettings] = None,
+        task_configs: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.settings = settings or ModelRoutingSettings()
+        self.llm_factory = llm_factory
+        self.governor = governor or LLMGovernorSettings()
+        self.task_profiles = {
+            task_id: task_config["model_profile"]
+            for task_id, task_config in (task_configs or {}).items()
+            if task_config.get("model_profile")
+        }
+        self.usage: List[TaskModelUsage] = []
+        self.counter = TokenCounter()
+        self._models: Dict[str, BaseChatModel] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, name: Optional[str]) -> str:
+        if not self.settings.enabled or not name:
+            return self.settings.default_profile
+        return name
+
+    def model_name(self, profile: ModelProfile) -> str:
+        return profile.model or os.environ.get("OPENAI_MODEL_NAME", DEFAULT_MODEL)
+
+    def model(self, name: Optional[str]) -> BaseChatModel:
+        """The (shared, governed) chat model of profile ``name``."""
+        name = self.resolve(name)
+        with self._lock:
+            if name not in self._models:
+                profile = self.settings.profiles[name]
+                # Streamed tokens reach the console and the partial report as they arrive
+                kwargs: Dict[str, Any] = {"model": self.model_name(profile), "streaming": True}
+                for key in ("temperature", "max_tokens", "timeout"):
+                    if getattr(profile, key) is not None:
+                        kwargs[key] = getattr(profile, key)
+                if self.governor.enabled:
+                    kwargs["max_retries"] = 0
+                self._models[name] = governed(self.llm_factory(**kwargs), self.governor)
+            return self._models[name]
+
+    def chat_model(self, profile: Optional[str] = None, callbacks: Optional[List[Any]] = None) -> "RoutedChatModel":
+        """A model for an agent whose own profile is ``profile``."""
+        return RoutedChatModel(self, profile=profile, callbacks=callbacks)
+
+    @contextmanager
+    def task(self, task_id: str) -> Iterator[TaskModelUsage]:
+        """Route and record the LLM calls made while ``task_id`` runs."""
+        profile = self.task_profiles.get(task_id) if self.settings.enabled else None
+        usage = TaskModelUsage(task_id, profile, active=profile)
+        token = _usage_var.set(usage)
+        try:
+            yield usage
+        finally:
+            _usage_var.reset(token)
+            usage.wall = time.perf_counter() - usage.started
+            if usage.calls:
+                with self._lock:
+                    self.usage.append(usage)
+
+    def route(self, default: Optional[str], commit: bool = False) -> str:
+        """
+        The profile for the next call of an agent whose profile is
+        ``default``, after budget fallbacks; ``commit`` moves the task on.
+        """
+        usage = _usage_var.get()
+        name = self.resolve(usage.active if usage and usage.active else default)
+        if usage is None or not self.settings.enabled:
+            return name
+        profile = self.settings.profiles[name]
+        reason = None
+        if profile.latency_budget and time.perf_counter() - usage.switched > profile.latency_budget:
+            reason = "latency"
+        elif profile.token_budget and usage.tokens - usage.switched_tokens > profile.token_budget:
+            reason = "tokens"
+        if reason and profile.fallback:
+            return self.fall_back(usage, name, reason) if commit else profile.fallback
+        return name
+
+    def fall_back(self, usage: Optional[TaskModelUsage], name: str, reason: str) -> str:
+        fallback = self.settings.profiles[name].fallback
+        if usage is not None:
+            usage.fallbacks.append(f"{name} -> {fallback} ({reason})")
+            usage.active = fallback
+            usage.switched = time.perf_counter()
+            usage.switched_tokens = usage.tokens
+            cause = "request timed out" if reason == "timeout" else f"{reason} budget exceeded"
+            print(f"\n[models] {usage.task_id}: {cause} on '{name}', continuing on '{fallback}'")
+        annotate_span(**{"llm.fallback": f"{name} -> {fallback} ({reason})"})
+        return fallback
+
+    def measure(self, name: str, started: float, messages: List[BaseMessage], result: ChatResult) -> None:
+        usage = _usage_var.get()
+        if usage is None:
+            return
+        reported = (result.llm_output or {}).get("token_usage") or {}
+        # Streamed responses carry no usage; count the text instead
+        prompt = reported.get("prompt_tokens") or estimate_tokens(messages, self.counter)
+        completion = reported.get("completion_tokens") or sum(
+            self.counter.count(g.text) for g in result.generations
+        )
+        usage.calls += 1
+        usage.prompt_tokens += prompt
+        usage.completion_tokens += completion
+        usage.llm_seconds += time.perf_counter() - started
+        usage.profiles[name] = usage.profiles.get(name, 0) + 1
+        usage.models[name] = self.model_name(self.settings.profiles[name])
+
+    def save(self, path: Path, **run: Any) -> None:
+        """Append one JSON line per recorded task, tagged with ``run``."""
+        if not self.usage:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(path, "a") as f:
+            for usage in self.usage:
+                f.write(json.dumps({"time": stamp, **run, **usage.record()}) + "\n")
+
+    def markdown(self) -> str:
+        lines = [
+            "| Task | Profiles | Calls | Prompt tokens | Completion tokens | LLM time | Wall time | Fallbacks |",
+            "| --- | --- | ---: | ---: | ---: | ---: | ---: | --- |",
+        ]
+        for u in self.usage:
+            profiles = ", ".join(f"{name} ({u.models[name]})" for name in u.profiles)
+            lines.append(
+                f"| {u.task_id} | {profiles} | {u.calls} | {u.prompt_tokens:,} | {u.completion_tokens:,} "
+                f"| {u.llm_seconds:.1f}s | {u.wall:.1f}s | {'; '.join(u.fallbacks) or '-'} |"
+            )
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        tokens = sum(u.tokens for u in self.usage)
+        fallbacks = sum(len(u.fallbacks) for u in self.usage)
+        return (
+            f"Model routing: {len(self.usage)} tasks, {sum(u.calls for u in self.usage)} LLM calls, "
+            f"{tokens:,} tokens, {fallbacks} fallbacks"
+        )
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    An agent's chat model: each call goes to the model of the profile the
+    router picks for it, with this model's run manager, so the agent's
+    callbacks see every token whichever model answers.
+    """
+
+    profile: Optional[str] = None
+
+    _router: ModelRouter = PrivateAttr()
+
+    def __init__(self, router: ModelRouter, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._router = router
+
+    @property
+    def wrapped(self) -> BaseChatModel:
+        return self._router.model(self._router.route(self.profile))
+
+    @property
+    def _llm_type(self) -> str:
+        return self.wrapped._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        # The LLM cache key follows the model that will answer
+        return self.wrapped._identifying_params
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        router = self._router
+        name = router.route(self.profile, commit=True)
+        started = time.perf_counter()
+        try:
+            result = router.model(name)._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except Exception as e:
+            if not is_timeout(e) or not router.settings.profiles[name].fallback:
+                raise
+            name = router.fall_back(_usage_var.get(), name, "timeout")
+            started = time.perf_counter()
+            result = router.model(name)._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        router.measure(name, started, messages, result)
+        return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        router = self._router
+        name = router.route(self.profile, commit=True)
+        started = time.perf_counter()
+        chunks: List[ChatGenerationChunk] = []
+        try:
+            for chunk in router.model(name)._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            # Only a request that produced nothing can be moved to another model
+            if chunks or not is_timeout(e) or not router.settings.profiles[name].fallback:
+                raise
+            name = router.fall_back(_usage_var.get(), name, "timeout")
+            started = time.perf_counter()
+            for chunk in router.model(name)._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+        router.measure(name, started, messages, ChatResult(generations=chunks))
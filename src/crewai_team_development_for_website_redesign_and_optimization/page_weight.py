@@ -0,0 +1,260 @@
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from pydantic import BaseModel, Field
+
+from .crawler import USER_AGENT
+from .html_metrics import _absolute, extract_metrics
+from .settings import PerformanceSettings
+
+CSS_IMPORT_RE = re.compile(r"""@import\s+(?:url\(\s*)?['"]?([^'")\s;]+)""", re.IGNORECASE)
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)""", re.IGNORECASE)
+FONT_EXTENSIONS = (".woff2", ".woff", ".ttf", ".otf", ".eot")
+TEXT_KINDS = {"document", "stylesheet", "script"}
+
+
+class ResourceResult(BaseModel):
+    url: str
+    kind: str
+    render_blocking: bool = False
+    parent: Optional[str] = None
+    status: Optional[int] = None
+    transfer_bytes: int = 0
+    decoded_bytes: int = 0
+    content_type: str = ""
+    content_encoding: str = ""
+    transfer_encoding: str = ""
+    cache_control: str = ""
+    etag: str = ""
+    last_modified: str = ""
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+class PageWeightReport(BaseModel):
+    url: str
+    resources: List[ResourceResult] = Field(default_factory=list)
+    measured_critical_path: float = 0.0
+    modelled_critical_path: float = 0.0
+    critical_chain: List[str] = Field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def transfer_bytes(self) -> int:
+        return sum(r.transfer_bytes for r in self.resources)
+
+    @property
+    def decoded_bytes(self) -> int:
+        return sum(r.decoded_bytes for r in self.resources)
+
+    def summary(self) -> str:
+        """Render page weight, critical path and caching findings as plain text."""
+        lines = [
+            f"Performance Test for {self.url}:",
+            f"Total page weight: {self.transfer_bytes / 1024:.1f} KB transferred, "
+            f"{self.decoded_bytes / 1024:.1f} KB decoded, {len(self.resources)} requests",
+            f"Critical path: {self.modelled_critical_path:.2f}s modelled, "
+            f"{self.measured_critical_path:.2f}s measured",
+            "Critical request chain: " + " -> ".join(self.critical_chain),
+            "Weight by type:",
+        ]
+        by_kind: Dict[str, List[ResourceResult]] = {}
+        for r in self.resources:
+            by_kind.setdefault(r.kind, []).append(r)
+        for kind, items in sorted(by_kind.items()):
+            lines.append(
+                f"- {kind}: {len(items)} requests, "
+                f"{sum(r.transfer_bytes for r in items) / 1024:.1f} KB transferred"
+            )
+
+        blocking = [r for r in self.resources if r.render_blocking and r.kind != "document"]
+        lines.append(f"Render-blocking requests: {len(blocking)}")
+        lines += [f"- {r.url} ({r.transfer_bytes / 1024:.1f} KB, {r.elapsed:.2f}s)" for r in blocking]
+
+        uncompressed = [
+            r for r in self.resources
+            if r.kind in TEXT_KINDS and not r.content_encoding and r.decoded_bytes > 1024
+        ]
+        if uncompressed:
+            lines.append("Text resources served without compression:")
+            lines += [f"- {r.url} ({r.decoded_bytes / 1024:.1f} KB)" for r in uncompressed]
+
+        uncached = [
+            r for r in self.resources
+            if r.kind != "document" and r.status == 200 and not _cacheable(r.cache_control)
+        ]
+        if uncached:
+            lines.append("Static resources without a long-lived Cache-Control:")
+            lines += [f"- {r.url} (Cache-Control: {r.cache_control or 'none'})" for r in uncached]
+
+        failed = [r for r in self.resources if r.error or (r.status and r.status >= 400)]
+        if failed:
+            lines.append("Failed requests:")
+            lines += [f"- {r.url}: {r.error or r.status}" for r in failed]
+
+        lines.append("Largest resources:")
+        for r in sorted(self.resources, key=lambda r: r.transfer_bytes, reverse=True)[:5]:
+            lines.append(
+                f"- {r.url} | {r.kind} | {r.transfer_bytes / 1024:.1f} KB | "
+                f"encoding: {r.content_encoding or 'identity'} | "
+                f"cache: {r.cache_control or 'none'}"
+            )
+        return "\n".join(lines)
+
+
+def _cacheable(cache_control: str) -> bool:
+    """Static assets should be cacheable for at least a day."""
+    directives = cache_control.lower()
+    if "no-store" in directives or "no-cache" in directives:
+        return False
+    match = re.search(r"max-age=(\d+)", directives)
+    return bool(match) and int(match.group(1)) >= 86400
+
+
+class PageWeightAnalyzer:
+    """
+    Resolve and fetch every subresource of a page over a pooled async client.
+
+    Stylesheets are parsed for ``@import`` and ``url()`` references (fonts,
+    background images), which are fetched as children of the stylesheet. The
+    critical path is the HTML document followed by the slowest chain of
+    render-blocking resources (stylesheet -> @import -> font), computed both
+    from measured fetch times and from the configured RTT/bandwidth model.
+    """
+
+    def __init__(self, settings: Optional[PerformanceSettings] = None):
+        self.settings = settings or PerformanceSettings()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._results: Dict[str, ResourceResult] = {}
+        self._children: Dict[str, List[str]] = {}
+
+    async def analyze(self, url: str) -> PageWeightReport:
+        settings = self.settings
+        self._slots = asyncio.Semaphore(settings.concurrency)
+        self._results = {}
+        self._children = {}
+        started = time.perf_counter()
+        limits = httpx.Limits(max_connections=settings.concurrency, max_keepalive_connections=settings.concurrency)
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=settings.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        ) as client:
+            self._client = client
+            document, body = await self._fetch(url, "document", True, None)
+            if document.error or not body:
+                raise ValueError(f"could not fetch {url}: {document.error or document.status}")
+            metrics = extract_metrics(body, document.url, collect_resources=True)
+            await asyncio.gather(*[
+                self._fetch_tree(resource_url, kind, blocking, document.url)
+                for kind, resource_url, blocking in _dedupe(metrics.resources)
+            ])
+
+        report = PageWeightReport(url=document.url, resources=list(self._results.values()))
+        report.duration = time.perf_counter() - started
+        self._compute_critical_path(report, document)
+        return report
+
+    async def _fetch_tree(self, url: str, kind: str, blocking: bool, parent: str) -> None:
+        if url in self._results:
+            return
+        _, body = await self._fetch(url, kind, blocking, parent)
+        if kind != "stylesheet" or not body:
+            return
+        references = list(_css_references(body, url))
+        self._children[url] = [child_url for child_url, _ in references]
+        # An @import or font inside a blocking stylesheet blocks rendering too
+        await asyncio.gather(*[
+            self._fetch_tree(child_url, child_kind, blocking and child_kind in ("stylesheet", "font"), url)
+            for child_url, child_kind in references
+        ])
+
+    async def _fetch(self, url: str, kind: str, blocking: bool, parent: Optional[str]):
+        result = ResourceResult(url=url, kind=kind, render_blocking=blocking, parent=parent)
+        self._results[url] = result
+        body = None
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                response = await self._client.get(url)
+            except httpx.HTTPError as e:
+                result.elapsed = time.perf_counter() - started
+                result.error = f"{type(e).__name__}: {e}"
+                return result, None
+        result.elapsed = time.perf_counter() - started
+        headers = response.headers
+        result.url = str(response.url) if kind == "document" else url
+        result.status = response.status_code
+        result.transfer_bytes = response.num_bytes_downloaded
+        result.decoded_bytes = len(response.content)
+        result.content_type = headers.get("content-type", "")
+        result.content_encoding = headers.get("content-encoding", "")
+        result.transfer_encoding = headers.get("transfer-encoding", "")
+        result.cache_control = headers.get("cache-control", "")
+        result.etag = headers.get("etag", "")
+        result.last_modified = headers.get("last-modified", "")
+        if response.status_code < 400 and kind in ("document", "stylesheet"):
+            body = response.text
+        return result, body
+
+    def _compute_critical_path(self, report: PageWeightReport, document: ResourceResult) -> None:
+        settings = self.settings
+        page_origin = urlsplit(document.url).netloc
+
+        def modelled(r: ResourceResult) -> float:
+            # One round trip per request, plus DNS/TCP/TLS set-up for other origins
+            rtts = 1 if urlsplit(r.url).netloc == page_origin else 3
+            return rtts * settings.rtt_ms / 1000 + r.transfer_bytes * 8 / (settings.downlink_kbps * 1000)
+
+        def chain(url: str, cost, visited: Set[str]) -> Tuple[float, List[str]]:
+            r = self._results[url]
+            best, best_chain = 0.0, []
+            for child in self._children.get(url, []):
+                if child not in visited and self._results[child].render_blocking:
+                    child_cost, child_chain = chain(child, cost, visited | {child})
+                    if child_cost > best:
+                        best, best_chain = child_cost, child_chain
+            return cost(r) + best, [url] + best_chain
+
+        def longest(cost):
+            best, best_chain = 0.0, []
+            for r in report.resources:
+                if r.render_blocking and r.parent == document.url:
+                    total, path = chain(r.url, cost, {r.url})
+                    if total > best:
+                        best, best_chain = total, path
+            return cost(document) + best, [document.url] + best_chain
+
+        report.measured_critical_path, _ = longest(lambda r: r.elapsed)
+        report.modelled_critical_path, report.critical_chain = longest(modelled)
+
+
+def _dedupe(resources):
+    seen: Set[str] = set()
+    for kind, url, blocking in resources:
+        if url not in seen and urlsplit(url).scheme in ("http", "https"):
+            seen.add(url)
+            yield kind, url, blocking
+
+
+def _css_references(css: str, base_url: str):
+    """Yield ``(absolute url, kind)`` for each @import and url() in a stylesheet."""
+    # Invalid URLs ("http://[oops/") are skipped like in the HTML extractor
+    imports = set(filter(None, (_absolute(base_url, m) for m in CSS_IMPORT_RE.findall(css))))
+    for url in sorted(imports):
+        yield url, "stylesheet"
+    for ref in CSS_URL_RE.findall(css):
+        ref = ref.strip()
+        if ref.startswith("data:"):
+            continue
+        url = _absolute(base_url, ref)
+        if url is None or url in imports:
+            continue
+        path = urlsplit(url).path.lower()
+        yield url, "font" if path.endswith(FONT_EXTENSIONS) else "image"
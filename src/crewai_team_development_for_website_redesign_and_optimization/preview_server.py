@@ -0,0 +1,351 @@
+import email.utils
+import gzip
+import http.server
+import os
+import re
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+
+from .settings import PreviewSettings
+
+# Served with a long-lived, immutable Cache-Control (names from site_build)
+FINGERPRINTED_RE = re.compile(r"\.[0-9a-f]{6,64}\.[A-Za-z0-9]+$")
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+# Precompressed siblings in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@dataclass(slots=True)
+class CachedFile:
+    """One representation of a file as served: identity or one content coding."""
+    path: str
+    mtime_ns: int
+    size: int
+    etag: str
+    last_modified: str
+    content_type: str
+    encoding: Optional[str] = None
+    body: Optional[bytes] = None
+
+
+class FileCache:
+    """
+    Thread-safe LRU of file bodies keyed by (path, content coding).
+
+    Every lookup stats the file and drops the entry when its mtime or size
+    changed, so regenerated files are picked up on the next request. Files
+    above ``max_file_bytes`` are described (ETag, type) but their body is
+    streamed from disk instead of being held in memory.
+    """
+
+    def __init__(self, max_bytes: int, max_file_bytes: int, compress_on_the_fly: bool = True):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.compress_on_the_fly = compress_on_the_fly
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], CachedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, content_type: str, encoding: Optional[str] = None) -> Optional[CachedFile]:
+        """
+        Return the file (or its precompressed sibling for ``encoding``), or
+        None when that representation isn't available.
+        """
+        source = path + dict(ENCODINGS).get(encoding, "") if encoding else path
+        try:
+            st = os.stat(source)
+        except OSError:
+            if encoding == "gzip" and self.compress_on_the_fly and content_type.startswith(COMPRESSIBLE_TYPES):
+                return self._compressed(path, content_type)
+            return None
+        if encoding:
+            # A sibling older than its source is stale; ignore it
+            try:
+                if os.stat(path).st_mtime_ns > st.st_mtime_ns:
+                    return None
+            except OSError:
+                return None
+        key = (path, encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        self.misses += 1
+        entry = CachedFile(
+            path=source,
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
+            etag=f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"',
+            last_modified=email.utils.formatdate(st.st_mtime, usegmt=True),
+            content_type=content_type,
+            encoding=encoding,
+        )
+        if st.st_size <= self.max_file_bytes:
+            with open(source, "rb") as f:
+                entry.body = f.read()
+            # The file may have changed between stat and read
+            entry.size = len(entry.body)
+            self._store(key, entry)
+        return entry
+
+    def _compressed(self, path: str, content_type: str) -> Optional[CachedFile]:
+        """Gzip a text file in memory once, for sites served without a build."""
+        identity = self.get(path, content_type)
+        if identity is None or identity.body is None or identity.size < 1024:
+            return None
+        key = (path, "gzip")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == identity.mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        body = gzip.compress(identity.body, compresslevel=6, mtime=0)
+        if len(body) >= identity.size:
+            return None
+        entry = CachedFile(
+            path=path,
+            mtime_ns=identity.mtime_ns,
+            size=len(body),
+            etag=identity.etag[:-1] + '-gzip"',
+            last_modified=identity.last_modified,
+            content_type=content_type,
+            encoding="gzip",
+            body=body,
+        )
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry: CachedFile) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Resolve a single ``bytes=`` range to inclusive (start, end).
+
+    Returns None for headers this server ignores (multiple ranges, other
+    units) and raises ValueError for a range that can't be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise ValueError("range on an empty file")
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class PreviewRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Static file handler for the preview: HTTP/1.1 keep-alive, in-memory
+    file cache, ETag/Last-Modified revalidation, Cache-Control, precompressed
+    sibling negotiation and single byte ranges. Directory listings and
+    redirects fall back to SimpleHTTPRequestHandler.
+    """
+    protocol_version = "HTTP/1.1"
+    cache: FileCache
+    settings: PreviewSettings
+
+    def log_message(self, format, *args):
+        # Keep crawls of the preview from flooding the console
+        pass
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head: bool) -> None:
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                # Redirects and directory listings
+                return super().do_HEAD() if head else super().do_GET()
+            path = index
+        if path.endswith("/") or not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        content_type = self.guess_type(path)
+        range_header = self.headers.get("Range")
+        entry = None
+        if not range_header:
+            accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+            for coding, _ in ENCODINGS:
+                if accepted.get(coding, 0) > 0:
+                    entry = self.cache.get(path, content_type, coding)
+                    if entry is not None:
+                        break
+        if entry is None:
+            entry = self.cache.get(path, content_type)
+        if entry is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        if self._not_modified(entry):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_validators(entry, path)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, entry.size - 1
+        status = HTTPStatus.OK
+        if range_header and self._if_range_matches(entry):
+            try:
+                resolved = parse_range(range_header, entry.size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{entry.size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if resolved is not None:
+                start, end = resolved
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header("Content-Type", entry.content_type)
+        if entry.encoding:
+            self.send_header("Content-Encoding", entry.encoding)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{entry.size}")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(max(end - start + 1, 0)))
+        self._send_validators(entry, path)
+        self.end_headers()
+        if head or entry.size == 0:
+            return
+        if entry.body is not None:
+            self.wfile.write(entry.body[start:end + 1])
+        else:
+            with open(entry.path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 256 * 1024))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+    def _send_validators(self, entry: CachedFile, path: str) -> None:
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", entry.last_modified)
+        if FINGERPRINTED_RE.search(os.path.basename(path)):
+            self.send_header("Cache-Control", f"public, max-age={self.settings.immutable_max_age}, immutable")
+        else:
+            # Unhashed files (HTML, raw preview) must be revalidated every time
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def _not_modified(self, entry: CachedFile) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            return "*" in tags or entry.etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(entry.mtime_ns // 1_000_000_000) <= since
+        return False
+
+    def _if_range_matches(self, entry: CachedFile) -> bool:
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == entry.etag
+        return if_range == entry.last_modified
+
+
+class PreviewServer(socketserver.ThreadingTCPServer):
+    """One thread per connection so concurrent clients (and crawls) don't queue."""
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Browsers and load tests routinely hang up mid-response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_preview_server(directory: str, port: int, settings: Optional[PreviewSettings] = None) -> PreviewServer:
+    """Bind a preview server for ``directory`` with its own file cache."""
+    settings = settings or PreviewSettings()
+    cache = FileCache(
+        settings.cache_max_mb * 1024 * 1024,
+        settings.cache_max_file_kb * 1024,
+        compress_on_the_fly=settings.compress_on_the_fly,
+    )
+
+    class Handler(PreviewRequestHandler):
+        # Idle keep-alive connections are closed after this many seconds
+        timeout = settings.keepalive_timeout
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+    Handler.cache = cache
+    Handler.settings = settings
+    return PreviewServer(("", port), Handler)
@@ -0,0 +1,148 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+REPORT_TITLE = "# Website Redesign Project Report"
+
+# Every langchain callback manager configured while this is set streams into the report
+_stream_var: ContextVar[Optional["ReportStreamHandler"]] = ContextVar("crew_report_stream", default=None)
+register_configure_hook(_stream_var, inheritable=True)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+class ReportStreamHandler(BaseCallbackHandler):
+    """Forward one task's LLM tokens to the report (and, when it owns it, the console)."""
+
+    run_inline = True
+
+    def __init__(self, report: "IncrementalReport", task_id: Optional[str]):
+        self.report = report
+        self.task_id = task_id
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.report.stream_token(self.task_id, token)
+
+
+class IncrementalReport:
+    """
+    report.md, filled in section by section as tasks finish.
+
+    Each task's output goes to the section named by ``report_section`` in
+    its tasks.yaml entry; tasks without one (the frontend code, which is
+    saved as site files) are left out. Sections appear in tasks.yaml order
+    and the file is rewritten atomically after every task, so it is always
+    complete up to the last finished task.
+
+    While a task runs, its streamed LLM tokens are echoed to the console
+    (by one task at a time) and collected into ``report.partial.md``, a
+    copy of the report whose running sections hold the text so far. It is
+    rewritten at most every ``flush_interval`` seconds and removed once the
+    run ends.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        task_configs: Dict[str, Dict[str, Any]],
+        console: bool = True,
+        flush_interval: float = 1.0,
+    ):
+        self.path = Path(path) if path else None
+        self.partial_path = self.path.with_name(self.path.stem + ".partial.md") if self.path else None
+        self.order = list(task_configs)
+        self.sections = {
+            task_id: task_config["report_section"]
+            for task_id, task_config in task_configs.items()
+            if task_config.get("report_section")
+        }
+        self.console = console
+        self.flush_interval = flush_interval
+        self.outputs: Dict[str, str] = {}
+        self.extra: List[str] = []
+        self._streams: Dict[Optional[str], List[str]] = {}
+        self._console_owner: Optional[str] = None
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stream(self, task_id: Optional[str]) -> Iterator[None]:
+        """Stream the LLM tokens produced in this context into ``task_id``'s section."""
+        token = _stream_var.set(ReportStreamHandler(self, task_id))
+        try:
+            yield
+        finally:
+            _stream_var.reset(token)
+            with self._lock:
+                self._streams.pop(task_id, None)
+                if self._console_owner == task_id:
+                    self._console_owner = None
+
+    def stream_token(self, task_id: Optional[str], token: str) -> None:
+        with self._lock:
+            if task_id is None:
+                # crewai's own sequential process: the first unfinished task is the running one
+                task_id = next((t for t in self.order if t not in self.outputs), None)
+            self._streams.setdefault(task_id, []).append(token)
+            if self.console and self._console_owner in (None, task_id):
+                self._console_owner = task_id
+                sys.stdout.write(token)
+                sys.stdout.flush()
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                self._last_flush = time.monotonic()
+        if due and self.partial_path:
+            _write_atomic(self.partial_path, self._render(partial=True))
+
+    def add(self, task_id: str, output: str) -> None:
+        """Record a finished task's output and rewrite report.md."""
+        with self._lock:
+            self.outputs[task_id] = output
+            self._streams.pop(task_id, None)
+        if self.path and task_id in self.sections:
+            _write_atomic(self.path, self.render())
+            print(f"\n[report] {self.sections[task_id]} written to {self.path}")
+
+    def add_section(self, title: str, body: str) -> None:
+        """Append a section after the task sections (build, compaction, timings)."""
+        self.extra.append(f"## {title}\n{body}\n")
+
+    def render(self) -> str:
+        return self._render(partial=False)
+
+    def _render(self, partial: bool) -> str:
+        with self._lock:
+            parts = [REPORT_TITLE + "\n"]
+            for task_id, title in self.sections.items():
+                if task_id in self.outputs:
+                    parts.append(f"## {title}\n{self.outputs[task_id]}\n")
+                elif partial and task_id in self._streams:
+                    parts.append(f"## {title} (in progress)\n{''.join(self._streams[task_id])}\n")
+                else:
+                    parts.append(f"## {title}\n")
+            parts += self.extra
+        return "\n".join(parts)
+
+    def finish(self) -> Optional[Path]:
+        """Write the final report and remove the partial file."""
+        if not self.path:
+            return None
+        _write_atomic(self.path, self.render())
+        if self.partial_path.exists():
+            self.partial_path.unlink()
+        return self.path
@@ -0,0 +1,359 @@
+import atexit
+import json
+import os
+import queue
+import re
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .load_test import LatencyHistogram
+from .settings import SandboxSettings
+
+WORKER_SCRIPT = Path(__file__).with_name("sandbox_worker.py")
+# Seconds a new worker gets to import its preload modules and report ready
+STARTUP_TIMEOUT = 30.0
+
+_FENCE_RE = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+
+
+def extract_code(text: str) -> str:
+    """The code in an agent's tool input: fenced blocks joined, or the input as is."""
+    blocks = _FENCE_RE.findall(text)
+    return "\n".join(blocks) if blocks else text.strip()
+
+
+@dataclass
+class ExecutionResult:
+    ok: bool
+    stdout: str = ""
+    stderr: str = ""
+    result: Optional[str] = None
+    error: Optional[str] = None
+    # "cpu", "memory" or "wall" when the execution was stopped by a limit
+    limit: Optional[str] = None
+    worker_pid: Optional[int] = None
+    # This execution's number on its worker (1 for a fresh worker)
+    worker_run: int = 0
+    # No warm worker was free, so this execution started one
+    cold: bool = False
+    queue_ms: float = 0.0
+    exec_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def summary(self) -> str:
+        state = "cold start" if self.cold else "warm worker"
+        status = "OK" if self.ok else f"failed ({self.limit} limit)" if self.limit else "failed"
+        lines = [
+            f"Execution {status} in {self.total_ms:.0f} ms "
+            f"({state} pid {self.worker_pid}, run {self.worker_run}; "
+            f"waited {self.queue_ms:.0f} ms, ran {self.exec_ms:.0f} ms)"
+        ]
+        if self.stdout:
+            lines += ["stdout:", self.stdout.rstrip()]
+        if self.stderr:
+            lines += ["stderr:", self.stderr.rstrip()]
+        if self.result is not None:
+            lines.append(f"Result: {self.result}")
+        if self.error:
+            lines += ["Error:", self.error]
+        return "\n".join(lines)
+
+
+class _Worker:
+    """One warm interpreter running sandbox_worker.py, spoken to over pipes."""
+
+    def __init__(self, settings: SandboxSettings, root: Path):
+        started = time.perf_counter()
+        limits = {
+            "preload": settings.preload,
+            "cpu_seconds": settings.cpu_seconds,
+            "max_executions": settings.max_executions,
+            "memory_mb": settings.memory_mb,
+        }
+        # -I: no user site-packages, no PYTHON* variables, no script directory on sys.path
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", str(WORKER_SCRIPT), json.dumps(limits)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=root,
+            env={"PATH": os.environ.get("PATH", ""), "HOME": str(root), "TMPDIR": str(root), "LANG": "C.UTF-8"},
+            start_new_session=True,
+        )
+        self.runs = 0
+        self._buffer = b""
+        try:
+            ready = self.receive(STARTUP_TIMEOUT)
+        except EOFError:
+            ready = None
+        if not ready or not ready.get("ready"):
+            self.kill()
+            raise RuntimeError("sandbox worker failed to start")
+        self.pid: int = ready["pid"]
+        self.rss_mb: float = ready["rss_mb"]
+        self.startup_seconds = time.perf_counter() - started
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.process.stdin.flush()
+
+    def receive(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """The next message, or None when none arrives within ``timeout`` seconds."""
+        fd = self.process.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                raise EOFError("sandbox worker exited")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return json.loads(line)
+
+    def kill(self) -> None:
+        # The worker leads its own session, so this also stops anything it spawned
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.process.wait()
+
+    def close(self) -> None:
+        try:
+            self.send({"op": "exit"})
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+class SandboxPool:
+    """
+    Pre-started Python workers that run agent code, so an execution costs
+    a dispatch over a pipe instead of an interpreter start.
+
+    Each worker is a local subprocess in its own session, started in
+    isolated mode with a minimal environment, under an address-space limit
+    and with a CPU-time and wall-time limit per execution. Code runs in a
+    fresh namespace and scratch directory, and whatever it imported or
+    changed is undone afterwards. A worker is replaced (in the background,
+    so the pool stays warm) after ``max_executions`` runs, once its RSS
+    passes ``max_worker_rss_mb``, when code leaves a thread running in it,
+    or when it hits a limit or dies. This is
+    process isolation, not a security boundary: the code runs as the
+    current user with network access. POSIX only.
+    """
+
+    def __init__(self, settings: Optional[SandboxSettings] = None):
+        self.settings = settings or SandboxSettings()
+        self.root = Path(tempfile.mkdtemp(prefix="crew-sandbox-"))
+        self.executions = 0
+        self.failures = 0
+        self.cold_starts = 0
+        self.limits: Counter = Counter()
+        self.recycled: Counter = Counter()
+        self.total = LatencyHistogram()
+        self.dispatch = LatencyHistogram()
+        self.startup = LatencyHistogram()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        # Workers alive or being started, idle or busy
+        self._live = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self, wait: bool = True) -> None:
+        """Start workers up to the pool size; with ``wait=False`` in the background."""
+        with self._lock:
+            missing = self.settings.workers - self._live
+            self._live += max(missing, 0)
+        threads = [threading.Thread(target=self._spawn, daemon=True) for _ in range(missing)]
+        for thread in threads:
+            thread.start()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _spawn(self) -> None:
+        try:
+            worker = _Worker(self.settings, self.root)
+        except (OSError, RuntimeError) as e:
+            print(f"Sandbox worker could not be started: {e}")
+            with self._lock:
+                self._live -= 1
+            return
+        self.startup.record(worker.startup_seconds)
+        if self._closed:
+            worker.close()
+        else:
+            self._idle.put(worker)
+
+    def _checkout(self) -> Tuple[_Worker, bool]:
+        while True:
+            try:
+                return self._idle.get_nowait(), False
+            except queue.Empty:
+                pass
+            with self._lock:
+                start_one = self._live < self.settings.workers
+                if start_one:
+                    self._live += 1
+            if start_one:
+                try:
+                    worker = _Worker(self.settings, self.root)
+                except BaseException:
+                    with self._lock:
+                        self._live -= 1
+                    raise
+                self.startup.record(worker.startup_seconds)
+                return worker, True
+            try:
+                return self._idle.get(timeout=0.5), False
+            except queue.Empty:
+                # A replacement may have failed to start; check the count again
+                continue
+
+    def _checkin(self, worker: _Worker, reason: Optional[str]) -> None:
+        if reason is None:
+            if worker.runs >= self.settings.max_executions:
+                reason = "max executions"
+            elif worker.rss_mb > self.settings.max_worker_rss_mb:
+                reason = "memory growth"
+        if reason is None and not self._closed:
+            self._idle.put(worker)
+            return
+        if reason:
+            self.recycled[reason] += 1
+        if reason in ("max executions", "memory growth"):
+            worker.close()
+        else:
+            worker.kill()
+        with self._lock:
+            self._live -= 1
+        if not self._closed:
+            self.start(wait=False)
+
+    def execute(self, code: str, timeout: Optional[float] = None) -> ExecutionResult:
+        """Run ``code`` on a warm worker and return its output and timings."""
+        if self._closed:
+            raise RuntimeError("sandbox pool is closed")
+        started = time.perf_counter()
+        worker, cold = self._checkout()
+        dispatched = time.perf_counter()
+        result = ExecutionResult(ok=False, worker_pid=worker.pid, worker_run=worker.runs + 1, cold=cold)
+        reason = None
+        try:
+            worker.send({
+                "code": code,
+                "cpu_seconds": self.settings.cpu_seconds,
+                "max_output_chars": self.settings.max_output_chars,
+            })
+            response = worker.receive(timeout or self.settings.wall_seconds)
+        except (OSError, EOFError, ValueError):
+            response, reason = None, "crashed"
+            result.error = "The sandbox worker exited during the execution (killed by a limit or crashed)."
+        if response is None and reason is None:
+            result.limit, reason = "wall", "wall limit"
+            result.error = f"Wall-time limit of {timeout or self.settings.wall_seconds:g}s exceeded; the worker was stopped."
+        elif response is not None:
+            worker.runs += 1
+            worker.rss_mb = response["rss_mb"]
+            result.ok = response["ok"]
+            result.stdout = response["stdout"]
+            result.stderr = response["stderr"]
+            result.result = response["result"]
+            result.error = response["error"]
+            result.limit = response["limit"]
+            result.exec_ms = response["exec_ms"]
+            reason = f"{result.limit} limit" if result.limit else None
+            if reason is None and response.get("threads"):
+                # It would keep writing into, and using the CPU slice of, later runs
+                reason = "stray threads"
+        self._checkin(worker, reason)
+
+        result.queue_ms = (dispatched - started) * 1000
+        result.total_ms = (time.perf_counter() - started) * 1000
+        if not result.exec_ms:
+            result.exec_ms = result.total_ms - result.queue_ms
+        with self._lock:
+            self.executions += 1
+            self.failures += not result.ok
+            self.cold_starts += cold
+            if result.limit:
+                self.limits[result.limit] += 1
+        self.total.record(result.total_ms / 1000)
+        self.dispatch.record((result.total_ms - result.exec_ms) / 1000)
+        return result
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def summary(self) -> str:
+        recycled = ", ".join(f"{reason} {n}" for reason, n in self.recycled.most_common()) or "none"
+        return (
+            f"Code execution: {self.executions} runs ({self.failures} failed, {self.cold_starts} cold), "
+            f"total p50 {self.total.percentile(50) * 1000:.0f} ms / p95 {self.total.percentile(95) * 1000:.0f} ms, "
+            f"dispatch overhead p50 {self.dispatch.percentile(50) * 1000:.1f} ms, "
+            f"worker start p50 {self.startup.percentile(50) * 1000:.0f} ms; recycled: {recycled}"
+        )
+
+    def markdown(self) -> str:
+        limits = ", ".join(f"{kind} {n}" for kind, n in self.limits.most_common()) or "none"
+        recycled = ", ".join(f"{reason} {n}" for reason, n in self.recycled.most_common()) or "none"
+        lines = [
+            "| Runs | Failed | Cold | Total p50 | Total p95 | Dispatch p50 | Worker start p50 | Limits hit | Recycled |",
+            "| ---: | ---: | ---: | ---: | ---: | ---: | ---: | --- | --- |",
+            f"| {self.executions} | {self.failures} | {self.cold_starts} "
+            f"| {self.total.percentile(50) * 1000:.0f} ms | {self.total.percentile(95) * 1000:.0f} ms "
+            f"| {self.dispatch.percentile(50) * 1000:.1f} ms | {self.startup.percentile(50) * 1000:.0f} ms "
+            f"| {limits} | {recycled} |",
+        ]
+        return "\n".join(lines)
+
+
+_shared: Optional[SandboxPool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_sandbox(settings: Optional[SandboxSettings] = None) -> SandboxPool:
+    """The process-wide pool, created with the first caller's settings and closed at exit."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SandboxPool(settings)
+            atexit.register(_shared.close)
+        return _shared
+
+
+def active_sandbox() -> Optional[SandboxPool]:
+    """The shared pool if anything has created it."""
+    return _shared
+
+
+def execute_code(tool_input: str, settings: Optional[SandboxSettings] = None) -> str:
+    """Run the Python code in ``tool_input`` on the shared sandbox pool."""
+    try:
+        if settings is not None and not settings.enabled:
+            return "Error: code execution is disabled (sandbox.enabled in config.yaml)."
+        code = extract_code(tool_input)
+        if not code:
+            return "Error: no code given."
+        return shared_sandbox(settings).execute(code).summary()
+    except Exception as e:
+        return f"Error executing code: {str(e)}"
@@ -0,0 +1,199 @@
+"""
+Code execution worker started by ``sandbox.SandboxPool``.
+
+Runs as a standalone script (``python -I sandbox_worker.py <limits>``) and
+imports only the standard library. Requests arrive as one JSON object per
+line on stdin and each answer is one JSON line on the original stdout.
+Agent code cannot reach either pipe: file descriptors 0 and 1 point at
+/dev/null once the worker is up, and ``sys.stdout``/``sys.stderr`` are
+captured per execution. Between executions the worker drops the pure-Python
+modules, ``sys.path`` entries, environment changes and files the code left
+behind (packages with C extensions, which can't be loaded twice, stay);
+threads it leaves running can't be stopped, so they are reported and the
+pool replaces the worker.
+"""
+import ast
+import contextlib
+import gc
+import importlib
+import importlib.machinery
+import io
+import json
+import linecache
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # no rlimits on Windows; only the wall-time limit applies
+    resource = None
+
+FILENAME = "<agent>"
+
+
+class CPULimitExceeded(Exception):
+    pass
+
+
+def _on_sigxcpu(signum, frame):
+    raise CPULimitExceeded("CPU time limit exceeded")
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        if resource is None:
+            return 0.0
+        # Peak instead of current where /proc is missing; ru_maxrss is bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2 ** 20 if sys.platform == "darwin" else 1024)
+
+
+def _thread_count() -> int:
+    # /proc also sees threads started through _thread, which threading doesn't
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return threading.active_count()
+
+
+def _reloadable(module) -> bool:
+    """Whether ``module`` can be imported again after leaving sys.modules."""
+    origin = getattr(getattr(module, "__spec__", None), "origin", None) or ""
+    return origin != "built-in" and not origin.endswith(tuple(importlib.machinery.EXTENSION_SUFFIXES))
+
+
+def _unload(names) -> None:
+    """Drop the modules in ``names``, except whole top-level packages holding an extension."""
+    loaded = [(name, sys.modules[name]) for name in names if name in sys.modules]
+    pinned = {name.partition(".")[0] for name, module in loaded if not _reloadable(module)}
+    for name, _ in loaded:
+        if name.partition(".")[0] not in pinned:
+            del sys.modules[name]
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit] + f"\n... ({len(text) - limit} more characters)"
+
+
+def _run(code: str, namespace: dict):
+    """Execute ``code``; like the REPL, return the repr of a final expression."""
+    tree = ast.parse(code, FILENAME, "exec")
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+    exec(compile(tree, FILENAME, "exec"), namespace)
+    if last is not None:
+        value = eval(compile(last, FILENAME, "eval"), namespace)
+        if value is not None:
+            return repr(value)
+    return None
+
+
+def _format_error(error: BaseException) -> str:
+    # Only the agent's own frames; the worker's are noise to it
+    frames = [f for f in traceback.extract_tb(error.__traceback__) if f.filename == FILENAME]
+    lines = ["Traceback (most recent call last):\n", *traceback.format_list(frames)] if frames else []
+    return "".join(lines + traceback.format_exception_only(type(error), error)).rstrip()
+
+
+def execute(request: dict) -> dict:
+    code = request["code"]
+    limit = request.get("max_output_chars", 8000)
+    modules = set(sys.modules)
+    path = list(sys.path)
+    environ = dict(os.environ)
+    cwd = os.getcwd()
+    work = tempfile.mkdtemp(prefix="run-", dir=cwd)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    response = {"ok": True, "result": None, "error": None, "limit": None}
+    linecache.cache[FILENAME] = (len(code), None, code.splitlines(True), FILENAME)
+    if resource is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(_cpu_seconds()) + 1 + request["cpu_seconds"]
+        resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+    started = time.perf_counter()
+    cpu_started = _cpu_seconds() if resource is not None else 0.0
+    try:
+        os.chdir(work)
+        sys.stdin = io.StringIO("")
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            response["result"] = _run(code, {"__name__": "__main__", "__builtins__": __builtins__})
+    except BaseException as e:  # SystemExit and KeyboardInterrupt from agent code included
+        response["ok"] = False
+        response["error"] = _format_error(e)
+        if isinstance(e, CPULimitExceeded):
+            response["limit"] = "cpu"
+        elif isinstance(e, MemoryError):
+            response["limit"] = "memory"
+    finally:
+        response["exec_ms"] = (time.perf_counter() - started) * 1000
+        if resource is not None:
+            response["cpu_ms"] = (_cpu_seconds() - cpu_started) * 1000
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        sys.stdin = sys.__stdin__
+        os.chdir(cwd)
+        shutil.rmtree(work, ignore_errors=True)
+        _unload(set(sys.modules) - modules)
+        sys.path[:] = path
+        os.environ.clear()
+        os.environ.update(environ)
+        linecache.cache.pop(FILENAME, None)
+        gc.collect()
+    response["stdout"] = _truncate(stdout.getvalue(), limit)
+    response["stderr"] = _truncate(stderr.getvalue(), limit)
+    response["result"] = _truncate(response["result"], limit) if response["result"] else None
+    response["rss_mb"] = _rss_mb()
+    response["threads"] = _thread_count() - 1
+    return response
+
+
+def main() -> None:
+    limits = json.loads(sys.argv[1])
+    for name in limits.get("preload", []):
+        importlib.import_module(name)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+        # The hard limit caps the worker's whole life; each run gets a soft slice
+        lifetime = limits["cpu_seconds"] * (limits["max_executions"] + 1) + 10
+        resource.setrlimit(resource.RLIMIT_CPU, (lifetime, lifetime))
+        if limits.get("memory_mb"):
+            size = limits["memory_mb"] * 2 ** 20
+            with contextlib.suppress(ValueError, OSError):
+                resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    def reply(message: dict) -> None:
+        replies.write(json.dumps(message) + "\n")
+
+    reply({"ready": True, "pid": os.getpid(), "rss_mb": _rss_mb()})
+    for line in requests:
+        request = json.loads(line)
+        if request.get("op") == "exit":
+            break
+        reply(execute(request))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class TaskGraph:
+    """Dependency graph of task ids built from the ``context`` lists in tasks.yaml."""
+
+    def __init__(self, dependencies: Dict[str, List[str]]):
+        self.dependencies = {task_id: list(deps) for task_id, deps in dependencies.items()}
+        self.validate()
+        self.dependents: Dict[str, List[str]] = {task_id: [] for task_id in self.dependencies}
+        for task_id, deps in self.dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(task_id)
+
+    @classmethod
+    def from_task_configs(cls, task_configs: Dict[str, Dict[str, Any]]) -> "TaskGraph":
+        return cls({task_id: cfg.get("context") or [] for task_id, cfg in task_configs.items()})
+
+    @classmethod
+    def sequential(cls, task_configs: Dict[str, Dict[str, Any]]) -> "TaskGraph":
+        """
+        The dependencies crewai's sequential process actually has: a task's
+        ``context`` list if it has one, otherwise the task before it.
+        """
+        dependencies: Dict[str, List[str]] = {}
+        previous = None
+        for task_id, cfg in task_configs.items():
+            dependencies[task_id] = cfg.get("context") or ([previous] if previous else [])
+            previous = task_id
+        return cls(dependencies)
+
+    def validate(self) -> None:
+        """Raise ValueError for unknown context ids or dependency cycles."""
+        missing = sorted(
+            f"{task_id} -> {dep}"
+            for task_id, deps in self.dependencies.items()
+            for dep in deps
+            if dep not in self.dependencies
+        )
+        if missing:
+            raise ValueError(f"Unknown task ids in context: {', '.join(missing)}")
+
+        state: Dict[str, int] = {}  # 1 = on the current path, 2 = done
+        for root in self.dependencies:
+            if root in state:
+                continue
+            path = [root]
+            stack = [iter(self.dependencies[root])]
+            state[root] = 1
+            while stack:
+                dep = next(stack[-1], None)
+                if dep is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(dep) == 1:
+                    cycle = path[path.index(dep):] + [dep]
+                    raise ValueError(f"Dependency cycle between tasks: {' -> '.join(cycle)}")
+                elif dep not in state:
+                    state[dep] = 1
+                    path.append(dep)
+                    stack.append(iter(self.dependencies[dep]))
+
+    def topological_order(self) -> List[str]:
+        """Kahn's algorithm; ties keep the declaration order from tasks.yaml."""
+        remaining = {task_id: len(deps) for task_id, deps in self.dependencies.items()}
+        order = []
+        ready = [task_id for task_id, count in remaining.items() if count == 0]
+        while ready:
+            task_id = ready.pop(0)
+            order.append(task_id)
+            for child in self.dependents[task_id]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        return order
+
+    def descendants(self, task_id: str) -> Set[str]:
+        """Every task that depends on ``task_id``, directly or transitively."""
+        found: Set[str] = set()
+        stack = list(self.dependents[task_id])
+        while stack:
+            child = stack.pop()
+            if child not in found:
+                found.add(child)
+                stack.extend(self.dependents[child])
+        return found
+
+    def critical_path_lengths(self) -> Dict[str, int]:
+        """Number of tasks on the longest chain starting at each task."""
+        lengths: Dict[str, int] = {}
+        for task_id in reversed(self.topological_order()):
+            lengths[task_id] = 1 + max((lengths[c] for c in self.dependents[task_id]), default=0)
+        return lengths
+
+
+class DagScheduler:
+    """
+    Execute a TaskGraph on a worker pool.
+
+    ``execute(task_id, upstream_outputs)`` is called once per task, only after
+    all of its dependencies have produced output; ``upstream_outputs`` maps
+    each dependency id to its output in context order. Ready tasks are started
+    longest-remaining-chain first so the critical path is never starved by
+    independent side tasks. The first failure stops new tasks from starting
+    and is re-raised once the running ones have finished.
+    """
+
+    def __init__(
+        self,
+        graph: TaskGraph,
+        max_parallel: int = 3,
+        on_task_complete: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.graph = graph
+        self.max_parallel = max_parallel
+        self.on_task_complete = on_task_complete
+
+    def run(self, execute: Callable[[str, Dict[str, str]], str]) -> Dict[str, str]:
+        graph = self.graph
+        order = graph.topological_order()
+        priority = graph.critical_path_lengths()
+        remaining = {task_id: len(deps) for task_id, deps in graph.dependencies.items()}
+        ready = [task_id for task_id in order if remaining[task_id] == 0]
+        outputs: Dict[str, str] = {}
+        running: Dict[Future, str] = {}
+        failure: Optional[BaseException] = None
+        failed_task = None
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="crew-task") as pool:
+            while ready or running:
+                while ready and failure is None and len(running) < self.max_parallel:
+                    ready.sort(key=lambda t: (-priority[t], order.index(t)))
+                    task_id = ready.pop(0)
+                    upstream = {dep: outputs[dep] for dep in graph.dependencies[task_id]}
+                    running[pool.submit(execute, task_id, upstream)] = task_id
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_id = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        if failure is None:
+                            failure, failed_task = error, task_id
+                        continue
+                    outputs[task_id] = future.result()
+                    if self.on_task_complete:
+                        self.on_task_complete(task_id, outputs[task_id])
+                    for child in graph.dependents[task_id]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            ready.append(child)
+
+        if failure is not None:
+            raise RuntimeError(f"Task '{failed_task}' failed: {failure}") from failure
+        return {task_id: outputs[task_id] for task_id in order}
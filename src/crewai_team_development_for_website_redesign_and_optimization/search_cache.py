@@ -0,0 +1,237 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .settings import SearchSettings, cache_dir
+from .tracing import record_cache_lookup
+
+_TOKEN_RE = re.compile(r"[\w'-]+")
+# Articles only: "latest X" and "X", or "A to B" and "B to A", are different searches
+_QUERY_STOPWORDS = frozenset({"a", "an", "the"})
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key form of a query: case, Unicode forms, punctuation, spacing and
+    articles are ignored but word order is kept, so "Modern design trends:
+    the professional services" and "modern design trends professional
+    services" share a key.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    terms = (t.strip("'-") for t in _TOKEN_RE.findall(text))
+    return " ".join(t for t in terms if t and t not in _QUERY_STOPWORDS)
+
+
+class StubSearchBackend:
+    """Offline backend: deterministic canned results, for tests and benchmarks."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> str:
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        return (
+            f"Results for '{query}': 1. Industry sites favour clear navigation and trust signals. "
+            "2. Mobile-first layouts with fast load times rank better. "
+            "3. Accessible contrast and readable typography improve engagement."
+        )
+
+
+def serpapi_backend() -> Callable[[str], str]:
+    from langchain_community.utilities import SerpAPIWrapper
+
+    return SerpAPIWrapper(serpapi_api_key=os.getenv("SERPER_API_KEY")).run
+
+
+class SearchCache:
+    """
+    Search results shared by every agent (and, through SQLite, every process).
+
+    Lookups go to a bounded in-memory LRU first, then to the persistent
+    store, whose entries expire after ``ttl_seconds``. On a miss, concurrent
+    lookups of the same normalized query wait for a single upstream call
+    instead of each making their own. Upstream errors are returned to every
+    waiting caller and never cached.
+    """
+
+    def __init__(
+        self,
+        backend: Callable[[str], str],
+        path: Optional[Path] = None,
+        ttl_seconds: float = 7 * 86400,
+        memory_entries: int = 512,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("DELETE FROM search_cache WHERE created < ?", (time.time() - ttl_seconds,))
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+    def __call__(self, query: str) -> str:
+        return self.search(query)
+
+    def search(self, query: str) -> str:
+        key = self.make_key(query)
+        with self._lock:
+            result = self._from_memory(key)
+            if result is not None:
+                self.memory_hits += 1
+                record_cache_lookup("search", True)
+                return result
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            record_cache_lookup("search", True)
+            return future.result()
+
+        try:
+            result, created = self._from_disk(key)
+            if result is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                record_cache_lookup("search", True)
+            else:
+                with self._lock:
+                    self.misses += 1
+                    self.upstream_calls += 1
+                record_cache_lookup("search", False)
+                result = self.backend(query)
+                created = self._to_disk(key, query, result)
+        except BaseException as e:
+            with self._lock:
+                self.upstream_errors += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._to_memory(key, result, created)
+            del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    def _from_memory(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        created, result = entry
+        if time.time() - created > self.ttl_seconds:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return result
+
+    def _to_memory(self, key: str, result: str, created: float) -> None:
+        self._memory[key] = (created, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _from_disk(self, key: str) -> Tuple[Optional[str], float]:
+        """The stored result and when it was fetched; None when missing or expired."""
+        if self._conn is None:
+            return None, 0.0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None, 0.0
+        return row[0], row[1]
+
+    def _to_disk(self, key: str, query: str, result: str) -> float:
+        created = time.time()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, query, result, created) VALUES (?, ?, ?, ?)",
+                    (key, query, result, created),
+                )
+                self._conn.commit()
+        return created
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.coalesced
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "upstream_calls": self.upstream_calls,
+                "upstream_errors": self.upstream_errors,
+                "memory_entries": len(self._memory),
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (
+            f"Search cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+            f"{stats['coalesced']} coalesced, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['upstream_calls']} upstream calls"
+        )
+
+
+def make_search(
+    settings: Optional[SearchSettings] = None,
+    backend: Optional[Callable[[str], str]] = None
+) -> Callable[[str], str]:
+    """
+    The search function handed to agents: the configured backend behind the
+    shared cache. Set ``SEARCH_BACKEND=stub`` to run without the network.
+    """
+    settings = settings or SearchSettings()
+    if backend is None:
+        name = os.getenv("SEARCH_BACKEND", settings.backend)
+        backend = StubSearchBackend() if name == "stub" else serpapi_backend()
+    if not settings.cache_enabled:
+        return backend
+    return SearchCache(
+        backend,
+        path=Path(settings.path) if settings.path else cache_dir() / "search_cache.sqlite3",
+        ttl_seconds=settings.ttl_hours * 3600,
+        memory_entries=settings.memory_entries,
+    )
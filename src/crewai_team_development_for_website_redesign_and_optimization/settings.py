@@ -0,0 +1,347 @@
+"""
+Configuration models and loaders.
+
+Only pydantic and PyYAML are imported here so that config validation and
+the CLI's informational commands start without loading crewai, langchain
+or httpx. The engine modules import their settings from this module.
+"""
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+from pydantic import BaseModel, Field, model_validator
+
+CONFIG_DIR = Path(__file__).parent / "config"
+OUTPUT_DIR = Path(__file__).parent / "output"
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache"
+
+
+def cache_dir() -> Path:
+    """Directory shared by all on-disk caches (override with CREW_CACHE_DIR)."""
+    return Path(os.getenv("CREW_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+class CrawlSettings(BaseModel):
+    """Limits and politeness settings for a site crawl."""
+    max_pages: int = 200
+    max_depth: int = 3
+    concurrency: int = 16
+    per_host_concurrency: int = 8
+    timeout: float = 10.0
+    respect_robots: bool = True
+    use_sitemap: bool = True
+    max_sitemap_urls: int = 1000
+    # Remember each page between runs and re-fetch only what changed
+    snapshots: bool = True
+    snapshot_path: Optional[str] = None
+    # Crawls allowed more pages than this stream each page into running
+    # aggregates and an on-disk record file instead of keeping it
+    large_site_pages: int = Field(default=1000, ge=1)
+    # Per-page records of large-site crawls; defaults to output/crawls
+    records_dir: Optional[str] = None
+
+
+class LLMCacheSettings(BaseModel):
+    """Settings for the persistent LLM response cache."""
+    enabled: bool = True
+    bypass: bool = False
+    path: Optional[str] = None
+    max_size_mb: float = 256.0
+    max_age_days: float = 30.0
+
+
+class LLMGovernorSettings(BaseModel):
+    """Provider budgets enforced around every LLM call."""
+    enabled: bool = True
+    requests_per_minute: float = Field(default=500, gt=0)
+    tokens_per_minute: float = Field(default=80000, gt=0)
+    max_concurrency: int = Field(default=8, ge=1)
+    # Output tokens assumed for a call that doesn't set max_tokens
+    completion_tokens: int = 1024
+    # Retries of rate-limited calls, with jittered exponential backoff
+    max_retries: int = 6
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    # Share the budgets with other processes (e.g. batch workers) through SQLite
+    shared: bool = False
+    path: Optional[str] = None
+
+
+class ModelProfile(BaseModel):
+    """One model setup that tasks and agents can be routed to."""
+    # None uses $OPENAI_MODEL_NAME, or gpt-4
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = Field(default=None, ge=1)
+    # Seconds per request
+    timeout: Optional[float] = Field(default=None, gt=0)
+    # Once a task has spent this long (seconds) or this many tokens, its
+    # remaining LLM calls go to the ``fallback`` profile
+    latency_budget: Optional[float] = Field(default=None, gt=0)
+    token_budget: Optional[int] = Field(default=None, ge=1)
+    fallback: Optional[str] = None
+
+
+def _default_profiles() -> Dict[str, ModelProfile]:
+    return {
+        "fast": ModelProfile(model="gpt-4o-mini", max_tokens=1500, timeout=60, latency_budget=120),
+        "standard": ModelProfile(max_tokens=2000, timeout=120, latency_budget=300, fallback="fast"),
+        "code": ModelProfile(max_tokens=4096, timeout=300, latency_budget=900, fallback="standard"),
+    }
+
+
+class ModelRoutingSettings(BaseModel):
+    """Model profiles, chosen per task (tasks.yaml) or per agent (agents.yaml).
+
+    A task's ``model_profile`` wins over its agent's; both default to
+    ``default_profile``. Disabled, every agent uses the default profile.
+    """
+    enabled: bool = True
+    default_profile: str = "standard"
+    profiles: Dict[str, ModelProfile] = Field(default_factory=_default_profiles)
+    # Per-task latency and token usage is appended here; defaults to
+    # <output dir>/model_usage.jsonl
+    usage_path: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _check_profiles(self) -> "ModelRoutingSettings":
+        names = [self.default_profile] + [p.fallback for p in self.profiles.values() if p.fallback]
+        unknown = sorted(set(names) - set(self.profiles))
+        if unknown:
+            raise ValueError(f"unknown model profile(s): {', '.join(unknown)}")
+        for name in self.profiles:
+            chain = [name]
+            while self.profiles[chain[-1]].fallback:
+                chain.append(self.profiles[chain[-1]].fallback)
+                if chain[-1] in chain[:-1]:
+                    raise ValueError(f"model profile fallbacks form a cycle: {' -> '.join(chain)}")
+        return self
+
+
+class SearchSettings(BaseModel):
+    """Backend and caching for the agents' search tool."""
+    # serpapi, or stub for offline runs
+    backend: str = Field(default="serpapi", pattern="^(serpapi|stub)$")
+    cache_enabled: bool = True
+    path: Optional[str] = None
+    ttl_hours: float = 7 * 24
+    memory_entries: int = Field(default=512, ge=1)
+
+
+class SchedulerSettings(BaseModel):
+    """How the crew's tasks are executed.
+
+    ``sequential`` hands the task list to crewai's ``Process.sequential``;
+    ``dag`` runs every task as soon as the tasks named in its ``context``
+    have finished, with at most ``max_parallel`` tasks in flight.
+    """
+    mode: str = Field(default="sequential", pattern="^(sequential|dag)$")
+    max_parallel: int = Field(default=3, ge=1)
+
+
+class PerformanceSettings(BaseModel):
+    """Concurrency and network model for the performance tester.
+
+    The defaults model a throttled mobile connection (150 ms RTT,
+    1.6 Mbps down), the same profile Lighthouse uses for mobile audits.
+    """
+    concurrency: int = 8
+    timeout: float = 10.0
+    rtt_ms: float = 150.0
+    downlink_kbps: float = 1600.0
+
+
+class ContentSettings(BaseModel):
+    """Thresholds for the content analyzer."""
+    thin_words: int = 300
+    keywords_per_page: int = 8
+    # Near-duplicate detection: MinHash over word shingles, banded LSH.
+    # 32 bands of 2 rows make pages around 0.7 similar candidates almost surely
+    shingle_words: int = 4
+    minhash_permutations: int = 64
+    lsh_bands: int = 32
+    duplicate_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    max_rows: int = 50
+
+
+class SiteSearchSettings(BaseModel):
+    """Chunking, embedding and freshness of the local site search index."""
+    chunk_words: int = Field(default=120, ge=10)
+    chunk_overlap: int = Field(default=30, ge=0)
+    # Feature-hashing dimensions of the passage vectors
+    dimensions: int = Field(default=2048, ge=64)
+    top_k: int = Field(default=5, ge=1)
+    passage_chars: int = 600
+    # Rebuild (re-crawl) an index once it is this old
+    ttl_hours: float = 24.0
+    path: Optional[str] = None
+
+
+class LoadTestSettings(BaseModel):
+    """Defaults and hard limits for the performance monitor's load tests.
+
+    Without a ``rate`` the test is closed-loop (each connection sends its next
+    request when the last one completes); with one, requests start on a
+    fixed schedule. Agents can pick values per call up to the ``max_`` limits.
+    """
+    concurrency: int = Field(default=16, ge=1)
+    duration: float = Field(default=10.0, gt=0)
+    rate: Optional[float] = Field(default=None, gt=0)
+    timeout: float = 10.0
+    max_concurrency: int = 256
+    max_duration: float = 60.0
+    max_rate: float = Field(default=1000.0, gt=0)
+
+
+class SandboxSettings(BaseModel):
+    """Warm worker processes behind the agents' CodeExecutor tool.
+
+    Limits apply per execution (CPU and wall seconds) and per worker
+    (address space); a worker is replaced after ``max_executions`` runs or
+    once its resident memory passes ``max_worker_rss_mb``.
+    """
+    enabled: bool = True
+    workers: int = Field(default=2, ge=1)
+    max_executions: int = Field(default=50, ge=1)
+    max_worker_rss_mb: int = 256
+    cpu_seconds: int = Field(default=10, ge=1)
+    wall_seconds: float = Field(default=30.0, gt=0)
+    memory_mb: int = 512
+    # Imported by every worker before it reports ready
+    preload: List[str] = Field(default_factory=lambda: ["json", "re", "math", "statistics", "html.parser"])
+    max_output_chars: int = 8000
+
+
+class CSSSettings(BaseModel):
+    """Unused-rule purge and critical CSS inlining, run on the generated site before the build."""
+    enabled: bool = True
+    purge: bool = True
+    critical: bool = True
+    # Elements of <body>, in document order, taken to be on the first screen
+    above_fold_elements: int = Field(default=80, ge=1)
+    # Inlined CSS per page; ~14 KB fits the first round trip of a new connection
+    critical_max_kb: float = Field(default=14.0, gt=0)
+    # Regular expressions; selectors matching one are never purged
+    safelist: List[str] = Field(default_factory=list)
+    # Treat class, id and attribute names found in script string literals as present
+    scan_scripts: bool = True
+
+
+class BuildSettings(BaseModel):
+    """Post-generation build of the redesigned site."""
+    enabled: bool = True
+    minify: bool = True
+    fingerprint: bool = True
+    precompress: bool = True
+    workers: Optional[int] = None
+    hash_length: int = Field(default=10, ge=6, le=64)
+
+
+class PreviewSettings(BaseModel):
+    """Caching and connection behaviour of the local preview server."""
+    cache_max_mb: int = 64
+    cache_max_file_kb: int = 4096
+    keepalive_timeout: float = 15.0
+    compress_on_the_fly: bool = True
+    immutable_max_age: int = 31536000
+
+
+class BatchSettings(BaseModel):
+    """Worker count and limits for batch runs."""
+    workers: int = Field(default=4, ge=1)
+    # Seconds before a site's worker is terminated; None waits indefinitely
+    site_timeout: Optional[float] = None
+    # Parent folder for batch runs; defaults to output/batch
+    output_dir: Optional[str] = None
+
+
+class CheckpointSettings(BaseModel):
+    """Per-task output checkpoints used to resume and replay runs."""
+    enabled: bool = True
+    # Reuse a task's saved output when its fingerprint matches
+    resume: bool = True
+    # Defaults to <output dir>/checkpoints
+    path: Optional[str] = None
+
+
+class CompactionSettings(BaseModel):
+    """Token budgets for the upstream context handed to each task.
+
+    ``extract`` keeps the sections most relevant to the receiving task;
+    ``summarize`` additionally condenses them with ``summary_model``.
+    """
+    enabled: bool = True
+    encoding: str = "cl100k_base"
+    default_budget: int = Field(default=3000, ge=100)
+    # Per-task overrides, keyed by tasks.yaml id
+    budgets: Dict[str, int] = Field(default_factory=dict)
+    mode: str = Field(default="extract", pattern="^(extract|summarize)$")
+    summary_model: str = "gpt-3.5-turbo"
+
+
+class TracingSettings(BaseModel):
+    """Spans for tasks, agent steps, LLM calls and tools, exported to a local file.
+
+    ``jsonl`` writes one flat record per span; ``otlp`` writes OTLP/JSON
+    export requests that an OpenTelemetry collector can read back.
+    """
+    enabled: bool = True
+    format: str = Field(default="jsonl", pattern="^(jsonl|otlp)$")
+    # Defaults to <output dir>/traces.jsonl
+    path: Optional[str] = None
+
+
+class Config(BaseModel):
+    current_website_url: str
+    industry: str
+    target_audience: str
+    brand_guidelines: Dict[str, Any]
+    tools: Dict[str, List[str]]
+    crawl: CrawlSettings = Field(default_factory=CrawlSettings)
+    llm_cache: LLMCacheSettings = Field(default_factory=LLMCacheSettings)
+    llm_governor: LLMGovernorSettings = Field(default_factory=LLMGovernorSettings)
+    models: ModelRoutingSettings = Field(default_factory=ModelRoutingSettings)
+    search: SearchSettings = Field(default_factory=SearchSettings)
+    scheduler: SchedulerSettings = Field(default_factory=SchedulerSettings)
+    performance: PerformanceSettings = Field(default_factory=PerformanceSettings)
+    content: ContentSettings = Field(default_factory=ContentSettings)
+    site_search: SiteSearchSettings = Field(default_factory=SiteSearchSettings)
+    load_test: LoadTestSettings = Field(default_factory=LoadTestSettings)
+    sandbox: SandboxSettings = Field(default_factory=SandboxSettings)
+    css: CSSSettings = Field(default_factory=CSSSettings)
+    build: BuildSettings = Field(default_factory=BuildSettings)
+    preview: PreviewSettings = Field(default_factory=PreviewSettings)
+    batch: BatchSettings = Field(default_factory=BatchSettings)
+    checkpoints: CheckpointSettings = Field(default_factory=CheckpointSettings)
+    compaction: CompactionSettings = Field(default_factory=CompactionSettings)
+    tracing: TracingSettings = Field(default_factory=TracingSettings)
+
+
+def load_config(path: Path = CONFIG_DIR / "config.yaml") -> Config:
+    with open(path, "r") as f:
+        config_data = yaml.safe_load(f)
+    return Config(**config_data)
+
+
+def load_tasks(path: Path = CONFIG_DIR / "tasks.yaml") -> Dict[str, Dict[str, Any]]:
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def load_agents(path: Path = CONFIG_DIR / "agents.yaml") -> Dict[str, Dict[str, Any]]:
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def check_model_profiles(
+    settings: ModelRoutingSettings,
+    task_configs: Dict[str, Dict[str, Any]],
+    agent_configs: Dict[str, Dict[str, Any]]
+) -> None:
+    """Raise ValueError when tasks.yaml or agents.yaml names an unknown profile."""
+    for kind, configs in (("task", task_configs), ("agent", agent_configs)):
+        for name, entry in configs.items():
+            profile = (entry or {}).get("model_profile")
+            if profile and profile not in settings.profiles:
+                raise ValueError(f"{kind} '{name}' uses unknown model profile '{profile}'")
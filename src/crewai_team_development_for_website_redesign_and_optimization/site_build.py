@@ -0,0 +1,419 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from .settings import BuildSettings
+
+TEXT_EXTENSIONS = {".html", ".htm", ".css", ".js", ".mjs", ".svg", ".json", ".xml", ".txt", ".map"}
+HTML_EXTENSIONS = {".html", ".htm"}
+# Only these get hashed names, and only when an HTML page or stylesheet refers to
+# them; robots.txt, favicon.ico, sitemaps and files fetched by scripts keep theirs
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp4", ".webm", ".mp3", ".ogg",
+}
+BUILD_MANIFEST = "manifest.json"
+
+_STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+_CSS_TOKEN_RE = re.compile(rf"({_STRING})|(/\*.*?\*/)", re.DOTALL)
+_JS_TOKEN_RE = re.compile(rf"({_STRING}|`(?:\\.|[^`\\])*`)|(/\*.*?\*/)|(^[ \t]*//[^\n]*)", re.DOTALL | re.MULTILINE)
+_HTML_RAW_RE = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_HTML_ATTR_RE = re.compile(r"""(\b(?:src|href|poster|data-src)\s*=\s*)(["'])([^"']+)\2""", re.IGNORECASE)
+_HTML_SRCSET_RE = re.compile(r"""(\b(?:srcset|imagesrcset|data-srcset)\s*=\s*)(["'])([^"']+)\2""", re.IGNORECASE)
+_CSS_URL_RE = re.compile(r"""(url\(\s*)(["']?)([^"')]+?)\2(\s*\))""", re.IGNORECASE)
+_CSS_IMPORT_RE = re.compile(r"""(@import\s+)(["'])([^"']+)\2""", re.IGNORECASE)
+
+
+class FileBuildResult(BaseModel):
+    source: str
+    output: str
+    original_bytes: int
+    minified_bytes: int
+    gzip_bytes: Optional[int] = None
+
+
+class BuildReport(BaseModel):
+    source_dir: str
+    output_dir: str
+    files: List[FileBuildResult] = Field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def original_bytes(self) -> int:
+        return sum(f.original_bytes for f in self.files)
+
+    @property
+    def minified_bytes(self) -> int:
+        return sum(f.minified_bytes for f in self.files)
+
+    @property
+    def gzip_bytes(self) -> int:
+        return sum(f.gzip_bytes if f.gzip_bytes is not None else f.minified_bytes for f in self.files)
+
+    def markdown(self) -> str:
+        """Per-file byte savings as a markdown section for report.md."""
+        lines = [
+            f"Built {len(self.files)} files from `{self.source_dir}` into `{self.output_dir}` "
+            f"in {self.duration:.2f} seconds.",
+            "",
+            "| File | Output | Original | Minified | Gzip | Saved |",
+            "| --- | --- | ---: | ---: | ---: | ---: |",
+        ]
+        for f in self.files:
+            lines.append(
+                f"| {f.source} | {f.output} | {f.original_bytes:,} B | {f.minified_bytes:,} B | "
+                f"{f'{f.gzip_bytes:,} B' if f.gzip_bytes is not None else '-'} | "
+                f"{_saving(f.original_bytes, f.gzip_bytes if f.gzip_bytes is not None else f.minified_bytes)} |"
+            )
+        lines.append(
+            f"| **Total** | | {self.original_bytes:,} B | {self.minified_bytes:,} B | "
+            f"{self.gzip_bytes:,} B | {_saving(self.original_bytes, self.gzip_bytes)} |"
+        )
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        return (
+            f"Built {len(self.files)} files: {self.original_bytes:,} B -> {self.minified_bytes:,} B minified, "
+            f"{self.gzip_bytes:,} B gzipped ({_saving(self.original_bytes, self.gzip_bytes)} saved)"
+        )
+
+
+def _saving(before: int, after: int) -> str:
+    return f"{(1 - after / before) * 100:.1f}%" if before else "0.0%"
+
+
+def _transform_outside(text: str, token_re: "re.Pattern", transform, keep_newlines: bool = False) -> str:
+    """
+    Apply ``transform`` to the text between tokens.
+
+    Strings (group 1) are copied verbatim and comments are dropped. Where a
+    comment was the only thing separating two identifiers it becomes a
+    space, or a newline when ``keep_newlines`` is set and the comment spanned
+    lines (so JavaScript's automatic semicolon insertion still sees it).
+    """
+    out = []
+    last = 0
+    for match in token_re.finditer(text):
+        out.append(transform(text[last:match.start()]))
+        if match.group(1):
+            out.append(match.group(1))
+        elif keep_newlines and "\n" in match.group(0):
+            out.append("\n")
+        else:
+            before = out[-1][-1:] if out and out[-1] else ""
+            after = text[match.end():match.end() + 1]
+            if re.match(r"[\w$]", before) and re.match(r"[\w$]", after):
+                out.append(" ")
+        last = match.end()
+    out.append(transform(text[last:]))
+    return "".join(out)
+
+
+def _compact_css(code: str) -> str:
+    code = re.sub(r"\s+", " ", code)
+    # Spaces before ':' are kept: "a :hover" and "a:hover" are different selectors
+    code = re.sub(r"\s*([{};,>])\s*", r"\1", code)
+    code = re.sub(r":\s+", ":", code)
+    return code.replace(";}", "}")
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace; string contents are left untouched."""
+    return _transform_outside(css, _CSS_TOKEN_RE, _compact_css).strip()
+
+
+def _compact_js(code: str) -> str:
+    lines = (line.strip() for line in code.split("\n"))
+    return "\n".join(lines)
+
+
+def minify_js(js: str) -> str:
+    """
+    Conservative JavaScript minification.
+
+    Block comments and whole-line ``//`` comments are removed and every line
+    is trimmed, but line breaks are kept so automatic semicolon insertion
+    behaves exactly as before.
+    """
+    compacted = _transform_outside(js, _JS_TOKEN_RE, _compact_js, keep_newlines=True)
+    return "\n".join(line for line in compacted.split("\n") if line.strip())
+
+
+def minify_html(html: str) -> str:
+    """Remove comments and collapse whitespace outside pre/textarea; minify inline CSS and JS."""
+    out = []
+    last = 0
+    for match in _HTML_RAW_RE.finditer(html):
+        out.append(_compact_html(html[last:match.start()]))
+        block, tag = match.group(1), match.group(2).lower()
+        if tag in ("script", "style"):
+            open_end = block.index(">") + 1
+            close_start = block.lower().rindex("</")
+            body = block[open_end:close_start]
+            if tag == "style":
+                body = minify_css(body)
+            elif "src=" not in block[:open_end].lower():
+                body = minify_js(body)
+            block = block[:open_end] + body + block[close_start:]
+        out.append(block)
+        last = match.end()
+    out.append(_compact_html(html[last:]))
+    return "".join(out).strip()
+
+
+def _compact_html(fragment: str) -> str:
+    fragment = _HTML_COMMENT_RE.sub("", fragment)
+    return re.sub(r"\s+", " ", fragment)
+
+
+def content_hash(data: bytes, length: int) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def hashed_name(rel_path: str, digest: str) -> str:
+    stem, ext = posixpath.splitext(rel_path)
+    return f"{stem}.{digest}{ext}"
+
+
+def _resolve(ref: str, from_rel: str) -> Optional[Tuple[str, str]]:
+    """Map a reference in ``from_rel`` to a site-relative path (plus its ?query/#fragment)."""
+    ref = ref.strip()
+    if not ref or re.match(r"^([a-z][a-z0-9+.-]*:|//|#)", ref, re.IGNORECASE):
+        return None
+    split = re.search(r"[?#]", ref)
+    path, suffix = (ref[:split.start()], ref[split.start():]) if split else (ref, "")
+    if path.startswith("/"):
+        target = posixpath.normpath(path.lstrip("/"))
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(from_rel), path))
+    return target, suffix
+
+
+def _srcset_urls(srcset: str) -> List[str]:
+    """The URLs of a srcset value such as ``a.png 1x, b.png 2x``."""
+    return [candidate.split()[0] for candidate in srcset.split(",") if candidate.strip()]
+
+
+def find_references(text: str, from_rel: str, is_html: bool) -> Set[str]:
+    """Site-relative paths of the files that ``rewrite_references`` can point elsewhere."""
+    refs = [m.group(3) for m in _CSS_URL_RE.finditer(text)]
+    refs += [m.group(3) for m in _CSS_IMPORT_RE.finditer(text)]
+    if is_html:
+        refs += [m.group(3) for m in _HTML_ATTR_RE.finditer(text)]
+        refs += [url for m in _HTML_SRCSET_RE.finditer(text) for url in _srcset_urls(m.group(3))]
+    resolved = (_resolve(ref, from_rel) for ref in refs)
+    return {target for target, _ in filter(None, resolved)}
+
+
+def rewrite_references(text: str, from_rel: str, mapping: Dict[str, str], is_html: bool) -> str:
+    """Point src/srcset/href/url()/@import references at fingerprinted file names."""
+    def new_ref(ref: str) -> str:
+        resolved = _resolve(ref, from_rel)
+        if not resolved or resolved[0] not in mapping:
+            return ref
+        target, suffix = resolved
+        if ref.strip().startswith("/"):
+            return "/" + mapping[target] + suffix
+        return posixpath.relpath(mapping[target], posixpath.dirname(from_rel) or ".") + suffix
+
+    def replace(match):
+        prefix, quote, ref, *rest = match.groups()
+        return f"{prefix}{quote}{new_ref(ref)}{quote}{''.join(rest)}"
+
+    def replace_srcset(match):
+        prefix, quote, srcset = match.groups()
+        candidates = []
+        for candidate in srcset.split(","):
+            url, *descriptors = candidate.split() or [""]
+            candidates.append(" ".join([new_ref(url), *descriptors]) if url else candidate)
+        return f"{prefix}{quote}{', '.join(candidates)}{quote}"
+
+    text = _CSS_URL_RE.sub(replace, text)
+    text = _CSS_IMPORT_RE.sub(replace, text)
+    if is_html:
+        text = _HTML_ATTR_RE.sub(replace, text)
+        text = _HTML_SRCSET_RE.sub(replace_srcset, text)
+    return text
+
+
+def _build_file(
+    source_dir: str,
+    output_dir: str,
+    rel_path: str,
+    mapping: Dict[str, str],
+    settings: BuildSettings,
+    fingerprint: bool = False,
+) -> Tuple[str, FileBuildResult]:
+    """Minify, fingerprint and precompress one file. Runs in a worker process."""
+    source = Path(source_dir) / rel_path
+    data = source.read_bytes()
+    ext = posixpath.splitext(rel_path)[1].lower()
+    output = data
+    if ext in (".css", ".js", ".mjs") or ext in HTML_EXTENSIONS:
+        text = data.decode("utf-8", errors="replace")
+        if mapping:
+            text = rewrite_references(text, rel_path, mapping, ext in HTML_EXTENSIONS)
+        if settings.minify:
+            if ext == ".css":
+                text = minify_css(text)
+            elif ext in HTML_EXTENSIONS:
+                text = minify_html(text)
+            else:
+                text = minify_js(text)
+        output = text.encode("utf-8")
+
+    out_rel = rel_path
+    if fingerprint:
+        out_rel = hashed_name(rel_path, content_hash(output, settings.hash_length))
+    destination = Path(output_dir) / out_rel
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.write_bytes(output)
+    shutil.copystat(source, destination)
+
+    gzip_bytes = None
+    if settings.precompress and ext in TEXT_EXTENSIONS:
+        compressed = gzip.compress(output, compresslevel=9, mtime=0)
+        if len(compressed) < len(output):
+            Path(str(destination) + ".gz").write_bytes(compressed)
+            gzip_bytes = len(compressed)
+
+    return rel_path, FileBuildResult(
+        source=rel_path,
+        output=out_rel,
+        original_bytes=len(data),
+        minified_bytes=len(output),
+        gzip_bytes=gzip_bytes,
+    )
+
+
+def _css_import_graph(source_dir: Path, css_files: List[str]) -> Dict[str, List[str]]:
+    graph = {}
+    css_set = set(css_files)
+    for rel in css_files:
+        text = (source_dir / rel).read_text(errors="replace")
+        deps = set()
+        for match in list(_CSS_IMPORT_RE.finditer(text)) + list(_CSS_URL_RE.finditer(text)):
+            resolved = _resolve(match.group(3), rel)
+            if resolved and resolved[0] in css_set and resolved[0] != rel:
+                deps.add(resolved[0])
+        graph[rel] = sorted(deps)
+    return graph
+
+
+def _css_levels(graph: Dict[str, List[str]]) -> List[Tuple[List[str], bool]]:
+    """
+    Group stylesheets so each one is built after the stylesheets it imports.
+    Returns ``(stylesheets, in_cycle)`` stages; stylesheets that import each
+    other in a cycle are built together without fingerprints so their
+    mutual references stay valid.
+    """
+    remaining = {rel: set(deps) for rel, deps in graph.items()}
+    levels = []
+    while remaining:
+        level = sorted(rel for rel, deps in remaining.items() if not deps)
+        in_cycle = not level
+        if in_cycle:
+            level = sorted(remaining)
+        levels.append((level, in_cycle))
+        for rel in level:
+            del remaining[rel]
+        for deps in remaining.values():
+            deps.difference_update(level)
+    return levels
+
+
+def build_site(source_dir: Path, output_dir: Path, settings: Optional[BuildSettings] = None) -> BuildReport:
+    """
+    Build ``source_dir`` into ``output_dir``.
+
+    Files are processed in dependency stages so every reference can point at
+    its final fingerprinted name: plain assets first, then stylesheets
+    (ordered by @import), then HTML pages, which keep their names. Only
+    stylesheets, scripts, images, fonts and media that a page or stylesheet
+    refers to are fingerprinted; everything else keeps its name. Within a
+    stage, files are built in parallel on a process pool. A ``manifest.json``
+    mapping original to built names is written next to the output
+    (``build-manifest.json`` when the site has a manifest.json of its own).
+    """
+    settings = settings or BuildSettings()
+    source_dir = Path(source_dir)
+    output_dir = Path(output_dir)
+    started = time.perf_counter()
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(parents=True)
+
+    rel_paths = sorted(
+        p.relative_to(source_dir).as_posix()
+        for p in source_dir.rglob("*")
+        if p.is_file() and not p.name.startswith(".") and p.suffix != ".gz"
+    )
+    css = [r for r in rel_paths if r.lower().endswith(".css")]
+    html = [r for r in rel_paths if posixpath.splitext(r)[1].lower() in HTML_EXTENSIONS]
+    assets = [r for r in rel_paths if r not in css and r not in html]
+    stages = [(assets, False)] + _css_levels(_css_import_graph(source_dir, css)) + [(html, False)]
+    referenced: Set[str] = set()
+    if settings.fingerprint:
+        for rel in css + html:
+            text = (source_dir / rel).read_text(errors="replace")
+            referenced |= find_references(text, rel, rel in html)
+    fingerprinted = {
+        rel for rel in referenced.intersection(rel_paths)
+        if posixpath.splitext(rel)[1].lower() in FINGERPRINT_EXTENSIONS
+    }
+
+    mapping: Dict[str, str] = {}
+    results: Dict[str, FileBuildResult] = {}
+    workers = settings.workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(rel_paths) > 1 else None
+    try:
+        for stage, in_cycle in stages:
+            if not stage:
+                continue
+            stage_settings = settings.model_copy(update={"fingerprint": False}) if in_cycle else settings
+            args = [
+                (str(source_dir), str(output_dir), rel, dict(mapping), stage_settings,
+                 stage_settings.fingerprint and rel in fingerprinted)
+                for rel in stage
+            ]
+            built: Iterable[Tuple[str, FileBuildResult]]
+            if executor is not None and len(stage) > 1:
+                built = executor.map(_build_file, *zip(*args))
+            else:
+                built = (_build_file(*a) for a in args)
+            for rel, result in built:
+                results[rel] = result
+                mapping[rel] = result.output
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    manifest = {
+        rel: {
+            "file": r.output,
+            "original_bytes": r.original_bytes,
+            "minified_bytes": r.minified_bytes,
+            "gzip_bytes": r.gzip_bytes,
+        }
+        for rel, r in sorted(results.items())
+    }
+    manifest_name = BUILD_MANIFEST if BUILD_MANIFEST not in results else "build-" + BUILD_MANIFEST
+    (output_dir / manifest_name).write_text(json.dumps(manifest, indent=2))
+
+    return BuildReport(
+        source_dir=str(source_dir),
+        output_dir=str(output_dir),
+        files=[results[rel] for rel in rel_paths],
+        duration=time.perf_counter() - started,
+    )
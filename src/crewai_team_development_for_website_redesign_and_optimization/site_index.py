@@ -0,0 +1,130 @@
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .settings import CrawlSettings, cache_dir
+
+
+@dataclass
+class PageSnapshot:
+    """What the last crawl learned about one URL."""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    sitemap_lastmod: Optional[str]
+    content_hash: Optional[str]
+    metrics: Dict[str, Any]
+    links: List[str]
+    fetched: float
+
+
+class SiteSnapshotIndex:
+    """
+    Per-site page snapshots kept between runs, in SQLite.
+
+    For every crawled URL it stores the validators the server sent (ETag,
+    Last-Modified), the sitemap ``lastmod``, a hash of the body and the
+    extracted metrics and links, so a later crawl can skip or revalidate
+    pages instead of downloading and parsing them again. Writes are batched
+    and committed by ``finish_crawl``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                sitemap_lastmod TEXT,
+                content_hash TEXT,
+                metrics TEXT NOT NULL,
+                links TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                seen REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_site ON pages (site, seen)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS crawls (
+                site TEXT PRIMARY KEY,
+                finished REAL NOT NULL,
+                pages INTEGER NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def last_crawl(self, site: str) -> Optional[float]:
+        """When the previous crawl of ``site`` finished, if there was one."""
+        row = self._conn.execute("SELECT finished FROM crawls WHERE site = ?", (site,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, url: str) -> Optional[PageSnapshot]:
+        row = self._conn.execute(
+            "SELECT url, etag, last_modified, sitemap_lastmod, content_hash, metrics, links, fetched "
+            "FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        return PageSnapshot(
+            url=row[0], etag=row[1], last_modified=row[2], sitemap_lastmod=row[3], content_hash=row[4],
+            metrics=json.loads(row[5]), links=json.loads(row[6]), fetched=row[7],
+        )
+
+    def put(self, site: str, snapshot: PageSnapshot, seen: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (url, site, etag, last_modified, sitemap_lastmod, content_hash, "
+            "metrics, links, fetched, seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                snapshot.url, site, snapshot.etag, snapshot.last_modified, snapshot.sitemap_lastmod,
+                snapshot.content_hash, json.dumps(snapshot.metrics), json.dumps(snapshot.links),
+                snapshot.fetched, seen,
+            ),
+        )
+
+    def touch(self, url: str, seen: float, sitemap_lastmod: Optional[str] = None) -> None:
+        """Mark an unchanged page as seen by this crawl."""
+        self._conn.execute(
+            "UPDATE pages SET seen = ?, sitemap_lastmod = COALESCE(?, sitemap_lastmod) WHERE url = ?",
+            (seen, sitemap_lastmod, url),
+        )
+
+    def finish_crawl(self, site: str, started: float, pages: int, complete: bool) -> List[str]:
+        """
+        Commit the crawl and return the URLs it no longer reached. Those are
+        dropped from the index only when the crawl was ``complete`` (not cut
+        short by ``max_pages``); otherwise they may simply not have been
+        visited this time.
+        """
+        missing = [
+            row[0] for row in self._conn.execute(
+                "SELECT url FROM pages WHERE site = ? AND seen < ? ORDER BY url", (site, started)
+            )
+        ]
+        if complete and missing:
+            self._conn.execute("DELETE FROM pages WHERE site = ? AND seen < ?", (site, started))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO crawls (site, finished, pages) VALUES (?, ?, ?)", (site, time.time(), pages)
+        )
+        self._conn.commit()
+        return missing if complete else []
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def open_site_index(settings: Optional[CrawlSettings] = None) -> Optional[SiteSnapshotIndex]:
+    """The snapshot index configured by ``settings``, or None when disabled."""
+    settings = settings or CrawlSettings()
+    if not settings.snapshots:
+        return None
+    path = Path(settings.snapshot_path) if settings.snapshot_path else cache_dir() / "site_snapshots.sqlite3"
+    return SiteSnapshotIndex(path)
@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .content_analysis import STOPWORDS, tokenize
+from .crawler import PageResult, SiteCrawler, normalize_url, origin_of
+from .settings import CrawlSettings, SiteSearchSettings, cache_dir
+
+# Passage vectors normalized per block of this many rows while building
+BUILD_BLOCK_ROWS = 4096
+
+
+def chunk_page(page: PageResult, chunk_words: int, overlap: int) -> List[str]:
+    """Overlapping windows of ``chunk_words`` words over the page's text."""
+    words = (page.text or "").split()
+    step = max(1, chunk_words - overlap)
+    return [" ".join(words[i:i + chunk_words]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+def _term_buckets(terms: Iterable[str], dimensions: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Stable (process-independent) hash bucket and sign of every term."""
+    hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in terms), dtype=np.uint32)
+    buckets = (hashes % np.uint32(dimensions)).astype(np.int64)
+    signs = np.where(hashes >> np.uint32(31), -1.0, 1.0)
+    return buckets, signs
+
+
+def _hashed_counts(token_lists: Sequence[List[str]], dimensions: int):
+    """
+    Sparse (row, bucket, signed sublinear tf) entries for a batch of token
+    lists, with stopwords left out.
+    """
+    vocab: Dict[str, int] = {}
+    for tokens in token_lists:
+        for t in set(tokens).difference(vocab):
+            vocab[t] = len(vocab)
+    lengths = np.fromiter((len(t) for t in token_lists), dtype=np.int64, count=len(token_lists))
+    ids = np.fromiter(
+        map(vocab.__getitem__, chain.from_iterable(token_lists)), dtype=np.int64, count=int(lengths.sum())
+    )
+    rows = np.repeat(np.arange(len(token_lists)), lengths)
+    terms = list(vocab)
+    keep = ~np.fromiter((len(t) < 3 or t in STOPWORDS for t in terms), dtype=bool, count=len(terms))
+    buckets, signs = _term_buckets(terms, dimensions)
+    v = max(len(terms), 1)
+    entries, tf = np.unique(rows * v + ids, return_counts=True)
+    entry_rows, entry_terms = np.divmod(entries, v)
+    wanted = keep[entry_terms]
+    entry_rows, entry_terms, tf = entry_rows[wanted], entry_terms[wanted], tf[wanted]
+    return entry_rows, buckets[entry_terms], signs[entry_terms] * (1.0 + np.log(tf))
+
+
+class SiteSearchIndex:
+    """
+    Passages of one crawled site, embedded for cosine-similarity search.
+
+    Pages are cut into overlapping windows of words; each window (with its
+    page title) becomes a signed feature-hashed bag of words weighted by
+    sublinear TF and per-dimension IDF and L2-normalized, so no embedding
+    model or network call is involved. The vectors live in a ``.npy`` file
+    opened memory-mapped: a large index costs page cache rather than heap,
+    and every process searching the same site shares it.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.meta: Dict[str, Any] = json.loads((self.directory / "meta.json").read_text())
+        self.idf = np.load(self.directory / "idf.npy")
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        with open(self.directory / "passages.jsonl") as f:
+            self.passages = [json.loads(line) for line in f]
+
+    @property
+    def created(self) -> float:
+        return self.meta["created"]
+
+    @classmethod
+    def build(
+        cls, directory: Path, site: str, pages: Sequence[PageResult], settings: SiteSearchSettings
+    ) -> "SiteSearchIndex":
+        dimensions = settings.dimensions
+        passages: List[Dict[str, str]] = []
+        token_lists: List[List[str]] = []
+        for page in pages:
+            title = page.title or ""
+            for chunk in chunk_page(page, settings.chunk_words, settings.chunk_overlap):
+                passages.append({"url": page.url, "title": title, "text": chunk})
+                token_lists.append(tokenize(f"{title} {chunk}"))
+
+        rows, buckets, weights = _hashed_counts(token_lists, dimensions)
+        # Document frequency per hash bucket, over passages
+        df = np.bincount(np.unique(rows * dimensions + buckets) % dimensions, minlength=dimensions)
+        idf = (np.log((1 + len(passages)) / (1 + df)) + 1.0).astype(np.float32)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        vectors = np.lib.format.open_memmap(
+            directory / "vectors.npy", mode="w+", dtype=np.float32, shape=(len(passages), dimensions)
+        )
+        bounds = np.searchsorted(rows, np.arange(0, len(passages) + BUILD_BLOCK_ROWS, BUILD_BLOCK_ROWS))
+        for block, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            first = block * BUILD_BLOCK_ROWS
+            count = min(BUILD_BLOCK_ROWS, len(passages) - first)
+            if count <= 0:
+                break
+            dense = np.bincount(
+                (rows[lo:hi] - first) * dimensions + buckets[lo:hi],
+                weights=weights[lo:hi] * idf[buckets[lo:hi]],
+                minlength=count * dimensions,
+            ).reshape(count, dimensions)
+            norms = np.linalg.norm(dense, axis=1, keepdims=True)
+            vectors[first:first + count] = dense / np.where(norms > 0, norms, 1.0)
+        vectors.flush()
+        del vectors
+
+        np.save(directory / "idf.npy", idf)
+        with open(directory / "passages.jsonl", "w") as f:
+            for passage in passages:
+                f.write(json.dumps(passage) + "\n")
+        (directory / "meta.json").write_text(json.dumps({
+            "site": site,
+            "created": time.time(),
+            "pages": len(pages),
+            "passages": len(passages),
+            "dimensions": dimensions,
+            "chunk_words": settings.chunk_words,
+            "chunk_overlap": settings.chunk_overlap,
+        }))
+        return cls(directory)
+
+    def embed(self, text: str) -> np.ndarray:
+        dimensions = self.meta["dimensions"]
+        _, buckets, weights = _hashed_counts([tokenize(text)], dimensions)
+        query = np.bincount(buckets, weights=weights * self.idf[buckets], minlength=dimensions)
+        norm = np.linalg.norm(query)
+        return (query / norm if norm else query).astype(np.float32)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[float, Dict[str, str]]]:
+        """The ``top_k`` passages most similar to ``query``, best first."""
+        if not self.passages:
+            return []
+        vector = self.embed(query)
+        if not vector.any():
+            return []
+        scores = np.asarray(self.vectors @ vector)
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self.passages[i]) for i in best if scores[i] > 0]
+
+
+class SiteSearch:
+    """
+    Site search indexes shared by every agent in the process.
+
+    Each site's index is built once (from a text crawl) and kept under
+    ``root``, one versioned directory per build with a ``CURRENT`` pointer,
+    so readers holding the previous version's memory map are unaffected by
+    a rebuild. Indexes older than ``ttl_hours`` are rebuilt on next use;
+    concurrent first searches of one site wait for a single build.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[SiteSearchSettings] = None,
+        crawl_settings: Optional[CrawlSettings] = None,
+        root: Optional[Path] = None,
+    ):
+        self.settings = settings or SiteSearchSettings()
+        self.crawl_settings = crawl_settings or CrawlSettings()
+        self.root = Path(root or (self.settings.path or cache_dir() / "site_search"))
+        self._indexes: Dict[str, SiteSearchIndex] = {}
+        self._site_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def index(self, site_url: str) -> SiteSearchIndex:
+        """The site's index, loaded from disk or built by crawling it."""
+        site_url = normalize_url(site_url if "://" in site_url else "https://" + site_url)
+        site = origin_of(site_url)
+        with self._lock:
+            site_lock = self._site_locks.setdefault(site, threading.Lock())
+        with site_lock:
+            index = self._indexes.get(site)
+            if index is None or self._expired(index):
+                index = self._load(site)
+            if index is None or self._expired(index):
+                index = self._build(site, site_url)
+            self._indexes[site] = index
+        return index
+
+    def search(self, site_url: str, query: str, top_k: Optional[int] = None) -> List[Tuple[float, Dict[str, str]]]:
+        return self.index(site_url).search(query, top_k or self.settings.top_k)
+
+    def _expired(self, index: SiteSearchIndex) -> bool:
+        return time.time() - index.created > self.settings.ttl_hours * 3600
+
+    def _site_dir(self, site: str) -> Path:
+        return self.root / hashlib.sha256(site.encode("utf-8")).hexdigest()[:16]
+
+    def _load(self, site: str) -> Optional[SiteSearchIndex]:
+        pointer = self._site_dir(site) / "CURRENT"
+        try:
+            return SiteSearchIndex(self._site_dir(site) / pointer.read_text().strip())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, site: str, site_url: str) -> SiteSearchIndex:
+        result = asyncio.run(SiteCrawler(self.crawl_settings, collect_text=True).crawl(site_url))
+        pages = [p for p in result.pages if p.ok and p.text]
+        if not pages:
+            raise ValueError(f"no page text could be fetched from {site_url}")
+        site_dir = self._site_dir(site)
+        version = f"{time.time_ns()}-{os.getpid()}"
+        index = SiteSearchIndex.build(site_dir / version, site, pages, self.settings)
+        temp_pointer = site_dir / f".CURRENT.{version}"
+        temp_pointer.write_text(version)
+        os.replace(temp_pointer, site_dir / "CURRENT")
+        # Older versions stay readable through existing maps after deletion
+        for old in site_dir.iterdir():
+            if old.is_dir() and old.name != version:
+                shutil.rmtree(old, ignore_errors=True)
+        return index
+
+
+_shared: Optional[SiteSearch] = None
+_shared_lock = threading.Lock()
+
+
+def shared_site_search(
+    settings: Optional[SiteSearchSettings] = None, crawl_settings: Optional[CrawlSettings] = None
+) -> SiteSearch:
+    """The process-wide SiteSearch, created with the first caller's settings."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SiteSearch(settings, crawl_settings)
+        return _shared
+
+
+def search_site(
+    tool_input: str,
+    site_url: str,
+    settings: Optional[SiteSearchSettings] = None,
+    crawl_settings: Optional[CrawlSettings] = None
+) -> str:
+    """
+    Answer a question about a site with its most relevant passages. The
+    input is the question, optionally preceded by the URL of another site
+    to search (e.g. the local preview).
+    """
+    try:
+        query = tool_input.strip()
+        first, _, rest = query.partition(" ")
+        if first.startswith(("http://", "https://")):
+            site_url, query = first, rest.strip()
+        if not query:
+            return "Error: no search query given."
+        search = shared_site_search(settings, crawl_settings)
+        index = search.index(site_url)
+        results = index.search(query, search.settings.top_k)
+        indexed = time.strftime("%Y-%m-%d %H:%M", time.localtime(index.created))
+        lines = [
+            f"Site search for '{query}' on {index.meta['site']} "
+            f"({index.meta['passages']} passages from {index.meta['pages']} pages, indexed {indexed}):"
+        ]
+        if not results:
+            lines.append("No matching passages.")
+        limit = search.settings.passage_chars
+        for rank, (score, passage) in enumerate(results, 1):
+            text = passage["text"]
+            if len(text) > limit:
+                text = text[:limit].rsplit(" ", 1)[0] + " ..."
+            lines.append(f"{rank}. [{score:.2f}] {passage['title'] or 'Untitled'} - {passage['url']}")
+            lines.append(f"   {text}")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error searching site: {str(e)}"
@@ -0,0 +1,212 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, TextIO
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Longest partial line kept in memory before it is written through
+MAX_PENDING_CHARS = 64 * 1024
+
+
+def is_file_marker(line: str) -> bool:
+    """True for "// filename: x" and "/* filename: x */" marker lines."""
+    return "// filename:" in line or "/* filename:" in line
+
+
+def marker_filename(line: str) -> str:
+    return line.split("filename:")[1].strip().strip("*/ ")
+
+
+class SiteFileWriter:
+    """
+    Incremental writer for multi-file code generator output.
+
+    Text is fed in chunks of any size (LLM tokens or slices of a finished
+    string). Each ``// filename:`` / ``/* filename: */`` marker line starts a
+    new file; a file is written to a temporary sibling and renamed into place
+    as soon as the next marker (or the end of the stream) shows it is
+    complete, so readers never see half-written files. Only the current
+    partial line is held in memory.
+
+    Text before the first marker is dropped once a marker is seen. If no
+    marker ever appears, the whole stream is saved as ``fallback_name``
+    (nothing is saved when it is None).
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        fallback_name: Optional[str] = "index.html",
+        on_file: Optional[Callable[[Path], None]] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.fallback_name = fallback_name
+        self.on_file = on_file
+        self.written: List[Path] = []
+        self._pending = ""
+        self._target: Optional[Path] = None
+        self._handle: Optional[TextIO] = None
+        self._temp_path: Optional[str] = None
+        self._lines = 0
+        self._line_open = False
+        self._seen_marker = False
+        self._closed = False
+        # Everything before the first marker, in case no marker ever shows up
+        if fallback_name:
+            self._open(self.output_dir / fallback_name)
+
+    def __enter__(self) -> "SiteFileWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def feed(self, chunk: str) -> None:
+        if self._closed:
+            raise ValueError("feed() called on a closed SiteFileWriter")
+        self._pending += chunk
+        if "\n" not in chunk:
+            if len(self._pending) > MAX_PENDING_CHARS and "filename:" not in self._pending:
+                # A very long line can't be a marker; write it through
+                self._write_text(self._pending)
+                self._pending = ""
+            return
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._handle_line(line)
+
+    def close(self) -> List[Path]:
+        """Flush the last line, commit the last file and return every path written."""
+        if self._closed:
+            return self.written
+        self._handle_line(self._pending)
+        self._pending = ""
+        if self._target is not None and (self._lines or not self._seen_marker):
+            self._commit()
+        else:
+            self._discard()
+        self._closed = True
+        return self.written
+
+    def abort(self) -> None:
+        """Drop the file in progress; files already committed are kept."""
+        self._discard()
+        self._closed = True
+
+    def _handle_line(self, line: str) -> None:
+        if not self._line_open and is_file_marker(line):
+            if self._seen_marker:
+                self._commit()
+            else:
+                self._discard()
+            self._seen_marker = True
+            target = (self.output_dir / marker_filename(line)).resolve()
+            if self.output_dir.resolve() not in target.parents:
+                print(f"Skipping file outside the site folder: {marker_filename(line)}")
+                return
+            self._open(target)
+            return
+        self._write_text(line)
+        self._line_open = False
+
+    def _write_text(self, text: str) -> None:
+        if self._handle is None:
+            return
+        if not self._line_open:
+            if self._lines:
+                self._handle.write("\n")
+            self._lines += 1
+            self._line_open = True
+        self._handle.write(text)
+
+    def _open(self, target: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        self._handle = os.fdopen(fd, "w")
+        self._target = target
+        self._lines = 0
+        self._line_open = False
+
+    def _commit(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        os.replace(self._temp_path, self._target)
+        self.written.append(self._target)
+        print(f"Successfully saved: {self._target}")
+        if self.on_file:
+            self.on_file(self._target)
+        self._reset()
+
+    def _discard(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.close()
+        os.unlink(self._temp_path)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._handle = None
+        self._temp_path = None
+        self._target = None
+        self._lines = 0
+        self._line_open = False
+
+
+def write_site_files(
+    chunks: Iterable[str],
+    output_dir: Path,
+    on_file: Optional[Callable[[Path], None]] = None,
+) -> List[Path]:
+    """Stream an iterable of text chunks into site files."""
+    with SiteFileWriter(output_dir, on_file=on_file) as writer:
+        for chunk in chunks:
+            writer.feed(chunk)
+    return writer.written
+
+
+class SiteWriterCallbackHandler(BaseCallbackHandler):
+    """
+    Write site files from a streaming LLM's tokens while it generates.
+
+    Each LLM call gets its own SiteFileWriter; files appear on disk as soon
+    as the model moves on to the next marker. Chatter before the first
+    marker is never saved.
+    """
+
+    def __init__(self, output_dir: Path, on_file: Optional[Callable[[Path], None]] = None):
+        self.output_dir = Path(output_dir)
+        self.on_file = on_file
+        self._writer: Optional[SiteFileWriter] = None
+
+    def _start(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = SiteFileWriter(self.output_dir, fallback_name=None, on_file=self.on_file)
+
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any) -> None:
+        self._start()
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any) -> None:
+        self._start()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self._writer is not None:
+            self._writer.feed(token)
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
@@ -0,0 +1,476 @@
+import base64
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import Status, StatusCode
+
+from .settings import TracingSettings
+
+# crewai's delegation tools; their spans cover the whole round-trip to the coworker
+DELEGATION_TOOLS = frozenset({"Delegate work to co-worker", "Ask question to co-worker"})
+
+_COWORKER_RE = re.compile(r"""coworker['"]?\s*[:=]\s*['"]([^'"]+)['"]""")
+
+# Every langchain callback manager configured while this is set gets the handler,
+# so agents, LLMs and tools are traced without passing callbacks through crewai
+_handler_var: ContextVar[Optional["TracingCallbackHandler"]] = ContextVar("crew_tracing_handler", default=None)
+register_configure_hook(_handler_var, inheritable=True)
+
+_local = threading.local()
+
+
+class _OpenSpan:
+    """A started span plus the counters that are set as attributes when it ends."""
+
+    def __init__(self, span: trace.Span, kind: str, task_id: Optional[str], role: Optional[str] = None):
+        self.span = span
+        self.kind = kind
+        self.task_id = task_id
+        self.role = role
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.stack: List["_OpenSpan"] = _stack()
+
+    def end(self, error: Optional[BaseException] = None, **attributes: Any) -> None:
+        for key, value in {**self.counters, **attributes}.items():
+            if value is not None:
+                self.span.set_attribute(key, value)
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(Status(StatusCode.ERROR, str(error)))
+        self.span.end()
+        if self in self.stack:
+            self.stack.remove(self)
+
+
+def _stack() -> List[_OpenSpan]:
+    """Open spans of the calling thread, innermost last."""
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+    return _local.spans
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss on the innermost open span of this thread."""
+    stack = _stack()
+    if stack:
+        stack[-1].counters[f"{cache}.cache_{'hits' if hit else 'misses'}"] += 1
+
+
+def annotate_span(**attributes: Any) -> None:
+    """Set attributes on the innermost open span of this thread, if any."""
+    stack = _stack()
+    if stack:
+        for key, value in attributes.items():
+            stack[-1].span.set_attribute(key, value)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turn langchain callbacks into OpenTelemetry spans.
+
+    A top-level chain run is crewai's agent executor and becomes an
+    ``agent`` span; each chain it starts directly is one planning step.
+    LLM runs become ``llm`` spans with token usage, tool runs ``tool`` spans,
+    and crewai's delegation tools ``delegation`` spans, under which the
+    coworker's own agent span nests. Other chain runs (prompt templates,
+    output parsers) get no span of their own; their children attach to the
+    nearest traced ancestor.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: trace.Tracer):
+        self.tracer = tracer
+        self._runs: Dict[UUID, _OpenSpan] = {}
+        self._aliases: Dict[UUID, UUID] = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, run_id: Optional[UUID]) -> Optional[_OpenSpan]:
+        with self._lock:
+            while run_id is not None and run_id not in self._runs:
+                run_id = self._aliases.get(run_id)
+            return self._runs.get(run_id) if run_id is not None else None
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent: Optional[_OpenSpan],
+        name: str,
+        kind: str,
+        role: Optional[str] = None,
+        **attributes: Any
+    ) -> _OpenSpan:
+        parent = parent or (_stack()[-1] if _stack() else None)
+        context = trace.set_span_in_context(parent.span) if parent else otel_context.get_current()
+        task_id = parent.task_id if parent else None
+        attributes = {"crew.kind": kind, "crew.task_id": task_id, "agent.role": role, **attributes}
+        span = self.tracer.start_span(
+            name, context=context, attributes={k: v for k, v in attributes.items() if v is not None}
+        )
+        opened = _OpenSpan(span, kind, task_id, role)
+        opened.stack.append(opened)
+        with self._lock:
+            self._runs[run_id] = opened
+        return opened
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> Optional[_OpenSpan]:
+        with self._lock:
+            opened = self._runs.pop(run_id, None)
+            self._aliases.pop(run_id, None)
+        if opened:
+            opened.end(error, **attributes)
+        return opened
+
+    # Chains: agent executors and their steps
+
+    def on_chain_start(
+        self, serialized: Dict[str, Any], inputs: Dict[str, Any], *,
+        run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any
+    ) -> None:
+        parent = self._resolve(parent_run_id)
+        if parent is None:
+            # The enclosing task span or delegation span says whose executor this is
+            outer = _stack()[-1] if _stack() else None
+            role = outer.role if outer else None
+            if outer and outer.kind == "task":
+                if outer.counters["agent.runs"]:
+                    outer.counters["retries"] += 1
+                outer.counters["agent.runs"] += 1
+            self._start(run_id, outer, f"agent {role}" if role else "agent", "agent", role)
+        elif parent.kind == "agent" and parent_run_id in self._runs:
+            parent.counters["agent.steps"] += 1
+            self._start(run_id, parent, "agent step", "step", parent.role, **{"agent.step": parent.counters["agent.steps"]})
+        else:
+            with self._lock:
+                self._aliases[run_id] = parent_run_id
+
+    def on_chain_end(self, outputs: Dict[str, Any], *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    # LLM calls
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: List[str], *,
+        run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any
+    ) -> None:
+        self._start_llm(run_id, parent_run_id, kwargs.get("invocation_params") or {})
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[Any]], *,
+        run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any
+    ) -> None:
+        self._start_llm(run_id, parent_run_id, kwargs.get("invocation_params") or {})
+
+    def _start_llm(self, run_id: UUID, parent_run_id: Optional[UUID], params: Dict[str, Any]) -> None:
+        parent = self._resolve(parent_run_id)
+        model = params.get("model_name") or params.get("model")
+        self._start(
+            run_id, parent, f"llm {model}" if model else "llm", "llm",
+            parent.role if parent else None, **{"llm.model": model}
+        )
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        opened = self._runs.get(run_id)
+        if opened:
+            if not opened.counters["llm.streamed_tokens"]:
+                opened.span.add_event("first_token")
+            opened.counters["llm.streamed_tokens"] += 1
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        opened = self._runs.get(run_id)
+        # Streamed responses carry no usage; fall back to the streamed token count
+        completion = usage.get("completion_tokens") or (opened.counters["llm.streamed_tokens"] if opened else 0)
+        self._end(
+            run_id,
+            **{
+                "llm.prompt_tokens": usage.get("prompt_tokens"),
+                "llm.completion_tokens": completion or None,
+                "llm.total_tokens": usage.get("total_tokens") or completion or None,
+            }
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        opened = self._resolve(run_id)
+        if opened:
+            opened.counters["retries"] += 1
+            opened.span.add_event("retry", {"attempt": getattr(retry_state, "attempt_number", 0)})
+
+    # Tools and delegation
+
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *,
+        run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any
+    ) -> None:
+        parent = self._resolve(parent_run_id)
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        if name in DELEGATION_TOOLS:
+            match = _COWORKER_RE.search(json.dumps(kwargs.get("inputs")) if kwargs.get("inputs") else input_str)
+            coworker = match.group(1).strip() if match else None
+            # The span's role is the coworker's, so its agent span is labelled with it
+            self._start(
+                run_id, parent, f"delegate {coworker}" if coworker else "delegate", "delegation", coworker,
+                **{"tool.name": name, "delegation.from": parent.role if parent else None}
+            )
+        else:
+            self._start(
+                run_id, parent, f"tool {name}", "tool", parent.role if parent else None,
+                **{"tool.name": name, "tool.input_chars": len(input_str or "")}
+            )
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, **{"tool.output_chars": len(str(output))})
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+
+def span_record(span: ReadableSpan) -> Dict[str, Any]:
+    """Flat JSON-friendly form of a finished span."""
+    context = span.get_span_context()
+    return {
+        "name": span.name,
+        "trace_id": f"{context.trace_id:032x}",
+        "span_id": f"{context.span_id:016x}",
+        "parent_id": f"{span.parent.span_id:016x}" if span.parent else None,
+        "start": span.start_time / 1e9,
+        "duration_ms": (span.end_time - span.start_time) / 1e6,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "events": [
+            {"name": event.name, "time": event.timestamp / 1e9, "attributes": dict(event.attributes or {})}
+            for event in span.events
+        ],
+    }
+
+
+def _hex_ids(value: Any) -> Any:
+    """OTLP/JSON wants hex trace and span ids where protobuf's JSON mapping gives base64."""
+    if isinstance(value, dict):
+        return {
+            k: base64.b64decode(v).hex() if k in ("traceId", "spanId", "parentSpanId") and v else _hex_ids(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_hex_ids(v) for v in value]
+    return value
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Write finished spans to a local file, one JSON document per line.
+
+    ``jsonl`` writes one flat record per span (see ``span_record``); ``otlp``
+    writes one OTLP/JSON ``ExportTraceServiceRequest`` per export batch, the
+    format the OpenTelemetry collector's file exporter and receiver use.
+    """
+
+    def __init__(self, path: Path, format: str = "jsonl"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.format = format
+        self._encode = None
+        if format == "otlp":
+            from google.protobuf.json_format import MessageToDict
+            from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+
+            self._encode = lambda spans: _hex_ids(MessageToDict(encode_spans(spans)))
+        self._lock = threading.Lock()
+        self._file = open(self.path, "w")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        if self._encode:
+            lines = [json.dumps(self._encode(spans))]
+        else:
+            lines = [json.dumps(span_record(span), default=str) for span in spans]
+        with self._lock:
+            if self._file.closed:
+                return SpanExportResult.FAILURE
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class SpanCollector(SpanProcessor):
+    """Keep a flat record of every finished span for the report's timing breakdown."""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        record = span_record(span)
+        with self._lock:
+            self.records.append(record)
+
+
+class RunTracer:
+    """
+    Tracing for one pipeline run.
+
+    Spans go to a private TracerProvider (crewai's own telemetry keeps the
+    global one) and are exported to ``path`` in the background; nothing
+    but the local file is needed. ``run_span`` opens the root span, and
+    ``task_span`` one span per task, which also installs the langchain
+    callback handler for everything the task's agent does in that thread.
+    """
+
+    def __init__(self, settings: Optional[TracingSettings] = None, path: Optional[Path] = None):
+        self.settings = settings or TracingSettings()
+        self.path = Path(path or self.settings.path or "traces.jsonl")
+        self.provider = TracerProvider(resource=Resource.create({"service.name": "website-redesign-crew"}))
+        self.provider.add_span_processor(BatchSpanProcessor(FileSpanExporter(self.path, self.settings.format)))
+        self.collector = SpanCollector()
+        self.provider.add_span_processor(self.collector)
+        self.tracer = self.provider.get_tracer(__name__)
+        self.handler = TracingCallbackHandler(self.tracer)
+        self._root: Optional[trace.Span] = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def _open(
+        self, name: str, kind: str, task_id: Optional[str] = None, role: Optional[str] = None, **attributes: Any
+    ) -> Iterator[_OpenSpan]:
+        parent = self._root if kind != "run" else None
+        context = trace.set_span_in_context(parent) if parent else otel_context.get_current()
+        attributes = {"crew.kind": kind, "crew.task_id": task_id, "agent.role": role, **attributes}
+        span = self.tracer.start_span(
+            name, context=context, attributes={k: v for k, v in attributes.items() if v is not None}
+        )
+        opened = _OpenSpan(span, kind, task_id, role)
+        opened.stack.append(opened)
+        handler_token = _handler_var.set(self.handler)
+        context_token = otel_context.attach(trace.set_span_in_context(span))
+        error = None
+        try:
+            yield opened
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            otel_context.detach(context_token)
+            _handler_var.reset(handler_token)
+            opened.end(error)
+
+    @contextmanager
+    def run_span(self, **attributes: Any) -> Iterator[_OpenSpan]:
+        with self._open("crew run", "run", **attributes) as opened:
+            self._root = opened.span
+            self._started = time.perf_counter()
+            try:
+                yield opened
+            finally:
+                self._root = None
+                # Get the spans of a failed run to disk before the error propagates
+                self.provider.force_flush()
+
+    def task_span(self, task_id: str, task: Any):
+        agent = getattr(task, "agent", None)
+        return self._open(f"task {task_id}", "task", task_id, getattr(agent, "role", None))
+
+    def span(self, name: str, **attributes: Any):
+        """Span for a pipeline phase outside the tasks (saving files, the build)."""
+        return self._open(name, "phase", **attributes)
+
+    def shutdown(self) -> None:
+        """Flush buffered spans to the trace file."""
+        self.provider.shutdown()
+
+    def markdown(self) -> str:
+        records = list(self.collector.records)
+        run = next((r for r in records if r["attributes"].get("crew.kind") == "run"), None)
+        total = run["duration_ms"] / 1000 if run else time.perf_counter() - self._started
+
+        tasks: Dict[str, Dict[str, Any]] = {}
+        categories: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        labels = {"llm": "LLM calls", "delegation": "Delegation round-trips"}
+        for r in records:
+            attributes = r["attributes"]
+            kind = attributes.get("crew.kind")
+            seconds = r["duration_ms"] / 1000
+            if kind in ("llm", "tool", "delegation", "phase"):
+                if kind == "tool":
+                    label = f"Tool: {attributes.get('tool.name')}"
+                else:
+                    label = labels.get(kind) or r["name"].capitalize()
+                categories[label][0] += 1
+                categories[label][1] += seconds
+            task_id = attributes.get("crew.task_id")
+            if not task_id:
+                continue
+            task = tasks.setdefault(task_id, defaultdict(float))
+            if kind == "task":
+                task.update(
+                    wall=seconds, role=attributes.get("agent.role", ""),
+                    checkpoint=attributes.get("checkpoint") == "hit"
+                )
+            elif kind == "llm":
+                task["llm_calls"] += 1
+                task["llm_time"] += seconds
+                task["tokens"] += attributes.get("llm.total_tokens", 0)
+            elif kind == "tool":
+                task["tool_calls"] += 1
+                task["tool_time"] += seconds
+            elif kind == "delegation":
+                task["delegations"] += 1
+            task["retries"] += attributes.get("retries", 0)
+            task["cache_hits"] += attributes.get("llm.cache_hits", 0)
+
+        lines = [
+            f"Total run time: {total:.1f} s. Trace: `{self.path}`",
+            "",
+            "| Task | Agent | Wall time | LLM calls | LLM time | Tokens | Tool calls | Tool time "
+            "| Delegations | Retries | LLM cache hits |",
+            "| --- | --- | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: |",
+        ]
+        for task_id, t in tasks.items():
+            wall = f"{t['wall']:.1f} s" + (" (checkpoint)" if t.get("checkpoint") else "")
+            lines.append(
+                f"| {task_id} | {t.get('role', '')} | {wall} | {int(t['llm_calls'])} | {t['llm_time']:.1f} s "
+                f"| {int(t['tokens']):,} | {int(t['tool_calls'])} | {t['tool_time']:.1f} s "
+                f"| {int(t['delegations'])} | {int(t['retries'])} | {int(t['cache_hits'])} |"
+            )
+        lines += ["", "| Category | Calls | Total time | Share of run |", "| --- | ---: | ---: | ---: |"]
+        for label, (calls, seconds) in sorted(categories.items(), key=lambda item: -item[1][1]):
+            share = seconds / total if total else 0.0
+            lines.append(f"| {label} | {int(calls)} | {seconds:.1f} s | {share:.0%} |")
+        lines.append(
+            "\nCategories overlap: delegation time includes the coworker's LLM and tool calls, "
+            "and tasks running in parallel can add up to more than the run time."
+        )
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        records = self.collector.records
+        llm = [r for r in records if r["attributes"].get("crew.kind") == "llm"]
+        tools = [r for r in records if r["attributes"].get("crew.kind") in ("tool", "delegation")]
+        return (
+            f"Tracing: {len(records)} spans ({len(llm)} LLM calls, "
+            f"{sum(r['duration_ms'] for r in llm) / 1000:.1f} s; {len(tools)} tool calls, "
+            f"{sum(r['duration_ms'] for r in tools) / 1000:.1f} s) written to {self.path}"
+        )